@@ -0,0 +1,27 @@
+"""files entity index
+
+Indexes `files` by `(entity_name, entity_id)`, the lookup behind a comment's files and its conditional GET version.
+
+Revision ID: 0d7e4c2a8b95
+Revises: f81c3b7a9d20
+Create Date: 2026-10-18 18:04:51.339026
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0d7e4c2a8b95'
+down_revision: Union[str, None] = 'f81c3b7a9d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_files_entity', 'files', ['entity_name', 'entity_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_files_entity', table_name='files')
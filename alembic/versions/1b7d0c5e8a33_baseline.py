@@ -0,0 +1,29 @@
+"""baseline
+
+The schema `create_database()` in `main.py` built before migrations were added, nothing to run.
+
+A database created that way before 3f1c9a7d2b40 is stamped here, then upgraded:
+`alembic stamp 1b7d0c5e8a33 && alembic upgrade head`. One created by `create_database()` since then already
+has every index and column of the head revision: `alembic stamp head`.
+
+Revision ID: 1b7d0c5e8a33
+Revises:
+Create Date: 2026-10-18 09:10:02.118440
+
+"""
+from typing import Sequence, Union
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b7d0c5e8a33'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,48 @@
+"""requests composite indexes
+
+Replaces the single-column indexes on `requests` that no query filters on with composite indexes
+matching the list workload, and indexes approvals by `(request_id, position)`.
+
+Revision ID: 3f1c9a7d2b40
+Revises: 1b7d0c5e8a33
+Create Date: 2026-10-18 09:12:31.402114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b40'
+down_revision: Union[str, None] = '1b7d0c5e8a33'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+UNUSED_REQUEST_INDEXES = ['country', 'state', 'city', 'start', 'end', 'hotel', 'rate']
+
+
+def upgrade() -> None:
+    op.create_index('ix_requests_org_deleted_created', 'requests', ['organization_id', 'is_deleted', 'date_created'])
+    op.create_index('ix_requests_org_status_created', 'requests', ['organization_id', 'status', 'date_created'])
+    # covered by the leftmost column of both composite indexes
+    op.drop_index('ix_requests_organization_id', table_name='requests')
+
+    for column in UNUSED_REQUEST_INDEXES:
+        op.drop_index(f'ix_requests_{column}', table_name='requests')
+
+    op.create_index('ix_request_approvals_request_position', 'request_approvals', ['request_id', 'position'])
+    op.drop_index('ix_request_approvals_position', table_name='request_approvals')
+
+
+def downgrade() -> None:
+    op.create_index('ix_request_approvals_position', 'request_approvals', ['position'])
+    op.drop_index('ix_request_approvals_request_position', table_name='request_approvals')
+
+    for column in UNUSED_REQUEST_INDEXES:
+        op.create_index(f'ix_requests_{column}', 'requests', [column])
+
+    op.create_index('ix_requests_organization_id', 'requests', ['organization_id'])
+    op.drop_index('ix_requests_org_status_created', table_name='requests')
+    op.drop_index('ix_requests_org_deleted_created', table_name='requests')
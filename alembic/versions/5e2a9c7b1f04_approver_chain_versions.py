@@ -0,0 +1,29 @@
+"""approver chain versions
+
+Adds `organizations.approver_chain_version`, bumped with every group change that alters approver chains so each
+worker process can tell its cached chains are stale.
+
+Revision ID: 5e2a9c7b1f04
+Revises: 9c4e7a2f1d86
+Create Date: 2026-10-18 21:04:37.219508
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a9c7b1f04'
+down_revision: Union[str, None] = '9c4e7a2f1d86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('organizations', sa.Column('approver_chain_version', sa.BIGINT(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('organizations', 'approver_chain_version')
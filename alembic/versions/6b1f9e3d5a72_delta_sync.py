@@ -0,0 +1,51 @@
+"""delta sync
+
+Adds `(organization_id, last_updated, id)` indexes on `requests`, `comments` and `closed`, a `(last_updated, id)` index
+on `request_approvals` for `GET /sync`, and the `sync_tombstones` table recording hard-deleted comments and closeds.
+
+Revision ID: 6b1f9e3d5a72
+Revises: 0d7e4c2a8b95
+Create Date: 2026-10-18 19:26:14.570832
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b1f9e3d5a72'
+down_revision: Union[str, None] = '0d7e4c2a8b95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_requests_org_updated', 'requests', ['organization_id', 'last_updated', 'id'])
+    op.create_index('ix_request_approvals_updated', 'request_approvals', ['last_updated', 'id'])
+    op.create_index('ix_comments_org_updated', 'comments', ['organization_id', 'last_updated', 'id'])
+    op.create_index('ix_closed_org_updated', 'closed', ['organization_id', 'last_updated', 'id'])
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.BIGINT(), autoincrement=True, nullable=False),
+        sa.Column('organization_id', sa.BIGINT(), nullable=False),
+        sa.Column('entity', sa.String(length=255), nullable=False),
+        sa.Column('entity_id', sa.BIGINT(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_id'), 'sync_tombstones', ['id'], unique=False)
+    op.create_index('ix_sync_tombstones_org_deleted', 'sync_tombstones', ['organization_id', 'deleted_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sync_tombstones_org_deleted', table_name='sync_tombstones')
+    op.drop_index(op.f('ix_sync_tombstones_id'), table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+
+    op.drop_index('ix_closed_org_updated', table_name='closed')
+    op.drop_index('ix_comments_org_updated', table_name='comments')
+    op.drop_index('ix_request_approvals_updated', table_name='request_approvals')
+    op.drop_index('ix_requests_org_updated', table_name='requests')
@@ -0,0 +1,39 @@
+"""soft delete partial indexes
+
+Postgres only: partial indexes over live rows for the soft-delete criterion applied to every ORM query.
+On MySQL live-row scans are served by `ix_requests_org_deleted_created`.
+
+Revision ID: 8b2e4d61c9f3
+Revises: 3f1c9a7d2b40
+Create Date: 2026-10-18 10:03:47.218563
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d61c9f3'
+down_revision: Union[str, None] = '3f1c9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.create_index(
+        'ix_requests_live_org_created', 'requests', ['organization_id', 'date_created'],
+        postgresql_where=sa.text('NOT is_deleted'))
+    op.create_index('ix_groups_live_org', 'groups', ['organization_id'], postgresql_where=sa.text('NOT is_deleted'))
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_groups_live_org', table_name='groups')
+    op.drop_index('ix_requests_live_org_created', table_name='requests')
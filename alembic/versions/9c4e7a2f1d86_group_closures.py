@@ -0,0 +1,64 @@
+"""group closures
+
+Adds `group_closures`, every (ancestor, descendant) pair of the group tree with the distance between them,
+so subtrees and ancestor chains are one indexed join, and backfills it from `groups.parent_group_id`.
+
+Revision ID: 9c4e7a2f1d86
+Revises: 6b1f9e3d5a72
+Create Date: 2026-10-18 19:12:40.518733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e7a2f1d86'
+down_revision: Union[str, None] = '6b1f9e3d5a72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    group_closures = op.create_table(
+        'group_closures',
+        sa.Column('ancestor_id', sa.BIGINT(), nullable=False),
+        sa.Column('descendant_id', sa.BIGINT(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['groups.id'], ),
+        sa.ForeignKeyConstraint(['descendant_id'], ['groups.id'], ),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_group_closures_descendant_depth', 'group_closures', ['descendant_id', 'depth'], unique=False)
+
+    groups = sa.table('groups', sa.column('id'), sa.column('parent_group_id'), sa.column('is_deleted'))
+    parents = dict(op.get_bind().execute(
+        sa.select(groups.c.id, groups.c.parent_group_id).where(sa.or_(groups.c.is_deleted.is_(None), groups.c.is_deleted == sa.false()))
+    ).all())
+
+    closures = []
+    for group_id in parents:
+        ancestor_id, depth = group_id, 0
+        # a parent that is missing, deleted or already on the path (a cycle) ends the chain
+        seen = set()
+        while ancestor_id in parents and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            closures.append({"ancestor_id": ancestor_id, "descendant_id": group_id, "depth": depth})
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+
+        if len(closures) >= BACKFILL_BATCH_SIZE:
+            op.bulk_insert(group_closures, closures)
+            closures = []
+
+    if closures:
+        op.bulk_insert(group_closures, closures)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_group_closures_descendant_depth', table_name='group_closures')
+    op.drop_table('group_closures')
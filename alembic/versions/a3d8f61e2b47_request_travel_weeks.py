@@ -0,0 +1,68 @@
+"""request travel weeks
+
+Adds `request_travel_weeks`, one row per calendar week (keyed by its Monday) each request's trip overlaps,
+so the travel calendar reads an organization's trips in a window with one primary key range scan, and backfills it.
+
+Revision ID: a3d8f61e2b47
+Revises: e5b92f0a7c14
+Create Date: 2026-10-18 16:31:05.277194
+
+"""
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d8f61e2b47'
+down_revision: Union[str, None] = 'e5b92f0a7c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    request_travel_weeks = op.create_table(
+        'request_travel_weeks',
+        sa.Column('organization_id', sa.BIGINT(), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('request_id', sa.BIGINT(), nullable=False),
+        sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ),
+        sa.PrimaryKeyConstraint('organization_id', 'week_start', 'request_id')
+    )
+    op.create_index(op.f('ix_request_travel_weeks_request_id'), 'request_travel_weeks', ['request_id'], unique=False)
+
+    requests = sa.table('requests', sa.column('id'), sa.column('organization_id'), sa.column('start'), sa.column('end'))
+    connection = op.get_bind()
+    last_id = 0
+
+    while True:
+        batch = connection.execute(
+            sa.select(requests.c.id, requests.c.organization_id, requests.c.start, requests.c.end)
+            .where(requests.c.id > last_id)
+            .order_by(requests.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+
+        if not batch:
+            break
+
+        weeks = []
+        for id, organization_id, start, end in batch:
+            week = start - timedelta(days=start.weekday())
+            while week <= end:
+                weeks.append({"organization_id": organization_id, "week_start": week, "request_id": id})
+                week += timedelta(weeks=1)
+
+        if weeks:
+            op.bulk_insert(request_travel_weeks, weeks)
+        last_id = batch[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_request_travel_weeks_request_id'), table_name='request_travel_weeks')
+    op.drop_table('request_travel_weeks')
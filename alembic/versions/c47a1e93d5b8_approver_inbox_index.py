@@ -0,0 +1,33 @@
+"""approver inbox index
+
+Indexes `request_approvals` by `(approver_id, status, position)` so an approver's pending approvals
+are one range scan, replacing the single-column `approver_id` index it makes redundant.
+
+Revision ID: c47a1e93d5b8
+Revises: 8b2e4d61c9f3
+Create Date: 2026-10-18 11:02:47.518330
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a1e93d5b8'
+down_revision: Union[str, None] = '8b2e4d61c9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_request_approvals_approver_status_position', 'request_approvals', ['approver_id', 'status', 'position']
+    )
+    # the leftmost column of the new index also backs the `approver_id` foreign key
+    op.drop_index('ix_request_approvals_approver_id', table_name='request_approvals')
+
+
+def downgrade() -> None:
+    op.create_index('ix_request_approvals_approver_id', 'request_approvals', ['approver_id'])
+    op.drop_index('ix_request_approvals_approver_status_position', table_name='request_approvals')
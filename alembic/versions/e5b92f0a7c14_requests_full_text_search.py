@@ -0,0 +1,89 @@
+"""requests full text search
+
+Adds `requests.search_document` (purpose, hotel, location and requester name), backfills it,
+and indexes it with FULLTEXT on MySQL, a GIN `tsvector` expression index on Postgres or an
+FTS5 table kept in sync by triggers on SQLite.
+
+Revision ID: e5b92f0a7c14
+Revises: c47a1e93d5b8
+Create Date: 2026-10-18 15:48:12.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b92f0a7c14'
+down_revision: Union[str, None] = 'c47a1e93d5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DOCUMENT = "concat_ws(' ', requests.purpose, requests.hotel, requests.city, requests.state, requests.country, users.first_name, users.last_name)"
+
+# SQLite before 3.44 has no concat_ws, `NULL || ' '` is NULL so missing parts are skipped the same way
+SQLITE_DOCUMENT = "rtrim(" + " || ".join(
+    f"coalesce({part} || ' ', '')"
+    for part in (
+        "requests.purpose", "requests.hotel", "requests.city", "requests.state", "requests.country",
+        "users.first_name", "users.last_name",
+    )
+) + ")"
+
+# same as `api.v1.requests.search`, which creates them for databases built with `create_all`
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts USING fts5(search_document, content='requests', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS requests_fts_insert AFTER INSERT ON requests BEGIN
+        INSERT INTO requests_fts(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS requests_fts_delete AFTER DELETE ON requests BEGIN
+        INSERT INTO requests_fts(requests_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS requests_fts_update AFTER UPDATE OF search_document ON requests BEGIN
+        INSERT INTO requests_fts(requests_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document);
+        INSERT INTO requests_fts(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+]
+
+
+def upgrade() -> None:
+    op.add_column('requests', sa.Column('search_document', sa.Text(), nullable=True))
+
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute(f"UPDATE requests SET search_document = {DOCUMENT} FROM users WHERE users.id = requests.requester_id")
+        op.create_index(
+            'ix_requests_search_document_tsv', 'requests',
+            [sa.text("to_tsvector('simple', coalesce(search_document, ''))")], postgresql_using='gin'
+        )
+    elif dialect == 'mysql':
+        op.execute(f"UPDATE requests JOIN users ON users.id = requests.requester_id SET requests.search_document = {DOCUMENT}")
+        op.create_index('ix_requests_search_document', 'requests', ['search_document'], mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        op.execute(
+            f"UPDATE requests SET search_document = (SELECT {SQLITE_DOCUMENT} FROM users WHERE users.id = requests.requester_id)"
+        )
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        # indexes the backfilled documents, the triggers only see later writes
+        op.execute("INSERT INTO requests_fts(requests_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.drop_index('ix_requests_search_document_tsv', table_name='requests')
+    elif dialect == 'mysql':
+        op.drop_index('ix_requests_search_document', table_name='requests')
+    elif dialect == 'sqlite':
+        for trigger in ('requests_fts_insert', 'requests_fts_delete', 'requests_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS requests_fts")
+
+    with op.batch_alter_table('requests') as batch_op:
+        batch_op.drop_column('search_document')
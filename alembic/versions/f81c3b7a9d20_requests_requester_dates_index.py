@@ -0,0 +1,31 @@
+"""requests requester dates index
+
+Indexes `requests` by `(requester_id, start, end)` so the overlapping-trip check at creation is one range scan
+per requester, replacing the single-column `requester_id` index it makes redundant.
+
+Revision ID: f81c3b7a9d20
+Revises: a3d8f61e2b47
+Create Date: 2026-10-18 17:12:40.861253
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f81c3b7a9d20'
+down_revision: Union[str, None] = 'a3d8f61e2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_requests_requester_start_end', 'requests', ['requester_id', 'start', 'end'])
+    # the leftmost column of the new index also backs the `requester_id` foreign key
+    op.drop_index('ix_requests_requester_id', table_name='requests')
+
+
+def downgrade() -> None:
+    op.create_index('ix_requests_requester_id', 'requests', ['requester_id'])
+    op.drop_index('ix_requests_requester_start_end', table_name='requests')
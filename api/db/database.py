@@ -1,39 +1,83 @@
+import itertools
+import time
 from contextlib import contextmanager
 from sqlalchemy import create_engine
+from sqlalchemy import exc as SQLALchemyExceptions
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
-from decouple import config
+from decouple import config, Csv
+from starlette.requests import Request
+from api.db.metrics import InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool, instrument_engine
+from api.db.profiler import instrument_engine_for_profiling
 
 
-def get_db_engine():
-
+def get_database_url(async_driver: bool = False, host: str = None, port: str = None):
+    """
+        Builds the database URL from the environment.
+        When `async_driver` is set, the URL uses the asyncio driver for the configured `DB_TYPE`
+        (aiomysql/asyncmy for MySQL, asyncpg for Postgres and aiosqlite for local SQLite).
+        `host` and `port` override `DB_HOST`/`DB_PORT`, e.g. to point at a read replica.
+    """
     DB_TYPE = config("DB_TYPE")
     DB_NAME = config("DB_NAME")
     DB_USER = config("DB_USER")
     DB_PASSWORD = config("DB_PASSWORD")
-    DB_HOST = config("DB_HOST")
-    DB_PORT = config("DB_PORT")
+    DB_HOST = host or config("DB_HOST")
+    DB_PORT = port or config("DB_PORT")
     MYSQL_DRIVER = config("MYSQL_DRIVER")
-    DATABASE_URL = ""
+    ASYNC_MYSQL_DRIVER = config("ASYNC_MYSQL_DRIVER", default="aiomysql")
 
     if DB_TYPE == "mysql":
-        DATABASE_URL = f'mysql+{MYSQL_DRIVER}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+        driver = ASYNC_MYSQL_DRIVER if async_driver else MYSQL_DRIVER
+        return f'mysql+{driver}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
     elif DB_TYPE == "postgresql":
-        DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    else:
-        DATABASE_URL = "sqlite:///./database.db"
+        driver = "+asyncpg" if async_driver else ""
+        return f"postgresql{driver}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+    return "sqlite+aiosqlite:///./database.db" if async_driver else "sqlite:///./database.db"
+
+
+def get_db_engine(host: str = None, port: str = None):
+
+    DB_TYPE = config("DB_TYPE")
+    DATABASE_URL = get_database_url(host=host, port=port)
 
     if DB_TYPE == "sqlite":
         db_engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
     else:
-        db_engine = create_engine(DATABASE_URL, pool_size=32, max_overflow=64)
+        db_engine = create_engine(DATABASE_URL, pool_size=32, max_overflow=64, poolclass=InstrumentedQueuePool)
     
     return db_engine
 
+
+def get_async_db_engine(host: str = None, port: str = None):
+    """
+        Same pool settings as `get_db_engine` but on an asyncio driver, 
+        so awaiting a query yields the event loop instead of blocking the worker.
+    """
+    DB_TYPE = config("DB_TYPE")
+    DATABASE_URL = get_database_url(async_driver=True, host=host, port=port)
+
+    if DB_TYPE == "sqlite":
+        async_engine = create_async_engine(DATABASE_URL)
+    else:
+        async_engine = create_async_engine(
+            DATABASE_URL, pool_size=32, max_overflow=64, pool_pre_ping=True, poolclass=InstrumentedAsyncAdaptedQueuePool)
+
+    return async_engine
+
 db_engine = get_db_engine()
+async_db_engine = get_async_db_engine()
+
+instrument_engine("primary", db_engine)
+instrument_engine("primary_async", async_db_engine.sync_engine)
+instrument_engine_for_profiling(db_engine)
+instrument_engine_for_profiling(async_db_engine.sync_engine)
 
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_db_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -56,3 +100,177 @@ def get_db_with_ctx_mgr():
 def get_db():
     with get_db_with_ctx_mgr() as db:
         yield db
+
+
+async def get_async_db():
+    """
+        Async counterpart of `get_db`. Relationships are not lazy-loaded on an `AsyncSession`,
+        so services using it must eager load everything the response schema reads.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except:
+            await db.rollback()
+            raise
+
+
+# Read replicas
+#
+# `DB_REPLICA_HOSTS` is an optional comma separated list of `host:port` entries that share the primary's
+# credentials and database name. When it is empty every read dependency falls back to the primary.
+
+DB_REPLICA_HOSTS = config("DB_REPLICA_HOSTS", default="", cast=Csv())
+DB_REPLICA_STRATEGY = config("DB_REPLICA_STRATEGY", default="round_robin")
+DB_REPLICA_RETRY_SECONDS = config("DB_REPLICA_RETRY_SECONDS", default=30, cast=int)
+DB_PRIMARY_PIN_SECONDS = config("DB_PRIMARY_PIN_SECONDS", default=5, cast=int)
+DB_PRIMARY_PIN_COOKIE = "db_primary_until"
+
+
+class Replica:
+    def __init__(self, host: str, port: str = None) -> None:
+        self.name = f"{host}:{port}" if port else host
+        self.engine = get_db_engine(host=host, port=port)
+        self.async_engine = get_async_db_engine(host=host, port=port)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_session_factory = async_sessionmaker(
+            bind=self.async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        self.down_until = 0.0
+
+        instrument_engine(f"replica:{self.name}", self.engine)
+        instrument_engine(f"replica_async:{self.name}", self.async_engine.sync_engine)
+        instrument_engine_for_profiling(self.engine)
+        instrument_engine_for_profiling(self.async_engine.sync_engine)
+
+    @property
+    def is_available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self):
+        self.down_until = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+
+    def connections_in_use(self) -> int:
+        return self.engine.pool.checkedout() + self.async_engine.pool.checkedout()
+
+
+class ReplicaSet:
+    """
+        Picks a replica for read-only sessions using round-robin or least-connections selection.
+        A replica that fails to hand out a connection is skipped for `DB_REPLICA_RETRY_SECONDS`.
+    """
+    def __init__(self, hosts: list[str], strategy: str = "round_robin") -> None:
+        self.replicas = [Replica(*host.strip().split(":", 1)) for host in hosts if host.strip()]
+        self.strategy = strategy
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+
+    def choose(self) -> Replica | None:
+        available = [replica for replica in self.replicas if replica.is_available]
+
+        if not available:
+            return None
+
+        if self.strategy == "least_connections":
+            return min(available, key=lambda replica: replica.connections_in_use())
+
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.is_available:
+                return replica
+
+
+replica_set = ReplicaSet(hosts=DB_REPLICA_HOSTS, strategy=DB_REPLICA_STRATEGY)
+
+
+def pin_to_primary(response):
+    """
+        Called after a successful write so the client's reads go to the primary until replication catches up.
+        A cookie is used (rather than worker memory) so the pin holds across gunicorn workers.
+    """
+    response.set_cookie(
+        DB_PRIMARY_PIN_COOKIE,
+        str(int(time.time()) + DB_PRIMARY_PIN_SECONDS),
+        max_age=DB_PRIMARY_PIN_SECONDS,
+        httponly=True,
+    )
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    pinned_until = request.cookies.get(DB_PRIMARY_PIN_COOKIE)
+
+    return pinned_until is not None and pinned_until.isdigit() and int(pinned_until) > time.time()
+
+
+def get_read_db(request: Request):
+    """
+        Like `get_db`, but read-only endpoints get a session on a replica when one is configured, available
+        and the client hasn't written recently.
+    """
+    replica = None if is_pinned_to_primary(request) else replica_set.choose()
+
+    if replica:
+        db = replica.session_factory()
+        try:
+            db.connection()
+        except SQLALchemyExceptions.DBAPIError:
+            db.close()
+            replica.mark_down()
+            replica = None
+
+    if not replica:
+        db = SessionLocal()
+
+    try:
+        yield db
+    except:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_read_session_factory(request: Request):
+    """
+        The `AsyncSession` factory `get_async_read_db` would use, for work that outlives the endpoint
+        such as a streamed response body: dependencies with `yield` are closed before the body is sent.
+        The replica is probed first, so a down replica falls back to the primary before anything is streamed.
+    """
+    replica = None if is_pinned_to_primary(request) else replica_set.choose()
+
+    if replica:
+        db = replica.async_session_factory()
+        try:
+            await db.connection()
+        except SQLALchemyExceptions.DBAPIError:
+            replica.mark_down()
+            replica = None
+        finally:
+            await db.close()
+
+    return replica.async_session_factory if replica else AsyncSessionLocal
+
+
+async def get_async_read_db(request: Request):
+    """
+        `get_read_db` for an `AsyncSession`.
+    """
+    replica = None if is_pinned_to_primary(request) else replica_set.choose()
+
+    if replica:
+        db = replica.async_session_factory()
+        try:
+            await db.connection()
+        except SQLALchemyExceptions.DBAPIError:
+            await db.close()
+            replica.mark_down()
+            replica = None
+
+    if not replica:
+        db = AsyncSessionLocal()
+
+    try:
+        yield db
+    except:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
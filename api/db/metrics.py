@@ -0,0 +1,175 @@
+import os
+import time
+import threading
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy import exc as SQLALchemyExceptions
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+
+# upper bounds in milliseconds, the last bucket catches everything above
+LATENCY_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float("inf")]
+
+# Mutable per-HTTP-request holder set by the metrics middleware. Pool listeners add the time each connection
+# was held to it; the dict is shared with threadpool-run dependencies because contextvars are copied by reference.
+current_request_stats: ContextVar[dict | None] = ContextVar("current_request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: list[float] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value_ms: float):
+        for index, upper_bound in enumerate(self.buckets):
+            if value_ms <= upper_bound:
+                self.counts[index] += 1
+                break
+
+        self.total += 1
+        self.sum += value_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.total,
+            "sum_ms": round(self.sum, 3),
+            "buckets": {
+                ("+Inf" if upper_bound == float("inf") else str(upper_bound)): count
+                for upper_bound, count in zip(self.buckets, self.counts)
+            },
+        }
+
+
+class PoolMetrics:
+    """
+        Checkout wait/hold time histograms per engine and connection hold time per route,
+        for sizing `pool_size`/`max_overflow` per worker.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.engines = {}
+        self.checkout_wait = {}
+        self.checkout_hold = {}
+        self.checkout_timeouts = {}
+        self.route_hold = {}
+
+    def register(self, name: str, engine):
+        with self._lock:
+            self.engines[name] = engine
+            self.checkout_wait[name] = Histogram()
+            self.checkout_hold[name] = Histogram()
+            self.checkout_timeouts[name] = 0
+
+    def observe_checkout_wait(self, name: str, wait_ms: float, timed_out: bool = False):
+        with self._lock:
+            self.checkout_wait[name].observe(wait_ms)
+            if timed_out:
+                self.checkout_timeouts[name] += 1
+
+    def observe_checkout_hold(self, name: str, hold_ms: float):
+        with self._lock:
+            self.checkout_hold[name].observe(hold_ms)
+
+    def observe_route_hold(self, route: str, hold_ms: float):
+        with self._lock:
+            if route not in self.route_hold:
+                self.route_hold[route] = Histogram()
+            self.route_hold[route].observe(hold_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            pools = {}
+            for name, engine in self.engines.items():
+                pool = engine.pool
+                gauges = {"status": pool.status()}
+
+                if isinstance(pool, QueuePool):
+                    gauges.update({
+                        "size": pool.size(),
+                        "in_use": pool.checkedout(),
+                        "idle": pool.checkedin(),
+                        "overflow": max(pool.overflow(), 0),
+                        "max_overflow": pool._max_overflow,
+                    })
+
+                pools[name] = {
+                    **gauges,
+                    "checkout_timeouts": self.checkout_timeouts[name],
+                    "checkout_wait": self.checkout_wait[name].to_dict(),
+                    "checkout_hold": self.checkout_hold[name].to_dict(),
+                }
+
+            return {
+                "pid": os.getpid(),
+                "pools": pools,
+                "routes": {route: histogram.to_dict() for route, histogram in self.route_hold.items()},
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckoutMixin:
+    """
+        SQLAlchemy has no "checkout requested" pool event, so the wait for a free connection
+        is measured around the pool's internal `_do_get`.
+    """
+    metrics_name: str = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+
+        try:
+            return super()._do_get()
+        except SQLALchemyExceptions.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.metrics_name:
+                pool_metrics.observe_checkout_wait(
+                    self.metrics_name, (time.perf_counter() - started) * 1000, timed_out=timed_out)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(name: str, engine):
+    """
+        Registers `engine` (sync, or the `sync_engine` of an async engine) with `pool_metrics`
+        and attaches the checkout/checkin listeners.
+    """
+    pool_metrics.register(name, engine)
+
+    if isinstance(engine.pool, _TimedCheckoutMixin):
+        engine.pool.metrics_name = name
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+
+        if checked_out_at is None:
+            return
+
+        hold_ms = (time.perf_counter() - checked_out_at) * 1000
+        pool_metrics.observe_checkout_hold(name, hold_ms)
+
+        request_stats = current_request_stats.get()
+        if request_stats is not None:
+            request_stats["connection_hold_ms"] = request_stats.get("connection_hold_ms", 0) + hold_ms
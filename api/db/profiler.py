@@ -0,0 +1,166 @@
+import logging
+import re
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from sqlalchemy import event
+from starlette.datastructures import Headers, MutableHeaders
+from decouple import config
+
+
+logger = logging.getLogger("api.sql")
+
+N_PLUS_ONE_THRESHOLD = config("SQL_PROFILER_N_PLUS_ONE_THRESHOLD", default=5, cast=int)
+MAX_STORED_PROFILES = 100
+
+_numbers = re.compile(r"\b\d+(\.\d+)?\b")
+_strings = re.compile(r"'(?:[^']|'')*'")
+_in_lists = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s|:\w+|\(POSTCOMPILE_\w+\)|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_whitespace = re.compile(r"\s+")
+
+# Set by `ProfilerState.start_request` only while profiling is on. When it is `None` the cursor listeners return
+# immediately, so the cost of leaving them attached is one context variable lookup per statement.
+current_profile: ContextVar["RequestProfile | None"] = ContextVar("current_profile", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """
+        Normalizes a statement so the same query issued with different parameters maps to the same shape
+    """
+    shape = _strings.sub("?", statement)
+    shape = _numbers.sub("?", shape)
+    shape = _in_lists.sub("IN (?)", shape)
+
+    return _whitespace.sub(" ", shape).strip()
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.statements: list[tuple[str, float]] = []
+
+    def record(self, statement: str, duration_ms: float):
+        self.statements.append((statement, duration_ms))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(duration_ms for _, duration_ms in self.statements)
+
+    def repeated_shapes(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict[str, int]:
+        """
+            Statement shapes issued at least `threshold` times, the usual signature of an N+1 pattern
+        """
+        shapes = Counter(statement_shape(statement) for statement, _ in self.statements)
+
+        return {shape: count for shape, count in shapes.most_common() if count >= threshold}
+
+    def summary(self) -> str:
+        return f"count={self.count}; time_ms={self.total_ms:.1f}; n_plus_one={len(self.repeated_shapes())}"
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "count": self.count,
+            "time_ms": round(self.total_ms, 3),
+            "n_plus_one": self.repeated_shapes(),
+            "statements": [
+                {"statement": statement, "time_ms": round(duration_ms, 3)} for statement, duration_ms in self.statements
+            ],
+        }
+
+
+class ProfilerState:
+    """
+        Runtime switch for the SQL profiler. State is per worker process.
+    """
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.profiles: OrderedDict[str, dict] = OrderedDict()
+
+    def start_request(self, method: str, path: str):
+        if not self.enabled:
+            return None, None
+
+        profile = RequestProfile(method=method, path=path)
+
+        return profile, current_profile.set(profile)
+
+    def finish_request(self, profile: RequestProfile, token, store: bool = False):
+        current_profile.reset(token)
+
+        repeated_shapes = profile.repeated_shapes()
+        logger.info("SQL %s %s %s", profile.method, profile.path, profile.summary())
+        for shape, count in repeated_shapes.items():
+            logger.warning("Possible N+1 on %s %s: %d x %s", profile.method, profile.path, count, shape)
+
+        if store:
+            self.profiles[profile.id] = profile.to_dict()
+            while len(self.profiles) > MAX_STORED_PROFILES:
+                self.profiles.popitem(last=False)
+
+
+profiler = ProfilerState(enabled=config("SQL_PROFILER_ENABLED", default=False, cast=bool))
+
+
+class SQLProfilerMiddleware:
+    """
+        Counts and times the SQL statements of each request while the profiler is on.
+        Requests sent with `X-SQL-Profile: debug` keep their full profile, retrievable from `/internal/profiles/{id}`.
+
+        A plain ASGI middleware, so while the profiler is off a request costs one attribute check here
+        and is passed straight to the app.
+    """
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.enabled:
+            return await self.app(scope, receive, send)
+
+        profile, token = profiler.start_request(method=scope["method"], path=scope["path"])
+        store = Headers(scope=scope).get("x-sql-profile") == "debug"
+
+        async def send_with_summary(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-SQL-Queries"] = profile.summary()
+                if store:
+                    headers["X-SQL-Profile-Id"] = profile.id
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_summary)
+        finally:
+            profiler.finish_request(profile=profile, token=token, store=store)
+
+
+def instrument_engine_for_profiling(engine):
+    """
+        Attaches the cursor listeners to `engine` (sync, or the `sync_engine` of an async engine)
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_profile.get() is None:
+            return
+
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+
+        if profile is None or not conn.info.get("query_started_at"):
+            return
+
+        started_at = conn.info["query_started_at"].pop()
+        profile.record(statement, (time.perf_counter() - started_at) * 1000)
@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy import Boolean, Column, event, inspect
+from sqlalchemy.orm import Session, with_loader_criteria
+
+
+class SoftDeleteMixin:
+    """
+        Marks a model as soft-deletable. Top-level ORM SELECTs on these models only return live rows, so services
+        don't need to repeat `is_deleted == False`.
+
+        Opt out (e.g. for admin paths) per statement with `.execution_options(include_deleted=True)`,
+        or for a whole session with `db.info["include_deleted"] = True`.
+    """
+    is_deleted = Column(Boolean, default=False)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_soft_deleted_rows(execute_state):
+    if (
+        not execute_state.is_select
+        or execute_state.is_relationship_load
+        or execute_state.execution_options.get("include_deleted", False)
+        or execute_state.session.info.get("include_deleted", False)
+    ):
+        return
+
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(
+            SoftDeleteMixin,
+            lambda cls: cls.is_deleted == False,
+            include_aliases=True,
+            # relationships keep their own join conditions, e.g. a request still shows its deleted requester
+            propagate_to_loaders=False,
+        )
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _touch_soft_deleted_rows(session, flush_context, instances):
+    # a soft delete is a change like any other for `last_updated` readers, e.g. ETags and delta sync tombstones
+    for instance in session.dirty:
+        if (
+            isinstance(instance, SoftDeleteMixin)
+            and hasattr(instance, "last_updated")
+            and inspect(instance).attrs.is_deleted.history.has_changes()
+        ):
+            instance.last_updated = datetime.utcnow()
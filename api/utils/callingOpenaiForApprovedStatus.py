@@ -2,7 +2,7 @@ import openai
 from fastapi import APIRouter, Depends, status, BackgroundTasks
 from sqlalchemy.orm import Session
 from api.v1.requests import schemas as req_schemas
-from api.db.database import get_db
+from api.db.database import get_db, AsyncSessionLocal
 from api.v1.comments.services import CommentService
 from api.v1.comments import schemas as comment_schemas
 from api.v1.closed.services import ClosedService
@@ -17,15 +17,16 @@ class OpenAiService:
         
     async def call_openai(self, payload: req_schemas.UpdateRequest, request_id: int, author_id: int):
         # Fetch comments asynchronously
-        comments, total = await CommentService.fetch_all(
-            db=self.db,
-            table_name=comment_schemas.EntityNameEnum.REQUEST,
-            organization_id=payload.organization_id,
-            record_id=request_id,
-            parent_id=None,
-            offset=0,
-            size=100
-        )
+        async with AsyncSessionLocal() as async_db:
+            comments, _, _ = await CommentService.fetch_all(
+                db=async_db,
+                table_name=comment_schemas.EntityNameEnum.REQUEST,
+                organization_id=payload.organization_id,
+                record_id=request_id,
+                parent_id=None,
+                offset=0,
+                size=100
+            )
 
         # Process each comment to extract the necessary information
         processed_comments = []
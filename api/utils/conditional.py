@@ -0,0 +1,94 @@
+"""
+    Conditional GET: `ETag`/`Last-Modified` validators and `304 Not Modified` answers.
+
+    Single resources get a strong ETag from a cheap version lookup (id, `last_updated` and a stamp of the embedded
+    children) done before the full query, lists get a weak ETag from the page they serialize to.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    digest = hashlib.sha1(json.dumps(jsonable_encoder(parts), sort_keys=True).encode()).hexdigest()
+
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    # timestamps are stored naive, in UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime = None) -> bool:
+    """
+        Whether the client's cached copy is current. `If-None-Match` is compared weakly, as RFC 9110 asks for
+        GET, and when it is present `If-Modified-Since` is ignored.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: datetime = None) -> dict:
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    return headers
+
+
+def check_not_modified(request: Request, version: tuple, vary: tuple = ()) -> tuple[Response | None, dict]:
+    """
+        Answers a conditional GET from a resource's `version`, the tuple its service's `fetch_version` returns.
+        `vary` holds the query parameters that change the representation, like `fields` and `embed`.
+
+        Returns (response, headers): a `304` to send as-is or `None`, and the validators to set on the full answer.
+    """
+    etag = make_etag(*version, *vary)
+    last_modified = max((part for part in version if isinstance(part, datetime)), default=None)
+    headers = validator_headers(etag, last_modified)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers), headers
+
+    return None, headers
+
+
+def conditional_list_response(request: Request, content, response_model: type[BaseModel] = None) -> Response:
+    """
+        Serializes a list page once and tags it with a weak ETag of the result, so an unchanged page is a `304`.
+
+        FastAPI doesn't filter a returned `Response` through the route's `response_model`, pass it to have `content`
+        validated and dumped by it first; sparse pages, which don't match it, are encoded as-is.
+    """
+    if response_model is not None:
+        content = response_model.model_validate(content).model_dump(mode="json")
+
+    encoded = jsonable_encoder(content)
+    etag = make_etag(encoded, weak=True)
+
+    if is_not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    return JSONResponse(content=encoded, headers={"ETag": etag})
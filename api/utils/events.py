@@ -0,0 +1,124 @@
+"""
+    In-process broadcast of activity events to Server-Sent Events connections, see `GET /events`.
+
+    The hub lives in each worker, so a connection only sees writes served by the same worker process.
+"""
+import asyncio
+import itertools
+import json
+from enum import Enum
+from decouple import config
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+
+EVENTS_MAX_CONNECTIONS = config('EVENTS_MAX_CONNECTIONS', default=1000, cast=int)
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=100, cast=int)
+EVENTS_HEARTBEAT_SECONDS = config('EVENTS_HEARTBEAT_SECONDS', default=15, cast=int)
+# how often a waiting stream checks whether its client is still there
+EVENTS_DISCONNECT_POLL_SECONDS = 1
+
+
+class EventTypeEnum(str, Enum):
+    REQUEST_CREATED = "request.created"
+    APPROVAL_CHANGED = "approval.changed"
+    COMMENT_ADDED = "comment.added"
+    # sent once before closing a connection that fell too far behind, the client should resync
+    OVERFLOW = "overflow"
+
+
+class TooManyConnectionsException(HTTPException):
+    def __init__(self, detail: str = "Too many event stream connections, retry later") -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(EVENTS_HEARTBEAT_SECONDS)},
+        )
+
+
+class Subscription:
+    """
+        One connection's bounded queue of `(id, type, data)` events. A consumer that lets it fill up gets an
+        `overflow` event and is closed instead of holding back the publishers.
+    """
+    def __init__(self, organization_id: int, queue_size: int) -> None:
+        self.organization_id = organization_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, event: tuple) -> None:
+        if self.overflowed:
+            return
+
+        if self.queue.full():
+            self.overflowed = True
+            # make room so the consumer reads the overflow notice next and stops
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((event[0], EventTypeEnum.OVERFLOW, {}))
+            return
+
+        self.queue.put_nowait(event)
+
+    async def get(self) -> tuple:
+        return await self.queue.get()
+
+
+class EventHub:
+    def __init__(self, max_connections: int, queue_size: int) -> None:
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.subscriptions: dict[int, set[Subscription]] = {}
+        self.ids = itertools.count(1)
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+    def check_capacity(self) -> None:
+        if self.connections >= self.max_connections:
+            raise TooManyConnectionsException()
+
+    def subscribe(self, organization_id: int) -> Subscription:
+        self.check_capacity()
+
+        subscription = Subscription(organization_id, self.queue_size)
+        self.subscriptions.setdefault(organization_id, set()).add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self.subscriptions.get(subscription.organization_id, set())
+        subscriptions.discard(subscription)
+
+        if not subscriptions:
+            self.subscriptions.pop(subscription.organization_id, None)
+
+    def publish(self, organization_id: int, type: EventTypeEnum, data: dict) -> None:
+        """
+            Queues an event for every connection of the organization. Never blocks; call it after the commit.
+            Safe from any thread, connections are fed on their own event loop.
+        """
+        subscriptions = self.subscriptions.get(organization_id)
+        if not subscriptions:
+            return
+
+        event = (next(self.ids), type, jsonable_encoder(data))
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        for subscription in list(subscriptions):
+            if subscription.loop is running_loop:
+                subscription.offer(event)
+            else:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+
+
+def format_event(id: int, type: EventTypeEnum, data: dict) -> str:
+    return f"id: {id}\nevent: {type.value}\ndata: {json.dumps(data)}\n\n"
+
+
+event_hub = EventHub(max_connections=EVENTS_MAX_CONNECTIONS, queue_size=EVENTS_QUEUE_SIZE)
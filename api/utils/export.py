@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+from typing import AsyncIterator
+from fastapi.encoders import jsonable_encoder
+
+EXPORT_CHUNK_ROWS = 500
+
+
+async def stream_csv(rows: AsyncIterator, columns: list[str]) -> AsyncIterator[str]:
+    """
+        Renders rows (mappings) as CSV, `EXPORT_CHUNK_ROWS` rows per chunk
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+
+    buffered = 0
+    async for row in rows:
+        writer.writerow(row)
+        buffered += 1
+
+        if buffered == EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            buffered = 0
+
+    yield buffer.getvalue()
+
+
+async def stream_ndjson(rows: AsyncIterator) -> AsyncIterator[str]:
+    """
+        Renders rows (mappings) as newline delimited JSON, `EXPORT_CHUNK_ROWS` rows per chunk
+    """
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(jsonable_encoder(row)))
+
+        if len(lines) == EXPORT_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+
+    if lines:
+        yield "\n".join(lines) + "\n"
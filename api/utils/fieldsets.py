@@ -0,0 +1,90 @@
+from functools import lru_cache
+from typing import Iterable
+from fastapi import status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy.orm import load_only
+
+
+class InvalidFieldsetException(HTTPException):
+    def __init__(self, detail: str = "Invalid fields or embed parameter") -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail,
+            headers=None,
+        )
+
+
+@lru_cache(maxsize=256)
+def sparse_model(schema: type[BaseModel], names: frozenset) -> type[BaseModel]:
+    """
+        A copy of `schema` keeping only the fields in `names`, built once per field set
+    """
+    return create_model(
+        f"Sparse{schema.__name__}",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (field.annotation, field) for name, field in schema.model_fields.items() if name in names},
+    )
+
+
+class Fieldset:
+    """
+        The scalar `fields` and nested `embeds` of `schema` a client asked for, see `parse_fieldset`
+    """
+    def __init__(self, schema: type[BaseModel], fields: frozenset, embeds: frozenset) -> None:
+        self.schema = schema
+        self.fields = fields
+        self.embeds = embeds
+
+    @property
+    def model(self) -> type[BaseModel]:
+        return sparse_model(self.schema, self.fields | self.embeds)
+
+    def load_only(self, model, required: Iterable[str] = ()):
+        """
+            `load_only` option limiting the SELECT to the requested columns of `model`, plus `required` ones
+            the query itself needs (sort keys, foreign keys of embedded relationships)
+        """
+        columns = model.__mapper__.column_attrs.keys()
+        names = sorted(name for name in self.fields | set(required) if name in columns)
+
+        return load_only(*[getattr(model, name) for name in names])
+
+    def serialize(self, items: list) -> list[dict]:
+        return [self.model.model_validate(item).model_dump(mode="json") for item in items]
+
+
+def parse_fieldset(schema: type[BaseModel], fields: str = None, embed: str = None, embeddable: Iterable[str] = ()) -> Fieldset | None:
+    """
+        Parses comma separated `fields` and `embed` query parameters against `schema`.
+
+        Returns `None` when neither is given, i.e. the full response. Otherwise `fields` defaults to every scalar field,
+        `embed` defaults to no nested relationships and `id` is always kept.
+    """
+    if fields is None and embed is None:
+        return None
+
+    embeddable = frozenset(embeddable)
+    scalar_fields = frozenset(name for name in schema.model_fields if name not in embeddable)
+
+    requested_fields = frozenset(name.strip() for name in fields.split(",") if name.strip()) if fields else scalar_fields
+    requested_embeds = frozenset(name.strip() for name in embed.split(",") if name.strip()) if embed else frozenset()
+
+    unknown_fields = requested_fields - scalar_fields
+    if unknown_fields:
+        raise InvalidFieldsetException(detail=f"Unknown fields: {', '.join(sorted(unknown_fields))}")
+
+    unknown_embeds = requested_embeds - embeddable
+    if unknown_embeds:
+        raise InvalidFieldsetException(detail=f"Unknown embeds: {', '.join(sorted(unknown_embeds))}")
+
+    return Fieldset(schema=schema, fields=requested_fields | {"id"}, embeds=requested_embeds)
+
+
+def sparse_response(content, headers: dict = None) -> JSONResponse:
+    """
+        Sparse items don't match the route's full `response_model`, so they are returned as-is
+    """
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
@@ -1,4 +1,119 @@
+import base64
+import json
+import threading
+import time
+from datetime import date, datetime
+from enum import Enum
+from typing import Awaitable, Callable, Hashable
+from urllib.parse import urlencode
+from decouple import config
+from fastapi import status
+from fastapi.exceptions import HTTPException
 from sqlalchemy.orm import Session
+from starlette.datastructures import QueryParams
+from sqlalchemy.sql import and_, or_
+
+
+class InvalidCursorException(HTTPException):
+    def __init__(self, detail: str = "Invalid pagination cursor") -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail,
+            headers=None,
+        )
+
+
+class TotalEnum(str, Enum):
+    """
+        How a list endpoint reports `total`: `none` skips counting and only checks whether another page exists,
+        `cached` reuses a recent count for the same filters and `exact` counts on every call
+    """
+    NONE = "none"
+    CACHED = "cached"
+    EXACT = "exact"
+
+
+class TotalCountCache:
+    """
+        Per-process totals keyed by endpoint and filter set, reused for `ttl_seconds`.
+        Totals served from here may lag behind writes by up to the TTL.
+    """
+    def __init__(self, ttl_seconds: int, max_entries: int = 1024) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._totals: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> int | None:
+        with self._lock:
+            entry = self._totals.get(key)
+
+            if entry is None:
+                return None
+
+            total, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._totals[key]
+                return None
+
+            return total
+
+    def set(self, key: Hashable, total: int) -> None:
+        with self._lock:
+            if len(self._totals) >= self.max_entries:
+                now = time.monotonic()
+                self._totals = {k: v for k, v in self._totals.items() if v[1] > now}
+
+                if len(self._totals) >= self.max_entries:
+                    self._totals.pop(next(iter(self._totals)))
+
+            self._totals[key] = (total, time.monotonic() + self.ttl_seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+total_count_cache = TotalCountCache(ttl_seconds=config('PAGINATION_TOTAL_CACHE_SECONDS', cast=int, default=60))
+
+
+def resolve_total(with_total: TotalEnum, cache_key: Hashable, count: Callable[[], int]) -> int | None:
+    """
+        Runs `count` only when `with_total` asks for a total, going through `total_count_cache` for `cached`
+    """
+    if with_total == TotalEnum.NONE:
+        return None
+
+    if with_total == TotalEnum.CACHED:
+        total = total_count_cache.get(cache_key)
+        if total is None:
+            total = count()
+            total_count_cache.set(cache_key, total)
+        return total
+
+    return count()
+
+
+async def resolve_total_async(with_total: TotalEnum, cache_key: Hashable, count: Callable[[], Awaitable[int]]) -> int | None:
+    if with_total == TotalEnum.NONE:
+        return None
+
+    if with_total == TotalEnum.CACHED:
+        total = total_count_cache.get(cache_key)
+        if total is None:
+            total = await count()
+            total_count_cache.set(cache_key, total)
+        return total
+
+    return await count()
+
+
+def split_page(rows: list, size: int) -> tuple:
+    """
+        Splits rows fetched with `limit(size + 1)` into (page, has_more)
+    """
+    return rows[:size], len(rows) > size
+
 
 def total_row_count(model, organization_id, db: Session):
     return db.query(model).filter(model.organization_id == organization_id).filter(
@@ -13,9 +128,15 @@ def size_validator(size:int):
     return size
 
 
-def page_urls(page: int, size: int, count: int, endpoint: str):
+def page_urls(page: int, size: int, count: int | None, endpoint: str, has_more: bool = None):
+    """
+        Builds next/previous page links. When the total is unknown (`count` is `None`) `has_more` decides the next link.
+    """
+    if has_more is None:
+        has_more = (size + off_set(page, size)) < count
+
     paging = {}
-    if (size + off_set(page, size)) >= count:
+    if not has_more:
         paging['next'] = None
         if page > 1:
             paging['previous'] = f"{endpoint}?page={page-1}&size={size}"
@@ -32,15 +153,101 @@ def page_urls(page: int, size: int, count: int, endpoint: str):
 
 
 def build_paginated_response(
-    page: int, size: int, total: int, pointers: dict, items
+    page: int, size: int, total: int | None, pointers: dict, items, next_cursor: str = None, has_more: bool = None
 ) -> dict:
     response = {
         "page": page,
         "size": size,
         "total": total,
+        "has_more": has_more,
         "previous_page": pointers["previous"],
         "next_page": pointers["next"],
+        "next_cursor": next_cursor,
         "items": items,
     }
 
-    return response
\ No newline at end of file
+    return response
+
+
+def encode_cursor(values: list) -> str:
+    """
+        Opaque cursor holding the sort key values of the last row of a page
+    """
+    serialized = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+
+    return base64.urlsafe_b64encode(json.dumps(serialized).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_columns) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidCursorException()
+
+    if not isinstance(values, list) or len(values) != len(sort_columns):
+        raise InvalidCursorException()
+
+    try:
+        return [
+            datetime.fromisoformat(value) if value is not None and column.type.python_type in (date, datetime) else value
+            for column, value in zip(sort_columns, values)
+        ]
+    except (TypeError, ValueError):
+        raise InvalidCursorException()
+
+
+def keyset_filter(sort_columns, values: list, descending: bool = True):
+    """
+        Rows strictly after `values` in `sort_columns` order, expanded as
+        `a < x OR (a = x AND b < y)` so each branch can use the index on the sort key
+    """
+    branches = []
+
+    for index, (column, value) in enumerate(zip(sort_columns, values)):
+        equal_prefix = [previous == previous_value for previous, previous_value in zip(sort_columns[:index], values[:index])]
+        after = column < value if descending else column > value
+        branches.append(and_(*equal_prefix, after))
+
+    return or_(*branches)
+
+
+def order_by_keyset(query, sort_columns, cursor: str = None, descending: bool = True):
+    """
+        Orders a `Query`/`Select` by `sort_columns` and, when a cursor is given, starts after it
+    """
+    if cursor:
+        query = query.filter(keyset_filter(sort_columns, decode_cursor(cursor, sort_columns), descending=descending))
+
+    return query.order_by(*[column.desc() if descending else column.asc() for column in sort_columns])
+
+
+def next_cursor(items: list, size: int, sort_columns, has_more: bool = None) -> str | None:
+    """
+        Cursor for the page after `items`, `None` once `has_more` (or a short page) shows there is nothing left
+    """
+    if has_more is None:
+        has_more = len(items) >= size
+
+    if not has_more or not items:
+        return None
+
+    return encode_cursor([getattr(items[-1], column.key) for column in sort_columns])
+
+
+def cursor_urls(size: int, endpoint: str, next_cursor: str = None, query_params: QueryParams = None):
+    """
+        Builds the next link of a cursor-paginated list. `query_params` (the request's) are carried over so the link
+        keeps its filters, e.g. a required `organization_id`; only `cursor`, `size` and `page` are replaced.
+    """
+    if not next_cursor:
+        return {"next": None, "previous": None}
+
+    params = [
+        (name, value) for name, value in (query_params.multi_items() if query_params else [])
+        if name not in ("cursor", "size", "page")
+    ]
+
+    return {
+        "next": f"{endpoint}?{urlencode([*params, ('cursor', next_cursor), ('size', size)])}",
+        "previous": None,
+    }
\ No newline at end of file
@@ -1,3 +1,4 @@
+from sqlalchemy import insert
 from sqlalchemy.sql import func
 
 def sql_count(query) -> int:
@@ -7,4 +8,23 @@ def sql_count(query) -> int:
     """
     count = query.with_entities(func.count()).scalar()
     
-    return count
\ No newline at end of file
+    return count
+
+def insert_ignore(model, db):
+    """
+        A multi-row INSERT that skips rows conflicting with a unique key,
+        as `INSERT IGNORE` on MySQL and `ON CONFLICT DO NOTHING` on Postgres/SQLite.
+        :param: model - SQLAlchemy model to insert into
+        :param: db - session (or connection) the statement will run on, used to pick the dialect
+    """
+    dialect_name = db.get_bind().dialect.name
+
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        return postgresql_insert(model).on_conflict_do_nothing()
+
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(model).on_conflict_do_nothing()
+
+    return insert(model).prefix_with("IGNORE")
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from typing import Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.core.base.constants import EntityNameEnum, table_name_to_model_map
 from api.core.base.exceptions import ReferencedRecordNotFound
 
@@ -19,12 +21,14 @@ def build_paginated_response(
     return response
 
 class PaginatedResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
+    has_more: Optional[bool] = None
     size: int
     page: int
     items: list
     next_page: Optional[str] = None
     previous_page: Optional[str] = None
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -45,3 +49,21 @@ def does_referenced_record_exist(table_name: EntityNameEnum, record_id: int, db:
                 """
                 )
         return True
+
+
+
+async def does_referenced_record_exist_async(table_name: EntityNameEnum, record_id: int, db: AsyncSession):
+        """
+            `does_referenced_record_exist` for an `AsyncSession`.
+            Raises `ReferencedRecordNotFound` if record is not found.
+        """
+        referenced_table = table_name_to_model_map[table_name.value]
+        existing_referenced_record = await db.scalar(select(referenced_table.id).filter(referenced_table.id == record_id))
+
+        if not existing_referenced_record:
+            raise ReferencedRecordNotFound(
+                f"""Referenced record does not exist. 
+                    Confirm that a record with ID {record_id} exists in the `{table_name.value}` table.
+                """
+                )
+        return True
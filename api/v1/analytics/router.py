@@ -1,6 +1,6 @@
 from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from api.db.database import get_db
+from api.db.database import get_read_db
 from api.core.dependencies.user import is_authenticated
 from api.v1.user.schemas import ShowUser
 from api.v1.analytics.services import AnalyticsService
@@ -16,7 +16,7 @@ async def get_analytics(
         start_date: date = None,
         end_date: date = None,
         user: ShowUser = Depends(is_authenticated),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
         Returns organization analytics
@@ -48,7 +48,7 @@ async def get_top_travellers(
         start_date: date = None,
         end_date: date = None,
         user: ShowUser = Depends(is_authenticated),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
         Returns details of the top travellers in an organization.
@@ -68,7 +68,7 @@ async def get_top_hotels(
         start_date: date = None,
         end_date: date = None,
         user: ShowUser = Depends(is_authenticated),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
         Returns details of the top Hotels in an organization.
@@ -88,7 +88,7 @@ async def get_top_destinations(
         start_date: date = None,
         end_date: date = None,
         user: ShowUser = Depends(is_authenticated),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
         Returns details of the top destinations in an organization.
@@ -109,7 +109,7 @@ async def get_coworkers(
         start_date: date = None,
         end_date: date = None,
         user: ShowUser = Depends(is_authenticated),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
         Returns details of the coworkers in an organization.
@@ -127,7 +127,7 @@ async def generate_reports(
         body: analytics_schemas.CreateReport,
         background_task: BackgroundTasks,
         user: ShowUser = Depends(is_authenticated),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_read_db)
 ):
     """
         Generate reports based on specific parameters in an organization.
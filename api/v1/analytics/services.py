@@ -27,10 +27,7 @@ class AnalyticsService:
         """
         dept_count_query = (
             self.db.query(func.count(Group.id))
-            .filter(
-                Group.organization_id == self.organization_id,
-                Group.is_deleted == False
-            )
+            .filter(Group.organization_id == self.organization_id)
         )
 
         if self.start_dt:
@@ -46,10 +43,7 @@ class AnalyticsService:
     def get_users_count_in_organization(self):
         users_count_query = (
             self.db.query(func.count(OrganizationUser.id))
-            .filter(
-                OrganizationUser.organization_id == self.organization_id,
-                OrganizationUser.is_deleted == False,
-            )
+            .filter(OrganizationUser.organization_id == self.organization_id)
         )
 
         if self.start_dt:
@@ -65,10 +59,7 @@ class AnalyticsService:
     def get_total_hotels_booked(self):
         total_hotels_booked_query = (
             self.db.query(func.count(Request.hotel.distinct()))
-            .filter(
-                Request.organization_id == self.organization_id, 
-                Request.is_deleted == False,
-            )
+            .filter(Request.organization_id == self.organization_id)
         )
 
         if self.start_dt:
@@ -83,10 +74,7 @@ class AnalyticsService:
     def get_total_spend(self):
         total_spend_query = (
             self.db.query(func.sum(func.datediff(Request.end, Request.start) * Request.rate))
-            .filter(
-                Request.organization_id == self.organization_id,
-                Request.is_deleted == False,
-            )
+            .filter(Request.organization_id == self.organization_id)
         )
 
         if self.start_dt:
@@ -165,7 +153,6 @@ class AnalyticsService:
             .filter(
                 Request.organization_id == self.organization_id, 
                 Request.status == RequestStatusEnum.APPROVED.value,
-                Group.is_deleted == False
             )
         )
         
@@ -286,7 +273,7 @@ class AnalyticsService:
                 .join(Request, User.id == Request.requester_id)
                 .join(GroupMember, GroupMember.member_id == User.id)
                 .join(Group, Group.id == GroupMember.group_id)
-                .filter(Request.organization_id == self.organization_id, Group.is_deleted == False)
+                .filter(Request.organization_id == self.organization_id)
             )
         
         if self.start_dt:
@@ -325,11 +312,9 @@ class AnalyticsService:
             .join(Request, User.id == Request.requester_id)
             .join(GroupMember, GroupMember.member_id == User.id)
             .join(Group, Group.id == GroupMember.group_id)
-            .filter(User.is_deleted == False, Group.is_deleted == False)
             .filter(
                 Request.organization_id == self.organization_id, 
                 Request.status == RequestStatusEnum.APPROVED.value,
-                Request.is_deleted == False
             )
         )
 
@@ -371,7 +356,7 @@ class AnalyticsService:
         top_destinations= None
 
         request_query = (
-            self.db.query(Request).filter(Request.organization_id == self.organization_id, Request.is_deleted == False)
+            self.db.query(Request).filter(Request.organization_id == self.organization_id)
             .filter(Request.date_created >= self.start_dt)
             .filter(Request.date_created <= self.end_dt)
         )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, BIGINT
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, BIGINT, Index
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,6 +9,10 @@ from api.v1.files.models import File
 
 class Closed(Base):
     __tablename__ = "closed"
+    __table_args__ = (
+        # delta sync reads an organization's changes in (last_updated, id) order
+        Index('ix_closed_org_updated', 'organization_id', 'last_updated', 'id'),
+    )
 
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     content = Column(LONGTEXT, nullable=False)
@@ -18,8 +22,8 @@ class Closed(Base):
         'organizations.id', ondelete="CASCADE"), index=True, nullable=False)
    
     is_edited = Column(Boolean, default=False)
-    date_created = Column(DateTime, default=datetime.now)
-    last_updated = Column(DateTime, default=datetime.now)
+    date_created = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow)
 
   
 
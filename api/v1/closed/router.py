@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.orm import Session
 
 from . import schemas as closed_schemas
@@ -8,6 +8,7 @@ from api.core.dependencies.user import is_authenticated
 from api.v1.user.schemas import ShowUser
 from fastapi import BackgroundTasks
 from api.utils import paginator
+from api.utils.conditional import check_not_modified
 
 app = APIRouter(tags=["Closeds"])
 
@@ -38,48 +39,69 @@ async def create_closed(
 
 
 @app.get("/closeds/{closed_id}", status_code=status.HTTP_200_OK, response_model=closed_schemas.ShowClosed)
-async def get_closed(closed_id: int, db: Session = Depends(get_db)):
+async def get_closed(closed_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+        Retrieves a closed, or `304` when `If-None-Match`/`If-Modified-Since` show the client's copy is current
+    """
+    version = await ClosedService.fetch_version(db=db, id=closed_id)
+    not_modified, validators = check_not_modified(request, version)
+    if not_modified:
+        return not_modified
 
     closed = await ClosedService.fetch(db=db, id=closed_id)
 
+    response.headers.update(validators)
     return closed_schemas.ShowClosed.model_validate(closed)
 
 
 @app.get("/closeds", status_code=status.HTTP_200_OK, response_model=closed_schemas.PaginatedClosedsResponse)
 async def get_closeds(
-   
+    request: Request,
     organization_id: int,
     
     user: ShowUser = Depends(is_authenticated),
     db: Session = Depends(get_db),
     size: int = 20,
     page: int = 1,
+    cursor: str = None,
+    with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
 ):
 
     page_size = 20 if size < 1 or size > 20 else size
-    page_number = 1 if page <= 0 else page
+    page_number = 1 if page <= 0 or cursor else page
     offset = paginator.off_set(page=page_number, size=page_size)
 
-    closeds, total = await ClosedService.fetch_all(db=db,
+    closeds, total, has_more = await ClosedService.fetch_all(db=db,
                                                    
                                                      organization_id=organization_id,
                                                     
                                                    
                                                      offset=offset,
-                                                     size=page_size)
-
-    pointers = paginator.page_urls(
-        page=page_number,
-        size=page_size,
-        count=total,
-        endpoint='/closeds',
-    )
+                                                     size=page_size,
+                                                     cursor=cursor,
+                                                     with_total=with_total)
+
+    next_cursor = paginator.next_cursor(closeds, page_size, ClosedService.sort_columns, has_more=has_more)
+
+    if cursor:
+        pointers = paginator.cursor_urls(
+            size=page_size, endpoint='/closeds', next_cursor=next_cursor, query_params=request.query_params)
+    else:
+        pointers = paginator.page_urls(
+            page=page_number,
+            size=page_size,
+            count=total,
+            endpoint='/closeds',
+            has_more=has_more,
+        )
 
     response = paginator.build_paginated_response(
         page=page_number,
         size=page_size,
         total=total,
         pointers=pointers,
+        next_cursor=next_cursor,
+        has_more=has_more,
         items=list(map(
             (lambda closeds: closed_schemas.ShowClosed.model_validate(closeds)), closeds))
     )
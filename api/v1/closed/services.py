@@ -1,3 +1,4 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Any
@@ -6,8 +7,11 @@ from .exceptions import ClosedNotFoundException, NotAuthorizedException, Referen
 from .models import Closed
 from .schemas import ClosedCreate, ClosedUpdate
 from api.utils.utils import does_referenced_record_exist
+from api.utils import paginator
 
 class ClosedService(Service):
+    sort_columns = (Closed.date_created, Closed.id)
+
     def __init__(self) -> None:
         pass
 
@@ -39,6 +43,18 @@ class ClosedService(Service):
 
         return closed
 
+    @classmethod
+    async def fetch_version(cls, db: Session, id: int) -> tuple:
+        """
+            A closed's id and `last_updated`, for conditional GETs
+        """
+        version = db.execute(select(Closed.id, Closed.last_updated).filter(Closed.id == id)).first()
+
+        if not version:
+            raise ClosedNotFoundException()
+
+        return tuple(version)
+
     @classmethod
     async def fetch_all(cls, 
                         db: Session, 
@@ -47,7 +63,8 @@ class ClosedService(Service):
                         
                         size: int, 
                         offset: int, 
-                       
+                        cursor: str = None,
+                        with_total: paginator.TotalEnum = paginator.TotalEnum.NONE
                     ):
         
         query = db.query(Closed).filter(
@@ -57,10 +74,11 @@ class ClosedService(Service):
 
       
 
-        count = query.count()
-        closeds = query.order_by(Closed.date_created.desc()).offset(offset=offset).limit(limit=size).all()
+        count = paginator.resolve_total(with_total, ("closeds", organization_id), query.count)
+        closeds, has_more = paginator.split_page(
+            paginator.order_by_keyset(query, cls.sort_columns, cursor=cursor).offset(offset=offset).limit(limit=size + 1).all(), size)
 
-        return (closeds, count)
+        return (closeds, count, has_more)
 
     @classmethod
     async def update(cls, db: Session, closed_id: int, payload: ClosedUpdate, author_id: int):
@@ -75,7 +93,7 @@ class ClosedService(Service):
         if payload.content is not None:
             db_closed.content = payload.content
 
-        db_closed.last_updated = datetime.now()
+        db_closed.last_updated = datetime.utcnow()
         db_closed.is_edited = True
 
         db.commit()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, BIGINT
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, BIGINT, Index
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -9,6 +9,10 @@ from api.v1.files.models import File
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # delta sync reads an organization's changes in (last_updated, id) order
+        Index('ix_comments_org_updated', 'organization_id', 'last_updated', 'id'),
+    )
 
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     content = Column(LONGTEXT, nullable=False)
@@ -20,8 +24,8 @@ class Comment(Base):
     record_id = Column(BIGINT, nullable=False, index=True)
     parent_id = Column(BIGINT, ForeignKey("comments.id"), nullable=True)
     is_edited = Column(Boolean, default=False)
-    date_created = Column(DateTime, default=datetime.now)
-    last_updated = Column(DateTime, default=datetime.now)
+    date_created = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow)
 
     replies = relationship("Comment", backref="parent", remote_side=[id])
     creator = relationship("User", backref="author", viewonly=True)
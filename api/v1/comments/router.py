@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import schemas as comment_schemas
-from .services import CommentService
-from api.db.database import get_db
+from .services import CommentService, COMMENT_EMBEDS
+from api.db.database import get_db, get_async_db
 from api.core.dependencies.user import is_authenticated
 from api.v1.user.schemas import ShowUser
 from fastapi import BackgroundTasks
 from api.utils import paginator
+from api.utils.fieldsets import parse_fieldset
+from api.utils.conditional import check_not_modified, conditional_list_response
 
 app = APIRouter(tags=["Comments"])
 
@@ -38,54 +41,88 @@ async def create_comment(
 
 
 @app.get("/comments/{comment_id}", status_code=status.HTTP_200_OK, response_model=comment_schemas.ShowComment)
-async def get_comment(comment_id: int, db: Session = Depends(get_db)):
+async def get_comment(comment_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+        Retrieves a comment, or `304` when `If-None-Match`/`If-Modified-Since` show the client's copy is current
+    """
+    version = await CommentService.fetch_version(db=db, id=comment_id)
+    not_modified, validators = check_not_modified(request, version)
+    if not_modified:
+        return not_modified
 
     comment = await CommentService.fetch(db=db, id=comment_id)
 
+    response.headers.update(validators)
     return comment_schemas.ShowComment.model_validate(comment)
 
 
 @app.get("/comments", status_code=status.HTTP_200_OK, response_model=comment_schemas.PaginatedCommentsResponse)
 async def get_comments(
+    request: Request,
     table_name: comment_schemas.EntityNameEnum,
     record_id: int,
     organization_id: int,
     parent_id: int = None,
     user: ShowUser = Depends(is_authenticated),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     size: int = 20,
     page: int = 1,
+    cursor: str = None,
+    with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
+    fields: str = None,
+    embed: str = None,
 ):
+    """
+        Lists the comments on a record. `fields` and `embed` (`creator`, `files`) narrow each item
+        to the named fields and nested objects; when either is given, nothing else is embedded.
+
+        Pages carry a weak `ETag`, send it back in `If-None-Match` to get a `304` while the page is unchanged.
+    """
+    fieldset = parse_fieldset(comment_schemas.ShowComment, fields=fields, embed=embed, embeddable=COMMENT_EMBEDS)
 
     page_size = 20 if size < 1 or size > 20 else size
-    page_number = 1 if page <= 0 else page
+    page_number = 1 if page <= 0 or cursor else page
     offset = paginator.off_set(page=page_number, size=page_size)
 
-    comments, total = await CommentService.fetch_all(db=db,
+    comments, total, has_more = await CommentService.fetch_all(db=db,
                                                      table_name=table_name,
                                                      organization_id=organization_id,
                                                      record_id=record_id,
                                                      parent_id=parent_id,
                                                      offset=offset,
-                                                     size=page_size)
-
-    pointers = paginator.page_urls(
-        page=page_number,
-        size=page_size,
-        count=total,
-        endpoint='/comments',
-    )
+                                                     size=page_size,
+                                                     cursor=cursor,
+                                                     with_total=with_total,
+                                                     fieldset=fieldset)
+
+    next_cursor = paginator.next_cursor(comments, page_size, CommentService.sort_columns, has_more=has_more)
+
+    if cursor:
+        pointers = paginator.cursor_urls(
+            size=page_size, endpoint='/comments', next_cursor=next_cursor, query_params=request.query_params)
+    else:
+        pointers = paginator.page_urls(
+            page=page_number,
+            size=page_size,
+            count=total,
+            endpoint='/comments',
+            has_more=has_more,
+        )
 
     response = paginator.build_paginated_response(
         page=page_number,
         size=page_size,
         total=total,
         pointers=pointers,
+        next_cursor=next_cursor,
+        has_more=has_more,
         items=list(map(
             (lambda comments: comment_schemas.ShowComment.model_validate(comments)), comments))
+            if fieldset is None else fieldset.serialize(comments)
     )
 
-    return response
+    return conditional_list_response(
+        request, response, response_model=comment_schemas.PaginatedCommentsResponse if fieldset is None else None)
 
 
 @app.put("/comments/{comment_id}", response_model=comment_schemas.ShowComment)
@@ -1,13 +1,46 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime
 from typing import Any
 from api.core.base.services import Service
 from .exceptions import CommentNotFoundException, NotAuthorizedException, ReferencedRecordNotFound, ParentCommentNotFoundException
 from .models import Comment
+from api.v1.files.models import File
 from .schemas import CommentCreate, CommentUpdate, EntityNameEnum
-from api.utils.utils import does_referenced_record_exist
+from api.utils.utils import does_referenced_record_exist, does_referenced_record_exist_async
+from api.utils import paginator
+from api.utils.fieldsets import Fieldset
+from api.utils.events import event_hub, EventTypeEnum
+from api.v1.user.models import User
+from api.v1.organization.models import OrganizationUser
+from api.v1.requests.services import embedded_users_version
+
+
+COMMENT_EMBEDS = ("creator", "files")
+
+
+def show_comment_load_options(fieldset: Fieldset = None):
+    """
+        Eager-load options covering the relationships `ShowComment` reads, needed because an `AsyncSession` can't lazy-load.
+        With a `fieldset` only its columns and embedded relationships are loaded.
+    """
+    embeds = {
+        "creator": selectinload(Comment.creator).selectinload(User.user_orgs).selectinload(OrganizationUser.role),
+        "files": selectinload(Comment.files),
+    }
+
+    if fieldset is None:
+        return list(embeds.values())
+
+    return [
+        fieldset.load_only(Comment, required=("date_created", "author")),
+        *[embeds[name] for name in fieldset.embeds],
+    ]
 
 class CommentService(Service):
+    sort_columns = (Comment.date_created, Comment.id)
+
     def __init__(self) -> None:
         pass
 
@@ -34,6 +67,15 @@ class CommentService(Service):
         db.commit()
         db.refresh(db_comment)
 
+        event_hub.publish(db_comment.organization_id, EventTypeEnum.COMMENT_ADDED, {
+            "id": db_comment.id,
+            "organization_id": db_comment.organization_id,
+            "table_name": db_comment.table_name,
+            "record_id": db_comment.record_id,
+            "parent_id": db_comment.parent_id,
+            "author": db_comment.author,
+        })
+
         return db_comment
 
     @classmethod
@@ -45,20 +87,47 @@ class CommentService(Service):
 
         return comment
 
+    @classmethod
+    async def fetch_version(cls, db: Session, id: int) -> tuple:
+        """
+            What a comment's representation depends on, for conditional GETs: its id and `last_updated`, its author with
+            their memberships and roles, and the count and latest update of its files. One primary key lookup with subqueries.
+        """
+        comment_files = (File.entity_id == Comment.id, File.entity_name == "comment")
+
+        version = db.execute(
+            select(
+                Comment.id,
+                Comment.last_updated,
+                *embedded_users_version(select(User.id).filter(User.id == Comment.author)),
+                select(func.count(File.id)).filter(*comment_files).scalar_subquery(),
+                select(func.max(File.updated_at)).filter(*comment_files).scalar_subquery(),
+            )
+            .filter(Comment.id == id)
+        ).first()
+
+        if not version:
+            raise CommentNotFoundException()
+
+        return tuple(version)
+
     @classmethod
     async def fetch_all(cls, 
-                        db: Session, 
+                        db: AsyncSession, 
                         table_name: EntityNameEnum, 
                         organization_id: int, 
                         record_id: int, 
                         size: int, 
                         offset: int, 
-                        parent_id: int = None
+                        parent_id: int = None,
+                        cursor: str = None,
+                        with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
+                        fieldset: Fieldset = None
                     ):
         
-        does_referenced_record_exist(table_name=table_name, record_id=record_id, db=db)
+        await does_referenced_record_exist_async(table_name=table_name, record_id=record_id, db=db)
 
-        query = db.query(Comment).filter(
+        query = select(Comment).filter(
             Comment.table_name == table_name.value, 
             Comment.record_id == record_id, 
             Comment.organization_id == organization_id
@@ -67,10 +136,19 @@ class CommentService(Service):
         if parent_id:
             query = query.filter(Comment.parent_id == parent_id)
 
-        count = query.count()
-        comments = query.order_by(Comment.date_created.desc()).offset(offset=offset).limit(limit=size).all()
+        count = await paginator.resolve_total_async(
+            with_total,
+            ("comments", organization_id, table_name.value, record_id, parent_id),
+            lambda: db.scalar(select(func.count()).select_from(query.subquery()))
+        )
+        comments, has_more = paginator.split_page((await db.scalars(
+            paginator.order_by_keyset(query, cls.sort_columns, cursor=cursor)
+            .options(*show_comment_load_options(fieldset))
+            .offset(offset)
+            .limit(size + 1)
+        )).all(), size)
 
-        return (comments, count)
+        return (comments, count, has_more)
 
     @classmethod
     async def update(cls, db: Session, comment_id: int, payload: CommentUpdate, author_id: int):
@@ -85,7 +163,7 @@ class CommentService(Service):
         if payload.content is not None:
             db_comment.content = payload.content
 
-        db_comment.last_updated = datetime.now()
+        db_comment.last_updated = datetime.utcnow()
         db_comment.is_edited = True
 
         db.commit()
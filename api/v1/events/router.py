@@ -0,0 +1,66 @@
+import asyncio
+import time
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import StreamingResponse
+from api.core.dependencies.user import is_org_member
+from api.v1.user import schemas as user_schema
+from api.utils.events import (
+    event_hub, format_event, EventTypeEnum, TooManyConnectionsException,
+    EVENTS_HEARTBEAT_SECONDS, EVENTS_DISCONNECT_POLL_SECONDS
+)
+
+app = APIRouter(tags=["Events"])
+
+
+@app.get("/events", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def stream_events(
+    organization_id: int,
+    request: Request,
+    user: user_schema.ShowUser = Depends(is_org_member),
+):
+    """
+        Server-Sent Events stream of an organization's activity: `request.created`, `approval.changed` and `comment.added`.
+
+        A connection that falls behind gets an `overflow` event and is closed; reconnect and catch up with `GET /sync`.
+        Answers `503` when the worker already holds its maximum number of streams.
+    """
+    # a full worker is refused while the status can still say so, the subscription itself lives only as long as the
+    # body: a client leaving before the body is iterated never holds one
+    event_hub.check_capacity()
+
+    async def body():
+        try:
+            subscription = event_hub.subscribe(organization_id)
+        except TooManyConnectionsException:
+            # the worker filled up since the check above
+            yield f"retry: {EVENTS_HEARTBEAT_SECONDS * 1000}\n\n"
+            return
+
+        try:
+            # flushes the headers so the client knows it is subscribed
+            yield ": connected\n\n"
+
+            last_write = time.monotonic()
+
+            while not await request.is_disconnected():
+                try:
+                    id, type, data = await asyncio.wait_for(subscription.get(), timeout=EVENTS_DISCONNECT_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    if time.monotonic() - last_write >= EVENTS_HEARTBEAT_SECONDS:
+                        last_write = time.monotonic()
+                        yield ": keep-alive\n\n"
+                    continue
+
+                last_write = time.monotonic()
+                yield format_event(id, type, data)
+
+                if type == EventTypeEnum.OVERFLOW:
+                    break
+        finally:
+            event_hub.unsubscribe(subscription)
+
+    return StreamingResponse(body(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # stops nginx from buffering the stream
+        "X-Accel-Buffering": "no",
+    })
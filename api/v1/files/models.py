@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, String, DateTime, BIGINT, Text, Enum, Integer
+from sqlalchemy import Boolean, Column, ForeignKey, String, DateTime, BIGINT, Text, Enum, Integer, Index
 from sqlalchemy.dialects.mysql import LONGTEXT
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -8,6 +8,10 @@ import enum
 
 class File(Base):
     __tablename__ = "files"
+    __table_args__ = (
+        # an entity's files, e.g. a comment's, are looked up by (entity_name, entity_id)
+        Index('ix_files_entity', 'entity_name', 'entity_id'),
+    )
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     organization_id = Column(BIGINT, ForeignKey('organizations.id'), index=True)
     file_name = Column(String(255), nullable=False)
@@ -0,0 +1,150 @@
+"""
+    Approver chains: who approves a requester's trips, and in which order.
+
+    A requester's chain is the approvers of every group they belong to, each group capped at its `approval_levels`
+    (an unset level leaves the group uncapped), ordered by position. It is resolved once per (organization, requester)
+    and kept in a per-process cache, so creating a request does no approver lookup while the chain is warm.
+
+    Every worker process has its own cache, so invalidation goes through the database: group services bump the
+    organization's `approver_chain_version` in the transaction that changes members, approvers or approval levels,
+    and a cached chain is only used while its version matches the one read (by primary key) when resolving.
+    `APPROVER_CHAIN_CACHE_SECONDS` only bounds how long an unused entry is kept.
+"""
+import threading
+import time
+from decouple import config
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+from api.v1.groups.models import Group, GroupMember, GroupApprover
+from api.v1.organization.models import Organization
+
+APPROVER_CHAIN_CACHE_SECONDS = config('APPROVER_CHAIN_CACHE_SECONDS', cast=int, default=60)
+
+
+class ApproverChainCache:
+    """
+        Chains as `((approver_id, position), ...)` keyed by (organization_id, requester_id), each stored with the
+        organization's chain version it was resolved at. A lookup at any other version is a miss.
+    """
+    def __init__(self, ttl_seconds: int, max_entries: int = 10_000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._chains: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, organization_id: int, requester_id: int, version: int) -> tuple | None:
+        with self._lock:
+            entry = self._chains.get((organization_id, requester_id))
+
+            if entry is None:
+                return None
+
+            chain, chain_version, expires_at = entry
+            if chain_version != version or expires_at <= time.monotonic():
+                del self._chains[(organization_id, requester_id)]
+                return None
+
+            return chain
+
+    def set(self, organization_id: int, requester_id: int, chain: tuple, version: int) -> None:
+        with self._lock:
+            if len(self._chains) >= self.max_entries:
+                now = time.monotonic()
+                self._chains = {key: entry for key, entry in self._chains.items() if entry[2] > now}
+
+                if len(self._chains) >= self.max_entries:
+                    self._chains.pop(next(iter(self._chains)))
+
+            self._chains[(organization_id, requester_id)] = (chain, version, time.monotonic() + self.ttl_seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chains.clear()
+
+
+approver_chain_cache = ApproverChainCache(ttl_seconds=APPROVER_CHAIN_CACHE_SECONDS)
+
+
+def invalidate_approver_chains(organization_id: int, db: Session) -> None:
+    """
+        Bumps the organization's chain version without committing, so it lands with the group change it belongs to
+        and every worker's cached chains of the organization stop matching once that change is visible
+    """
+    db.execute(
+        update(Organization)
+        .where(Organization.id == organization_id)
+        .values(approver_chain_version=Organization.approver_chain_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def approver_chain_versions(organization_ids: set[int], db: Session) -> dict[int, int]:
+    """
+        Current chain version of each organization, one primary key lookup
+    """
+    rows = db.execute(
+        select(Organization.id, Organization.approver_chain_version)
+        .filter(Organization.id.in_(organization_ids))
+        .execution_options(include_deleted=True)
+    ).all()
+
+    return {organization_id: version or 0 for organization_id, version in rows}
+
+
+def approver_chains_query(organization_ids: set[int], requester_ids: set[int]):
+    """
+        (organization_id, requester_id, approver_id, position) rows of the requesters' groups, by position,
+        leaving out positions above a group's `approval_levels` when it is set
+    """
+    return (
+        select(Group.organization_id, GroupMember.member_id, GroupApprover.approver_id, GroupApprover.position)
+        .join(GroupMember, GroupMember.group_id == GroupApprover.group_id)
+        .join(Group, Group.id == GroupApprover.group_id)
+        .filter(
+            GroupMember.member_id.in_(requester_ids),
+            Group.organization_id.in_(organization_ids),
+            or_(Group.approval_levels.is_(None), GroupApprover.position <= Group.approval_levels)
+        )
+        .order_by(GroupApprover.position, GroupApprover.group_id, GroupApprover.approver_id)
+    )
+
+
+def resolve_approver_chains(keys: set[tuple[int, int]], db: Session) -> dict[tuple[int, int], tuple]:
+    """
+        Chains for (organization_id, requester_id) pairs, from the cache when its version is current and with one
+        query for the rest. An approver of several of the requester's groups appears once per group, as the approval
+        rows are inserted ignoring duplicate (request, approver) pairs.
+    """
+    # read before the chains, so a change committed in between stores a newer chain under the older version,
+    # which the next lookup then misses
+    versions = approver_chain_versions({organization_id for organization_id, _ in keys}, db=db)
+    chains = {}
+    missing = set()
+
+    for organization_id, requester_id in keys:
+        chain = approver_chain_cache.get(organization_id, requester_id, versions.get(organization_id, 0))
+        if chain is None:
+            missing.add((organization_id, requester_id))
+        else:
+            chains[(organization_id, requester_id)] = chain
+
+    if not missing:
+        return chains
+
+    resolved: dict[tuple[int, int], list] = {key: [] for key in missing}
+
+    rows = db.execute(approver_chains_query(
+        {organization_id for organization_id, _ in missing}, {requester_id for _, requester_id in missing}
+    )).all()
+
+    for organization_id, requester_id, approver_id, position in rows:
+        approvers = resolved.get((organization_id, requester_id))
+        if approvers is not None:
+            approvers.append((approver_id, position))
+
+    for (organization_id, requester_id), approvers in resolved.items():
+        chain = tuple(approvers)
+        approver_chain_cache.set(organization_id, requester_id, chain, versions.get(organization_id, 0))
+        chains[(organization_id, requester_id)] = chain
+
+    return chains
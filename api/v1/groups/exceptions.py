@@ -6,6 +6,10 @@ class GroupMessages:
     GROUP_MEMBER_ALREADY_EXISTS = "Group member already exists"
     MEMBER_NOT_FOUND = "Member not found."
     APPROVER_NOT_FOUND = "Approver not found."
+    INVALID_IMPORT_FILE = "Upload a CSV file with one user id per row"
+    TOO_MANY_IMPORT_IDS = "Import at most {} user ids at once"
+    INVALID_PARENT_GROUP = "Parent group not found in this organization"
+    PARENT_GROUP_CYCLE = "A group can't be moved under itself or one of its sub-groups"
 
 messages = GroupMessages()
 
@@ -48,3 +52,19 @@ class ApproverNotFoundException(HTTPException):
             detail=detail if detail else messages.APPROVER_NOT_FOUND,
             headers=None,
         )
+
+class InvalidImportFileException(HTTPException):
+    def __init__(self, detail: str = None):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail if detail else messages.INVALID_IMPORT_FILE,
+            headers=None,
+        )
+
+class InvalidParentGroupException(HTTPException):
+    def __init__(self, detail: str = None):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail if detail else messages.INVALID_PARENT_GROUP,
+            headers=None,
+        )
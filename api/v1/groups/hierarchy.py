@@ -0,0 +1,129 @@
+"""
+    The group tree as a closure table.
+
+    `Group.parent_group_id` only links a group to its parent, so walking a department tree took a query per level.
+    `GroupClosure` stores every (ancestor, descendant) pair with the distance between them, making a subtree or
+    an ancestor chain one indexed join whatever the depth. `GroupService` keeps it in step on create, update and delete.
+"""
+from datetime import datetime
+from sqlalchemy import delete, insert, literal, or_, select, update
+from sqlalchemy.orm import Session, aliased
+from api.v1.groups.models import Group, GroupClosure
+
+HIERARCHY_COLUMNS = (Group.id, Group.name, Group.parent_group_id)
+
+
+def add_group_to_tree(group: Group, db: Session) -> None:
+    """
+        Paths of a new group: itself, then every ancestor of its parent one level further
+    """
+    db.execute(insert(GroupClosure).values(ancestor_id=group.id, descendant_id=group.id, depth=0))
+
+    if group.parent_group_id:
+        db.execute(insert(GroupClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(GroupClosure.ancestor_id, literal(group.id), GroupClosure.depth + 1)
+            .filter(GroupClosure.descendant_id == group.parent_group_id)
+        ))
+
+
+def is_in_subtree(group_id: int, other_group_id: int, db: Session) -> bool:
+    return db.scalar(
+        select(GroupClosure.depth)
+        .filter(GroupClosure.ancestor_id == group_id, GroupClosure.descendant_id == other_group_id)
+    ) is not None
+
+
+def move_group_in_tree(group: Group, parent_group_id: int | None, db: Session) -> None:
+    """
+        Re-parents a group with its whole subtree: the paths reaching the subtree from outside are dropped,
+        then every ancestor of the new parent is linked to every group of the subtree
+    """
+    subtree_ids = db.scalars(select(GroupClosure.descendant_id).filter(GroupClosure.ancestor_id == group.id)).all()
+
+    db.execute(
+        delete(GroupClosure)
+        .where(GroupClosure.descendant_id.in_(subtree_ids), GroupClosure.ancestor_id.not_in(subtree_ids))
+    )
+
+    if parent_group_id:
+        above, below = aliased(GroupClosure), aliased(GroupClosure)
+        db.execute(insert(GroupClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            .filter(above.descendant_id == parent_group_id, below.ancestor_id == group.id)
+        ))
+
+
+def remove_group_from_tree(group: Group, db: Session) -> None:
+    """
+        Takes a deleted group out of the tree, its children move up to its parent
+    """
+    ancestor_ids = db.scalars(
+        select(GroupClosure.ancestor_id).filter(GroupClosure.descendant_id == group.id, GroupClosure.depth > 0)
+    ).all()
+    descendant_ids = db.scalars(
+        select(GroupClosure.descendant_id).filter(GroupClosure.ancestor_id == group.id, GroupClosure.depth > 0)
+    ).all()
+
+    if ancestor_ids and descendant_ids:
+        db.execute(
+            update(GroupClosure)
+            .where(GroupClosure.ancestor_id.in_(ancestor_ids), GroupClosure.descendant_id.in_(descendant_ids))
+            .values(depth=GroupClosure.depth - 1)
+        )
+
+    db.execute(delete(GroupClosure).where(or_(GroupClosure.ancestor_id == group.id, GroupClosure.descendant_id == group.id)))
+    db.execute(
+        update(Group)
+        .where(Group.parent_group_id == group.id)
+        .values(parent_group_id=group.parent_group_id, last_updated=datetime.utcnow())
+    )
+
+
+def subtree_query(group_id: int, organization_id: int):
+    """
+        A group and all its descendants as (id, name, parent_group_id, depth) rows, shallowest first
+    """
+    return (
+        select(*HIERARCHY_COLUMNS, GroupClosure.depth)
+        .join(GroupClosure, GroupClosure.descendant_id == Group.id)
+        .filter(GroupClosure.ancestor_id == group_id, Group.organization_id == organization_id)
+        .order_by(GroupClosure.depth, Group.id)
+    )
+
+
+def ancestors_query(group_id: int, organization_id: int):
+    """
+        A group's ancestors as (id, name, parent_group_id, depth) rows, from the root down to its parent
+    """
+    return (
+        select(*HIERARCHY_COLUMNS, GroupClosure.depth)
+        .join(GroupClosure, GroupClosure.ancestor_id == Group.id)
+        .filter(
+            GroupClosure.descendant_id == group_id,
+            GroupClosure.depth > 0,
+            Group.organization_id == organization_id
+        )
+        .order_by(GroupClosure.depth.desc())
+    )
+
+
+def build_tree(nodes: list[dict]) -> list[dict]:
+    """
+        Nests hierarchy rows under their parents, nodes whose parent isn't among them are roots
+    """
+    nodes_by_id = {node["id"]: {**node, "children": []} for node in nodes}
+    roots = []
+
+    for node in nodes_by_id.values():
+        parent = nodes_by_id.get(node["parent_group_id"])
+        (parent["children"] if parent and parent is not node else roots).append(node)
+
+    level, depth = roots, 0
+    while level:
+        for node in level:
+            node["depth"] = depth
+        level, depth = [child for node in level for child in node["children"]], depth + 1
+
+    return roots
@@ -1,14 +1,18 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, BIGINT, Text, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, BIGINT, Text, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy import func
 from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime
 
 from api.db.database import Base, get_db_with_ctx_mgr
+from api.db.soft_delete import SoftDeleteMixin
 from api.v1.requests.models import Request, RequestStatusEnum
 
-class Group(Base):
+class Group(SoftDeleteMixin, Base):
     __tablename__ = "groups"
+    __table_args__ = (
+        Index('ix_groups_live_org', 'organization_id', postgresql_where=text('NOT is_deleted')).ddl_if(dialect='postgresql'),
+    )
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     organization_id = Column(BIGINT, index=True, nullable=False)
     name = Column(String(255), index=True, nullable=False)
@@ -18,20 +22,25 @@ class Group(Base):
     created_by = Column(BIGINT, ForeignKey('users.id'), index=True)
     date_created = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow)
-    is_deleted = Column(Boolean, default=False)
 
     creator = relationship("User", viewonly=True)
     approvers = relationship("GroupApprover", viewonly=True)
 
+    # set for a whole page at once by `api.v1.groups.services.load_open_requests_counts`
+    _open_requests_count = None
+
     @hybrid_property
     def open_requests_count(self):
+        if self._open_requests_count is not None:
+            return self._open_requests_count
+
+        # fallback for groups nobody preloaded: a session and a count of its own
         with get_db_with_ctx_mgr() as db:
             number_of_open_requests = (
                 db.query(func.count(Request.id))
                 .join(GroupMember, GroupMember.member_id == Request.requester_id)
                 .filter(
                     Request.status == RequestStatusEnum.PENDING.value, 
-                    Request.is_deleted == False, 
                     GroupMember.group_id == self.id,
                     Request.organization_id == self.organization_id
                 )
@@ -41,6 +50,21 @@ class Group(Base):
             return number_of_open_requests
 
 
+class GroupClosure(Base):
+    """
+        One row per (ancestor, descendant) pair of the group tree, every group being its own ancestor at depth 0.
+        Kept in step with `Group.parent_group_id` by `api.v1.groups.hierarchy`.
+    """
+    __tablename__ = "group_closures"
+    __table_args__ = (
+        # a group's ancestors, nearest first
+        Index('ix_group_closures_descendant_depth', 'descendant_id', 'depth'),
+    )
+    ancestor_id = Column(BIGINT, ForeignKey('groups.id'), primary_key=True)
+    descendant_id = Column(BIGINT, ForeignKey('groups.id'), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+
 class GroupMember(Base):
     __tablename__ = "group_members"
     __table_args__ = (
@@ -1,12 +1,14 @@
-from fastapi import Depends, APIRouter, Depends, status
+from fastapi import Depends, APIRouter, Depends, Request, Response, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.v1.user import schemas as user_schema
-from api.db.database import get_db
+from api.db.database import get_db, get_async_db, get_async_read_db
 from api.core.dependencies.user import is_authenticated, is_org_member
 from api.v1.groups import schemas as group_schemas
-from api.v1.groups.services import GroupService, GroupMemberService, GroupApproverService
+from api.v1.groups.services import GroupService, GroupMemberService, GroupApproverService, read_import_csv
 
 from api.utils import paginator
+from api.utils.conditional import check_not_modified, conditional_list_response
 
 
 app = APIRouter(tags=["Groups"])
@@ -30,51 +32,113 @@ async def create_group(
 
 @app.get("/groups", status_code=status.HTTP_200_OK, response_model=group_schemas.PaginatedGroupsResponse)
 async def get_groups(
+    request: Request,
     organization_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     user: user_schema.ShowUser = Depends(is_org_member),
     size: int = 20,
     page: int = 1,
+    cursor: str = None,
+    with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
 ):
 
     page_size = 20 if size < 1 or size > 20 else size
-    page_number = 1 if page <= 0 else page
+    page_number = 1 if page <= 0 or cursor else page
     offset = paginator.off_set(page=page_number, size=page_size)
 
-    groups, total = await GroupService.fetch_all(org_id=organization_id, db=db, size=page_size, offset=offset)
+    groups, total, has_more = await GroupService.fetch_all(
+        org_id=organization_id, db=db, size=page_size, offset=offset, cursor=cursor, with_total=with_total)
 
-    pointers = paginator.page_urls(
-        page=page_number,
-        size=page_size,
-        count=total,
-        endpoint='/groups',
-    )
+    next_cursor = paginator.next_cursor(groups, page_size, GroupService.sort_columns, has_more=has_more)
+
+    if cursor:
+        pointers = paginator.cursor_urls(
+            size=page_size, endpoint='/groups', next_cursor=next_cursor, query_params=request.query_params)
+    else:
+        pointers = paginator.page_urls(
+            page=page_number,
+            size=page_size,
+            count=total,
+            endpoint='/groups',
+            has_more=has_more,
+        )
 
     response = paginator.build_paginated_response(
         page=page_number,
         size=page_size,
         total=total,
         pointers=pointers,
+        next_cursor=next_cursor,
+        has_more=has_more,
         items=list(map((lambda group: group_schemas.ShowGroup.model_validate(group)), groups)))
 
-    return response
+    return conditional_list_response(request, response, response_model=group_schemas.PaginatedGroupsResponse)
+
+
+@app.get("/groups/tree", status_code=status.HTTP_200_OK, response_model=list[group_schemas.GroupTreeNode])
+async def get_group_tree(
+    organization_id: int,
+    root_id: int = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: user_schema.ShowUser = Depends(is_org_member)
+):
+    """
+        Returns an organization's groups nested under their parents, or only the tree under `root_id`.
+
+        Each node has the open requests of its own members and of its whole subtree.
+    """
+    return await GroupService.fetch_tree(organization_id=organization_id, root_id=root_id, db=db)
 
 
 @app.get("/groups/{id}", status_code=status.HTTP_200_OK, response_model=group_schemas.ShowGroup)
 async def get_group(
     id: int,
     organization_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     user: user_schema.ShowUser = Depends(is_org_member)
 ):
     """
-        Retrieves a group in an organization
+        Retrieves a group in an organization, or `304` when `If-None-Match`/`If-Modified-Since` show the client's copy is current
     """
-    group = GroupService.get_organization_group(id=id, organization_id=organization_id, db=db)
+    version = await GroupService.fetch_version(id=id, organization_id=organization_id, db=db)
+    not_modified, validators = check_not_modified(request, version)
+    if not_modified:
+        return not_modified
+
+    group = await GroupService.get(id=id, organization_id=organization_id, db=db)
 
+    response.headers.update(validators)
     return group
 
 
+@app.get("/groups/{id}/subtree", status_code=status.HTTP_200_OK, response_model=list[group_schemas.GroupHierarchyNode])
+async def get_group_subtree(
+    id: int,
+    organization_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: user_schema.ShowUser = Depends(is_org_member)
+):
+    """
+        Lists a group and all its sub-groups, shallowest first, with `depth` counted from the group
+    """
+    return await GroupService.fetch_subtree(id=id, organization_id=organization_id, db=db)
+
+
+@app.get("/groups/{id}/ancestors", status_code=status.HTTP_200_OK, response_model=list[group_schemas.GroupHierarchyNode])
+async def get_group_ancestors(
+    id: int,
+    organization_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: user_schema.ShowUser = Depends(is_org_member)
+):
+    """
+        Lists a group's ancestors from the root down to its parent, `depth` being the distance to the group
+    """
+    return await GroupService.fetch_ancestors(id=id, organization_id=organization_id, db=db)
+
+
 @app.put("/groups/{id}", status_code=status.HTTP_200_OK, response_model=group_schemas.ShowGroup)
 async def update_group(
     id: int,
@@ -138,37 +202,92 @@ async def remove_group_members(
 
     return f"User(s) with IDs {payload.member_ids} removed successfully"
 
+
+@app.post("/groups/{id}/members/import", status_code=status.HTTP_200_OK, response_model=group_schemas.GroupImportResult)
+async def import_group_members(
+    id: int,
+    payload: group_schemas.ImportMembers,
+    db: Session = Depends(get_db),
+    user: user_schema.ShowUser = Depends(is_authenticated)
+):
+    """
+        Adds up to 10,000 users to a group in one transaction.
+
+        Ids already in the group are reported as `skipped`, ids of users outside the organization as `invalid`.
+    """
+    await is_org_member(organization_id=payload.organization_id, user=user, db=db)
+
+    group_member_service = GroupMemberService(group_id=id, organization_id=payload.organization_id, db=db)
+
+    return await group_member_service.import_group_members(member_ids=payload.member_ids)
+
+
+@app.post("/groups/{id}/members/import/csv", status_code=status.HTTP_200_OK, response_model=group_schemas.GroupImportResult)
+async def import_group_members_csv(
+    id: int,
+    organization_id: int = Form(...),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    user: user_schema.ShowUser = Depends(is_authenticated)
+):
+    """
+        `POST /groups/{id}/members/import` from an uploaded CSV holding one user id per row, with an optional header
+    """
+    await is_org_member(organization_id=organization_id, user=user, db=db)
+
+    member_ids = read_import_csv(await file.read())
+    group_member_service = GroupMemberService(group_id=id, organization_id=organization_id, db=db)
+
+    return await group_member_service.import_group_members(member_ids=member_ids)
+
+
 @app.get("/groups/{id}/members", status_code=status.HTTP_200_OK, response_model=group_schemas.PaginatedGroupMembersResponse)
 async def get_group_members(
+    request: Request,
     id: int,
     organization_id: int,
     db: Session = Depends(get_db),
     user: user_schema.ShowUser = Depends(is_authenticated),
     size: int = 20,
     page: int = 1,
+    cursor: str = None,
+    with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
 ):
+    """
+        Lists a group's members. Rows carry `group_id` only, fetch the group itself from `GET /groups/{id}`
+    """
     await is_org_member(organization_id=organization_id, user=user, db=db)
 
     page_size = 20 if size < 1 or size > 20 else size
-    page_number = 1 if page <= 0 else page
+    page_number = 1 if page <= 0 or cursor else page
     offset = paginator.off_set(page=page_number, size=page_size)
     group_member_service = GroupMemberService(group_id=id, organization_id=organization_id, db=db)
 
-    members, total = await group_member_service.get_group_members(size=page_size, offset=offset)
+    members, total, has_more = await group_member_service.get_group_members(
+        size=page_size, offset=offset, cursor=cursor, with_total=with_total)
 
-    pointers = paginator.page_urls(
-        page=page_number,
-        size=page_size,
-        count=total,
-        endpoint='/groups/{id}/members',
-    )
+    next_cursor = paginator.next_cursor(members, page_size, GroupMemberService.sort_columns, has_more=has_more)
+
+    if cursor:
+        pointers = paginator.cursor_urls(
+            size=page_size, endpoint=f'/groups/{id}/members', next_cursor=next_cursor, query_params=request.query_params)
+    else:
+        pointers = paginator.page_urls(
+            page=page_number,
+            size=page_size,
+            count=total,
+            endpoint=f'/groups/{id}/members',
+            has_more=has_more,
+        )
 
     response = paginator.build_paginated_response(
         page=page_number,
         size=page_size,
         total=total,
         pointers=pointers,
-        items=list(map((lambda member: group_schemas.ShowGroupMember.model_validate(member)), members)))
+        next_cursor=next_cursor,
+        has_more=has_more,
+        items=list(map((lambda member: group_schemas.GroupMemberListItem.model_validate(member)), members)))
 
     return response
 
@@ -207,36 +326,90 @@ async def remove_group_approvers(
     return f"User(s) with IDs {payload.approver_ids} removed successfully"
 
 
+@app.post("/groups/{id}/approvers/import", status_code=status.HTTP_200_OK, response_model=group_schemas.GroupImportResult)
+async def import_group_approvers(
+    id: int,
+    payload: group_schemas.ImportApprovers,
+    db: Session = Depends(get_db),
+    user: user_schema.ShowUser = Depends(is_authenticated)
+):
+    """
+        Adds up to 10,000 approvers to a group in one transaction.
+
+        Ids already approving for the group are reported as `skipped`, ids of users outside the organization as `invalid`.
+    """
+    await is_org_member(organization_id=payload.organization_id, user=user, db=db)
+
+    group_approver_service = GroupApproverService(group_id=id, organization_id=payload.organization_id, db=db)
+
+    return await group_approver_service.import_group_approvers(approver_ids=payload.approver_ids)
+
+
+@app.post("/groups/{id}/approvers/import/csv", status_code=status.HTTP_200_OK, response_model=group_schemas.GroupImportResult)
+async def import_group_approvers_csv(
+    id: int,
+    organization_id: int = Form(...),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    user: user_schema.ShowUser = Depends(is_authenticated)
+):
+    """
+        `POST /groups/{id}/approvers/import` from an uploaded CSV holding one user id per row, with an optional header
+    """
+    await is_org_member(organization_id=organization_id, user=user, db=db)
+
+    approver_ids = read_import_csv(await file.read())
+    group_approver_service = GroupApproverService(group_id=id, organization_id=organization_id, db=db)
+
+    return await group_approver_service.import_group_approvers(approver_ids=approver_ids)
+
+
 @app.get("/groups/{id}/approvers", status_code=status.HTTP_200_OK, response_model=group_schemas.PaginatedGroupApproversResponse)
 async def get_group_approvers(
+    request: Request,
     id: int,
     organization_id: int,
     db: Session = Depends(get_db),
     user: user_schema.ShowUser = Depends(is_authenticated),
     size: int = 20,
     page: int = 1,
+    cursor: str = None,
+    with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
 ):
+    """
+        Lists a group's approvers. Rows carry `group_id` only, fetch the group itself from `GET /groups/{id}`
+    """
     await is_org_member(organization_id=organization_id, user=user, db=db)
 
     page_size = 20 if size < 1 or size > 20 else size
-    page_number = 1 if page <= 0 else page
+    page_number = 1 if page <= 0 or cursor else page
     offset = paginator.off_set(page=page_number, size=page_size)
     group_approver_service = GroupApproverService(group_id=id, organization_id=organization_id, db=db)
 
-    approvers, total = await group_approver_service.get_group_approvers(size=page_size, offset=offset)
+    approvers, total, has_more = await group_approver_service.get_group_approvers(
+        size=page_size, offset=offset, cursor=cursor, with_total=with_total)
 
-    pointers = paginator.page_urls(
-        page=page_number,
-        size=page_size,
-        count=total,
-        endpoint='/groups/{id}/approvers',
-    )
+    next_cursor = paginator.next_cursor(approvers, page_size, GroupApproverService.sort_columns, has_more=has_more)
+
+    if cursor:
+        pointers = paginator.cursor_urls(
+            size=page_size, endpoint=f'/groups/{id}/approvers', next_cursor=next_cursor, query_params=request.query_params)
+    else:
+        pointers = paginator.page_urls(
+            page=page_number,
+            size=page_size,
+            count=total,
+            endpoint=f'/groups/{id}/approvers',
+            has_more=has_more,
+        )
 
     response = paginator.build_paginated_response(
         page=page_number,
         size=page_size,
         total=total,
         pointers=pointers,
+        next_cursor=next_cursor,
+        has_more=has_more,
         items=list(map((lambda approver: group_schemas.ShowGroupApprover.model_validate(approver)), approvers)))
 
     return response
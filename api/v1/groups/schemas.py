@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 from api.v1.user.schemas import ShowUser
@@ -67,6 +67,22 @@ class ShowGroupMember(BaseModel):
         from_attributes = True
 
 
+class GroupMemberListItem(BaseModel):
+    """
+        A row of a group's member listing, the group itself is left out as it's the same on every row
+    """
+    id: int
+    group_id: int
+    member_id: int
+    date_created: datetime
+    last_updated: datetime
+
+    member: ShowUser
+
+    class Config:
+        from_attributes = True
+
+
 class ListMembers(BaseModel):
     id: int
     member: ShowUser
@@ -93,12 +109,52 @@ class RemoveApprovers(AddApprovers):
     pass
 
 
+GROUP_IMPORT_MAX_IDS = 10_000
+
+
+class ImportMembers(BaseModel):
+    organization_id: int
+    member_ids: list[int] = Field(..., min_length=1, max_length=GROUP_IMPORT_MAX_IDS)
+
+
+class ImportApprovers(BaseModel):
+    organization_id: int
+    approver_ids: list[int] = Field(..., min_length=1, max_length=GROUP_IMPORT_MAX_IDS)
+
+
+class GroupImportResult(BaseModel):
+    """
+        User ids of a bulk import: `added` to the group, `skipped` because they already were in it and
+        `invalid` because they aren't members of the group's organization.
+    """
+    added: list[int]
+    skipped: list[int]
+    invalid: list[int]
+
+
+class GroupHierarchyNode(BaseModel):
+    """
+        A group's place in the tree. `depth` counts levels from the group the query started at,
+        `subtree_open_requests_count` covers the group and all its sub-groups.
+    """
+    id: int
+    name: str
+    parent_group_id: Optional[int] = None
+    depth: int
+    open_requests_count: int
+    subtree_open_requests_count: int
+
+
+class GroupTreeNode(GroupHierarchyNode):
+    children: list["GroupTreeNode"] = []
+
+
 class PaginatedGroupApproversResponse(PaginatedResponse):
     items: list[ShowGroupApprover]
 
 
 class PaginatedGroupMembersResponse(PaginatedResponse):
-    items: list[ShowGroupMember]
+    items: list[GroupMemberListItem]
 
 
 class PaginatedGroupsResponse(PaginatedResponse):
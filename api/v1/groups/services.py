@@ -1,29 +1,194 @@
+import csv
+import io
 from api.core.base.services import Service
 from api.v1.groups import schemas as g_schemas
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import exc as SQLALchemyExceptions
 from sqlalchemy.sql import and_
-from sqlalchemy import delete
+from sqlalchemy import delete, distinct, select, func
+from datetime import datetime
 
-from api.v1.groups.models import Group, GroupMember, GroupApprover
+from api.v1.groups.models import Group, GroupMember, GroupApprover, GroupClosure
+from api.v1.groups.hierarchy import (
+    HIERARCHY_COLUMNS, add_group_to_tree, ancestors_query, build_tree, is_in_subtree,
+    move_group_in_tree, remove_group_from_tree, subtree_query
+)
+from api.v1.requests.models import Request, RequestStatusEnum
+from api.v1.requests.services import embedded_users_version
+from api.utils import paginator
+from api.utils.sql import insert_ignore
+from api.v1.groups.approver_chains import invalidate_approver_chains
+from api.v1.user.models import User
+from api.v1.organization.models import OrganizationUser
 from api.v1.groups.exceptions import (
     GroupNotFoundException, MemberNotFoundException,
-    DuplicateGroupNameException, ApproverNotFoundException
+    DuplicateGroupNameException, ApproverNotFoundException, InvalidImportFileException,
+    InvalidParentGroupException, messages
 )
 
+GROUP_IMPORT_CHUNK_SIZE = 1000
+
+
+def show_group_load_options():
+    """
+        Eager-load options covering the relationships `ShowGroup` reads, needed because an `AsyncSession` can't lazy-load.
+    """
+    user_orgs = selectinload(User.user_orgs).selectinload(OrganizationUser.role)
+
+    return [
+        selectinload(Group.creator).options(user_orgs),
+        selectinload(Group.approvers).selectinload(GroupApprover.approver).options(user_orgs),
+    ]
+
+
+def group_member_list_load_options():
+    """
+        Eager-load plan for `GroupMemberListItem`: members, their organizations and roles in one query each per page
+    """
+    return [selectinload(GroupMember.member).selectinload(User.user_orgs).selectinload(OrganizationUser.role)]
+
+
+def group_approver_list_load_options():
+    """
+        Eager-load plan for `ShowGroupApprover`: approvers, their organizations and roles in one query each per page
+    """
+    return [selectinload(GroupApprover.approver).selectinload(User.user_orgs).selectinload(OrganizationUser.role)]
+
+
+def open_requests_counts_query(group_ids: set[int]):
+    """
+        Pending requests of each group's members in the group's organization, as (group_id, count) rows
+    """
+    return (
+        select(GroupMember.group_id, func.count(Request.id))
+        .join(Group, Group.id == GroupMember.group_id)
+        .join(Request, and_(
+            Request.requester_id == GroupMember.member_id,
+            Request.organization_id == Group.organization_id
+        ))
+        .filter(GroupMember.group_id.in_(group_ids), Request.status == RequestStatusEnum.PENDING.value)
+        .group_by(GroupMember.group_id)
+    )
+
+
+def subtree_open_requests_counts_query(group_ids: set[int]):
+    """
+        Pending requests of the members of each group and its sub-groups, as (group_id, count) rows.
+        A requester in several groups of a subtree is counted once.
+    """
+    return (
+        select(GroupClosure.ancestor_id, func.count(distinct(Request.id)))
+        .join(GroupMember, GroupMember.group_id == GroupClosure.descendant_id)
+        .join(Group, Group.id == GroupClosure.ancestor_id)
+        .join(Request, and_(
+            Request.requester_id == GroupMember.member_id,
+            Request.organization_id == Group.organization_id
+        ))
+        .filter(GroupClosure.ancestor_id.in_(group_ids), Request.status == RequestStatusEnum.PENDING.value)
+        .group_by(GroupClosure.ancestor_id)
+    )
+
+
+def set_open_requests_counts(groups: list[Group], rows) -> list[Group]:
+    counts = dict(rows)
+    for group in groups:
+        group._open_requests_count = counts.get(group.id, 0)
+
+    return groups
+
+
+def load_open_requests_counts(groups: list[Group], db: Session) -> list[Group]:
+    """
+        Fills `open_requests_count` for every group with one grouped query, instead of a session per group
+        when `ShowGroup` is serialized
+    """
+    if not groups:
+        return groups
+
+    return set_open_requests_counts(groups, db.execute(open_requests_counts_query({group.id for group in groups})).all())
+
+
+async def load_open_requests_counts_async(groups: list[Group], db: AsyncSession) -> list[Group]:
+    if not groups:
+        return groups
+
+    return set_open_requests_counts(groups, (await db.execute(open_requests_counts_query({group.id for group in groups}))).all())
+
+
+def read_import_csv(content: bytes) -> list[int]:
+    """
+        User ids from the first column of an uploaded CSV, a header row is allowed
+    """
+    try:
+        rows = list(csv.reader(io.StringIO(content.decode("utf-8-sig"))))
+    except (UnicodeDecodeError, csv.Error):
+        raise InvalidImportFileException()
+
+    cells = [row[0].strip() for row in rows if row and row[0].strip()]
+    if cells and not cells[0].isdigit():
+        cells = cells[1:]
+
+    if not cells or not all(cell.isdigit() for cell in cells):
+        raise InvalidImportFileException()
+
+    if len(cells) > g_schemas.GROUP_IMPORT_MAX_IDS:
+        raise InvalidImportFileException(messages.TOO_MANY_IMPORT_IDS.format(g_schemas.GROUP_IMPORT_MAX_IDS))
+
+    return [int(cell) for cell in cells]
+
+
+def import_group_users(model, user_column: str, group_id: int, organization_id: int, user_ids: list[int], db: Session) -> dict:
+    """
+        Adds users to a group's `model` rows (members or approvers) in one transaction: one `IN` query for the
+        organization's members, one for the users already in the group and chunked `INSERT ... IGNORE`s for the rest.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    column = getattr(model, user_column)
+
+    organization_user_ids = set(db.scalars(
+        select(OrganizationUser.user_id)
+        .filter(OrganizationUser.organization_id == organization_id, OrganizationUser.user_id.in_(user_ids))
+    ).all())
+    existing_user_ids = set(db.scalars(
+        select(column).filter(model.group_id == group_id, column.in_(organization_user_ids))
+    ).all()) if organization_user_ids else set()
+
+    added = [id for id in user_ids if id in organization_user_ids and id not in existing_user_ids]
+    rows = [{"group_id": group_id, user_column: id} for id in added]
+
+    # rows inserted concurrently since the lookup are skipped by the unique key instead of failing the import
+    for chunk_start in range(0, len(rows), GROUP_IMPORT_CHUNK_SIZE):
+        db.execute(insert_ignore(model, db), rows[chunk_start:chunk_start + GROUP_IMPORT_CHUNK_SIZE])
+
+    invalidate_approver_chains(organization_id, db=db)
+    db.commit()
+
+    return {
+        "added": added,
+        "skipped": [id for id in user_ids if id in existing_user_ids],
+        "invalid": [id for id in user_ids if id not in organization_user_ids],
+    }
+
 
 class GroupService(Service):
+    sort_columns = (Group.id,)
+
     def __init__(self) -> None:
         super().__init__()
 
     @classmethod
     async def create(cls, payload: g_schemas.CreateGroup, user_id: int, db: Session) -> g_schemas.ShowGroup:
         group_with_same_name = db.query(Group).filter(and_(
-            Group.name == payload.name, Group.is_deleted == False, Group.organization_id == payload.organization_id)).first()
+            Group.name == payload.name, Group.organization_id == payload.organization_id)).first()
 
         if group_with_same_name:
             raise DuplicateGroupNameException()
 
+        if payload.parent_group_id:
+            cls.check_parent_group(parent_group_id=payload.parent_group_id, organization_id=payload.organization_id, db=db)
+
         created_group = Group(
             organization_id=payload.organization_id,
             name=payload.name,
@@ -34,6 +199,8 @@ class GroupService(Service):
         )
 
         db.add(created_group)
+        db.flush()
+        add_group_to_tree(created_group, db=db)
         db.commit()
 
         if payload.approver_ids:
@@ -56,11 +223,62 @@ class GroupService(Service):
 
         db.refresh(created_group)
 
+        load_open_requests_counts([created_group], db=db)
+
         return created_group
 
     @classmethod
-    def get(cls):
-        pass
+    async def get(cls, id: int, organization_id: int, db: AsyncSession) -> g_schemas.ShowGroup:
+        """
+            Async lookup of a group in an organization, for read-only endpoints
+        """
+        query = (
+            select(Group)
+            .filter(and_(Group.id == id, Group.organization_id == organization_id))
+            .options(*show_group_load_options())
+        )
+        group = (await db.scalars(query)).first()
+
+        if not group:
+            raise GroupNotFoundException()
+
+        await load_open_requests_counts_async([group], db=db)
+
+        return group
+
+    @classmethod
+    async def fetch_version(cls, id: int, organization_id: int, db: AsyncSession) -> tuple:
+        """
+            What a group's representation depends on, for conditional GETs: its id and `last_updated`, the count and
+            latest update of its approvers, its open requests count, and its creator and approvers with their memberships
+            and roles. One primary key lookup with index-backed subqueries.
+        """
+        approver_ids = select(GroupApprover.approver_id).filter(GroupApprover.group_id == Group.id)
+
+        version = (await db.execute(
+            select(
+                Group.id,
+                Group.last_updated,
+                select(func.count(GroupApprover.id)).filter(GroupApprover.group_id == Group.id).scalar_subquery(),
+                select(func.max(GroupApprover.last_updated)).filter(GroupApprover.group_id == Group.id).scalar_subquery(),
+                select(func.count(Request.id))
+                .join(GroupMember, GroupMember.member_id == Request.requester_id)
+                .filter(
+                    GroupMember.group_id == Group.id,
+                    Request.organization_id == Group.organization_id,
+                    Request.status == RequestStatusEnum.PENDING.value
+                )
+                .scalar_subquery(),
+                *embedded_users_version(select(User.id).filter(User.id == Group.created_by)),
+                *embedded_users_version(approver_ids),
+            )
+            .filter(Group.id == id, Group.organization_id == organization_id)
+        )).first()
+
+        if not version:
+            raise GroupNotFoundException()
+
+        return tuple(version)
 
     @classmethod
     def update(cls):
@@ -73,13 +291,27 @@ class GroupService(Service):
     @classmethod
     def get_organization_group(cls, id: int, organization_id: int, db: Session) -> g_schemas.ShowGroup:
         group = db.query(Group).filter(and_(
-            Group.id == id, Group.organization_id == organization_id, Group.is_deleted == False)).first()
+            Group.id == id, Group.organization_id == organization_id)).first()
 
         if not group:
             raise GroupNotFoundException()
 
         return group
 
+    @classmethod
+    def check_parent_group(cls, parent_group_id: int, organization_id: int, db: Session, group_id: int = None) -> None:
+        """
+            A parent must be a group of the same organization, and can't be the group itself or one of its sub-groups
+        """
+        parent_group = db.query(Group.id).filter(and_(
+            Group.id == parent_group_id, Group.organization_id == organization_id)).first()
+
+        if not parent_group:
+            raise InvalidParentGroupException()
+
+        if group_id and is_in_subtree(group_id, parent_group_id, db=db):
+            raise InvalidParentGroupException(messages.PARENT_GROUP_CYCLE)
+
     @classmethod
     async def delete_organization_group(cls, id: int, organization_id: int, db: Session) -> g_schemas.ShowGroup:
         """
@@ -89,10 +321,14 @@ class GroupService(Service):
             id=id, organization_id=organization_id, db=db)
 
         group.is_deleted = True
+        remove_group_from_tree(group, db=db)
+        invalidate_approver_chains(organization_id, db=db)
 
         db.commit()
         db.refresh(group)
 
+        load_open_requests_counts([group], db=db)
+
         return group
 
     @classmethod
@@ -109,29 +345,118 @@ class GroupService(Service):
         if payload.description:
             group.description = payload.description
 
-        if payload.approval_levels:
+        if payload.approval_levels and payload.approval_levels != group.approval_levels:
             group.approval_levels = payload.approval_levels
+            invalidate_approver_chains(group.organization_id, db=db)
 
-        if payload.parent_group_id:
+        if payload.parent_group_id and payload.parent_group_id != group.parent_group_id:
+            cls.check_parent_group(
+                parent_group_id=payload.parent_group_id, organization_id=payload.organization_id, db=db, group_id=group.id)
+            move_group_in_tree(group, parent_group_id=payload.parent_group_id, db=db)
             group.parent_group_id = payload.parent_group_id
 
+        group.last_updated = datetime.utcnow()
+
         db.commit()
         db.refresh(group)
 
+        load_open_requests_counts([group], db=db)
+
         return group
 
     @classmethod
-    async def fetch_all(cls, org_id: int, db: Session, size: int = 50, offset: int = 50) -> tuple:
-        base_query = db.query(Group).filter(
-            and_(Group.organization_id == org_id, Group.is_deleted == False))
+    async def fetch_all(
+        cls,
+        org_id: int,
+        db: AsyncSession,
+        size: int = 50,
+        offset: int = 50,
+        cursor: str = None,
+        with_total: paginator.TotalEnum = paginator.TotalEnum.NONE
+    ) -> tuple:
+        base_query = select(Group).filter(Group.organization_id == org_id)
+
+        total = await paginator.resolve_total_async(
+            with_total,
+            ("groups", org_id),
+            lambda: db.scalar(select(func.count()).select_from(base_query.subquery()))
+        )
+        groups, has_more = paginator.split_page((await db.scalars(
+            paginator.order_by_keyset(base_query, cls.sort_columns, cursor=cursor, descending=False)
+            .options(*show_group_load_options()).limit(size + 1).offset(offset)
+        )).all(), size)
+
+        await load_open_requests_counts_async(groups, db=db)
+
+        return groups, total, has_more
+
+
+    @classmethod
+    async def load_hierarchy_counts(cls, nodes: list[dict], db: AsyncSession) -> list[dict]:
+        """
+            Own and subtree open requests counts of hierarchy nodes, one grouped query each
+        """
+        group_ids = {node["id"] for node in nodes}
+        if not group_ids:
+            return nodes
+
+        own_counts = dict((await db.execute(open_requests_counts_query(group_ids))).all())
+        subtree_counts = dict((await db.execute(subtree_open_requests_counts_query(group_ids))).all())
+
+        for node in nodes:
+            node["open_requests_count"] = own_counts.get(node["id"], 0)
+            node["subtree_open_requests_count"] = subtree_counts.get(node["id"], 0)
+
+        return nodes
+
+    @classmethod
+    async def fetch_subtree(cls, id: int, organization_id: int, db: AsyncSession) -> list[dict]:
+        """
+            A group and all its sub-groups, shallowest first
+        """
+        nodes = [dict(row._mapping) for row in (await db.execute(subtree_query(id, organization_id))).all()]
+
+        if not nodes:
+            raise GroupNotFoundException()
+
+        return await cls.load_hierarchy_counts(nodes, db=db)
+
+    @classmethod
+    async def fetch_ancestors(cls, id: int, organization_id: int, db: AsyncSession) -> list[dict]:
+        """
+            A group's ancestors, from the root down to its parent
+        """
+        group_id = await db.scalar(select(Group.id).filter(Group.id == id, Group.organization_id == organization_id))
+
+        if not group_id:
+            raise GroupNotFoundException()
 
-        total = base_query.count()
-        requests = base_query.limit(limit=size).offset(offset=offset).all()
+        nodes = [dict(row._mapping) for row in (await db.execute(ancestors_query(id, organization_id))).all()]
 
-        return requests, total
+        return await cls.load_hierarchy_counts(nodes, db=db)
+
+    @classmethod
+    async def fetch_tree(cls, organization_id: int, db: AsyncSession, root_id: int = None) -> list[dict]:
+        """
+            An organization's groups nested under their parents, or only the subtree of `root_id`
+        """
+        if root_id:
+            nodes = await cls.fetch_subtree(id=root_id, organization_id=organization_id, db=db)
+        else:
+            nodes = [
+                dict(row._mapping)
+                for row in (await db.execute(
+                    select(*HIERARCHY_COLUMNS).filter(Group.organization_id == organization_id).order_by(Group.id)
+                )).all()
+            ]
+            await cls.load_hierarchy_counts(nodes, db=db)
+
+        return build_tree(nodes)
 
 
 class GroupMemberService:
+    sort_columns = (GroupMember.id,)
+
     def __init__(self, group_id: int, organization_id: int, db: Session) -> None:
         """
             A group can only exist within the context of an organization, 
@@ -167,12 +492,28 @@ class GroupMemberService:
                 self.db.rollback()
                 continue
 
+            added_members.append(added_member)
+
+        invalidate_approver_chains(self.organization_id, db=self.db)
+        self.db.commit()
+
+        for added_member in added_members:
             self.db.refresh(added_member)
 
-            added_members.append(added_member)
+        # every member serializes the same group, counted once after the new members are in
+        load_open_requests_counts([self.group], db=self.db)
+        for added_member in added_members:
+            set_committed_value(added_member, "group", self.group)
 
         return added_members
 
+    async def import_group_members(self, member_ids: list[int]) -> dict:
+        """
+            Adds many users to the group at once, see `import_group_users`
+        """
+        return import_group_users(
+            GroupMember, "member_id", group_id=self.group_id, organization_id=self.organization_id, user_ids=member_ids, db=self.db)
+
     async def remove_group_members(self, member_ids: list[int]) -> str:
         member_count = self.db.query(GroupMember).filter(and_(GroupMember.member_id.in_(
             member_ids), GroupMember.group_id == self.group_id)).count()
@@ -181,21 +522,32 @@ class GroupMemberService:
             raise MemberNotFoundException()
 
         query = delete(GroupMember).where(
-            GroupMember.member_id.in_(member_ids))
+            GroupMember.member_id.in_(member_ids), GroupMember.group_id == self.group_id)
         self.db.execute(query)
 
+        invalidate_approver_chains(self.organization_id, db=self.db)
         self.db.commit()
 
         return f"User(s) with IDs {member_ids} removed successfully"
 
-    async def get_group_members(self, size: int = 50, offset: int = 0):
+    async def get_group_members(
+        self,
+        size: int = 50,
+        offset: int = 0,
+        cursor: str = None,
+        with_total: paginator.TotalEnum = paginator.TotalEnum.NONE
+    ):
         query = self.db.query(GroupMember).filter(
             GroupMember.group_id == self.group_id)
 
-        count = query.count()
-        members = query.offset(offset=offset).limit(limit=size).all()
+        total = paginator.resolve_total(with_total, ("group_members", self.group_id), query.count)
+        members, has_more = paginator.split_page(
+            paginator.order_by_keyset(query, self.sort_columns, cursor=cursor, descending=False)
+            .options(*group_member_list_load_options()).offset(offset=offset).limit(limit=size + 1).all(),
+            size
+        )
 
-        return members, count
+        return members, total, has_more
 
     @staticmethod
     def get_user_group(user_id: int, db: Session):
@@ -212,6 +564,8 @@ class GroupMemberService:
 
 
 class GroupApproverService:
+    sort_columns = (GroupApprover.id,)
+
     def __init__(self, group_id: int, organization_id: int, db: Session) -> None:
         """
             A group can only exist within the context of an organization, 
@@ -245,11 +599,23 @@ class GroupApproverService:
                 self.db.rollback()
                 continue
 
-            self.db.refresh(group_approver)
             added_approvers.append(group_approver)
 
+        invalidate_approver_chains(self.organization_id, db=self.db)
+        self.db.commit()
+
+        for group_approver in added_approvers:
+            self.db.refresh(group_approver)
+
         return added_approvers
 
+    async def import_group_approvers(self, approver_ids: list[int]) -> dict:
+        """
+            Adds many approvers to the group at once, see `import_group_users`
+        """
+        return import_group_users(
+            GroupApprover, "approver_id", group_id=self.group_id, organization_id=self.organization_id, user_ids=approver_ids, db=self.db)
+
     async def remove_group_approvers(self, approver_ids: list[int]):
         member_count = self.db.query(GroupApprover).filter(and_(GroupApprover.approver_id.in_(
             approver_ids), GroupApprover.group_id == self.group_id)).count()
@@ -258,19 +624,29 @@ class GroupApproverService:
             raise ApproverNotFoundException()
 
         query = delete(GroupApprover).where(
-            GroupApprover.approver_id.in_(approver_ids))
+            GroupApprover.approver_id.in_(approver_ids), GroupApprover.group_id == self.group_id)
         self.db.execute(query)
 
+        invalidate_approver_chains(self.organization_id, db=self.db)
         self.db.commit()
 
         return f"User(s) with IDs {approver_ids} removed successfully"
 
-    async def get_group_approvers(self, size: int = 50, offset: int = 0):
-
+    async def get_group_approvers(
+        self,
+        size: int = 50,
+        offset: int = 0,
+        cursor: str = None,
+        with_total: paginator.TotalEnum = paginator.TotalEnum.NONE
+    ):
         query = self.db.query(GroupApprover).filter(
             GroupApprover.group_id == self.group_id)
 
-        count = query.count()
-        approvers = query.offset(offset=offset).limit(limit=size).all()
+        total = paginator.resolve_total(with_total, ("group_approvers", self.group_id), query.count)
+        approvers, has_more = paginator.split_page(
+            paginator.order_by_keyset(query, self.sort_columns, cursor=cursor, descending=False)
+            .options(*group_approver_list_load_options()).offset(offset=offset).limit(limit=size + 1).all(),
+            size
+        )
 
-        return approvers, count
+        return approvers, total, has_more
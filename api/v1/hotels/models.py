@@ -1,8 +1,9 @@
-from sqlalchemy import Boolean, Column, ForeignKey, String, DateTime, BIGINT
+from sqlalchemy import Column, ForeignKey, String, DateTime, BIGINT
 from datetime import datetime
 from api.db.database import Base
+from api.db.soft_delete import SoftDeleteMixin
 
-class ApprovedHotel(Base):
+class ApprovedHotel(SoftDeleteMixin, Base):
     __tablename__ = "approved_hotels"
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     organization_id = Column(BIGINT, index=True, nullable=False)
@@ -13,4 +14,3 @@ class ApprovedHotel(Base):
     created_by = Column(BIGINT, ForeignKey('users.id'), index=True)
     date_created = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow)
-    is_deleted = Column(Boolean, default=False)
@@ -37,6 +37,7 @@ async def get_hotels(
     city: str = None,
     page: int = 1,
     size: int = 50,
+    with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
     user: user_schema.ShowUser = Depends(is_org_member),
     db: Session = Depends(get_db),
 ):
@@ -45,16 +46,18 @@ async def get_hotels(
     page_number = 1 if page <= 0 else page
     offset = paginator.off_set(page=page_number, size=page_size)
 
-    hotels, total = await HotelService.fetch_all(org_id=organization_id,
+    hotels, total, has_more = await HotelService.fetch_all(org_id=organization_id,
                                                  db=db, country=country,
                                                  state=state, city=city,
-                                                 size=page_size, offset=offset)
+                                                 size=page_size, offset=offset,
+                                                 with_total=with_total)
 
     pointers = paginator.page_urls(
         page=page_number,
         size=page_size,
         count=total,
         endpoint=f'/hotels/{organization_id}',
+        has_more=has_more,
     )
 
     response = paginator.build_paginated_response(
@@ -62,6 +65,7 @@ async def get_hotels(
         size=page_size,
         total=total,
         pointers=pointers,
+        has_more=has_more,
         items=list(map((lambda hotel: hotel_schemas.ShowApprovedHotel.model_validate(hotel)), hotels)))
 
     return response
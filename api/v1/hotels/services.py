@@ -4,6 +4,7 @@ import requests
 from api.core.base.services import Service
 from fastapi import HTTPException
 from api.utils.typesense import TypesenseClient
+from api.utils import paginator
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import and_
 from api.v1.hotels.models import ApprovedHotel
@@ -119,7 +120,17 @@ class HotelService():
         return approved_hotel
 
     @classmethod
-    async def fetch_all(cls, org_id: int, db: Session, country: str = None, state: str = None, city: str = None, size: int = 50, offset: int = 50):
+    async def fetch_all(
+        cls,
+        org_id: int,
+        db: Session,
+        country: str = None,
+        state: str = None,
+        city: str = None,
+        size: int = 50,
+        offset: int = 50,
+        with_total: paginator.TotalEnum = paginator.TotalEnum.NONE
+    ):
 
         base_query = db.query(ApprovedHotel).filter(
             and_(ApprovedHotel.organization_id == org_id, ApprovedHotel.is_deleted == False))
@@ -131,10 +142,10 @@ class HotelService():
         if city:
             base_query = base_query.filter(ApprovedHotel.city == city)
 
-        total = base_query.count()
-        hotels = base_query.limit(limit=size).offset(offset=offset).all()
+        total = paginator.resolve_total(with_total, ("hotels", org_id, country, state, city), base_query.count)
+        hotels, has_more = paginator.split_page(base_query.limit(limit=size + 1).offset(offset=offset).all(), size)
 
-        return hotels, total
+        return hotels, total, has_more
 
     @classmethod
     async def fetch_rooms(cls, hotel_id: str, start_dt: datetime = None, end_dt: datetime = None):
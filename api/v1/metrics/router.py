@@ -0,0 +1,59 @@
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from decouple import config
+
+from api.db.metrics import pool_metrics
+from api.db.profiler import profiler, N_PLUS_ONE_THRESHOLD
+from api.v1.metrics import schemas as metrics_schemas
+
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+app = APIRouter(tags=["Metrics"])
+
+
+def is_metrics_client(x_metrics_token: str = Header(default="")):
+    """
+        Internal endpoints are disabled, `404`, unless `METRICS_TOKEN` is set; callers pass it in the `X-Metrics-Token`
+        header and get a `401` without it and a `403` with another one.
+    """
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if not x_metrics_token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    if not secrets.compare_digest(x_metrics_token, METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+
+@app.get("/metrics", status_code=status.HTTP_200_OK, include_in_schema=False, dependencies=[Depends(is_metrics_client)])
+async def get_metrics():
+    """
+        Connection pool gauges, checkout wait/hold histograms and per-route connection hold times for this worker.
+    """
+    return pool_metrics.snapshot()
+
+
+@app.put("/profiler", status_code=status.HTTP_200_OK, include_in_schema=False,
+         response_model=metrics_schemas.ShowProfiler, dependencies=[Depends(is_metrics_client)])
+async def update_profiler(payload: metrics_schemas.UpdateProfiler):
+    """
+        Turns the per-request SQL profiler on or off for this worker
+    """
+    profiler.enabled = payload.enabled
+
+    return {"enabled": profiler.enabled, "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD}
+
+
+@app.get("/profiles/{profile_id}", status_code=status.HTTP_200_OK, include_in_schema=False,
+         dependencies=[Depends(is_metrics_client)])
+async def get_profile(profile_id: str):
+    """
+        Statement-level profile of a request sent with `X-SQL-Profile: debug` while the profiler was on
+    """
+    profile = profiler.profiles.get(profile_id)
+
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    return profile
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class UpdateProfiler(BaseModel):
+    enabled: bool
+
+
+class ShowProfiler(BaseModel):
+    enabled: bool
+    n_plus_one_threshold: int
@@ -1,8 +1,9 @@
 import enum
-from sqlalchemy import Boolean, Column, ForeignKey, String, DateTime, BIGINT, Enum, JSON, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, String, DateTime, BIGINT, Enum, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from api.db.database import Base
+from api.db.soft_delete import SoftDeleteMixin
 from uuid import uuid4
 
 
@@ -12,21 +13,22 @@ class RoleEnum(enum.Enum):
     Logistics = "Logistics"
 
 
-class Organization(Base):
+class Organization(SoftDeleteMixin, Base):
     __tablename__ = "organizations"
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     name = Column(String(255), nullable=False)
     slug = Column(String(128), nullable=True, unique=True)
     created_by = Column(BIGINT, ForeignKey('users.id'), index=True)
     image_url = Column(String(255), nullable=True)
+    # bumped with every group change that alters approver chains, see `api.v1.groups.approver_chains`
+    approver_chain_version = Column(BIGINT, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
-    is_deleted = Column(Boolean, default=False)
 
     creator = relationship("User", backref="org_creator", viewonly=True)
 
 
-class OrganizationUser(Base):
+class OrganizationUser(SoftDeleteMixin, Base):
     __tablename__ = "organization_users"
     __table_args__ = (
         UniqueConstraint('organization_id', 'user_id'),
@@ -36,9 +38,8 @@ class OrganizationUser(Base):
         "organizations.id"), index=True)
     user_id = Column(BIGINT, ForeignKey("users.id"), index=True)
     role_id = Column(BIGINT, ForeignKey('org_user_roles.id'), nullable=False)
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now)
-    is_deleted = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", backref="user_user", viewonly=True)
     organization = relationship(
@@ -77,7 +78,7 @@ class OrganizationInvite(Base):
         "Organization", backref="invite_org", viewonly=True)
 
 
-class Role(Base):
+class Role(SoftDeleteMixin, Base):
     __tablename__ = "org_user_roles"
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     organization_id = Column(BIGINT, ForeignKey(
@@ -86,4 +87,3 @@ class Role(Base):
     permissions = Column(JSON, nullable=False)
     date_created = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow)
-    is_deleted = Column(Boolean, default=False)
@@ -1,9 +1,10 @@
-from fastapi import Depends, APIRouter, Depends, status, HTTPException, BackgroundTasks
+from fastapi import Depends, APIRouter, Depends, Request, status, HTTPException, BackgroundTasks
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from decouple import config
 from api.v1.organization import schemas as organization_schema
-from api.db.database import get_db
+from api.db.database import get_db, get_async_db
 from api.v1.user.schemas import ShowUser
 from api.v1.organization.services import OrganizationService
 from api.v1.groups.services import GroupService
@@ -50,7 +51,7 @@ async def create_organization(
 @app.get("/organizations", status_code=status.HTTP_200_OK)
 async def get_organizations(
     user: ShowUser = Depends(is_authenticated),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     size: int = 20,
     page: int = 1,
 ):
@@ -133,34 +134,51 @@ async def invite_user(
 
 @app.get("/organizations/{organization_id}/invites", status_code=status.HTTP_200_OK)
 async def get_organization_invites(
+    request: Request,
     organization_id: int,
     search_value: str = None,
     page: int = 1,
     size: int = 50,
+    cursor: str = None,
+    with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
     user: ShowUser = Depends(is_org_member),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
 
     page_size = 50 if size < 1 or size > 100 else size
-    page_number = 1 if page <= 0 else page
+    page_number = 1 if page <= 0 or cursor else page
     offset = paginator.off_set(page=page_number, size=page_size)
 
     # call a send invites function that takes in all emails with the organization and the user sending them
-    result, count = await OrganizationService.get_organization_invites(organization_id=organization_id, search_value=search_value, offset=offset, limit=page_size, db=db)
+    result, count, has_more = await OrganizationService.get_organization_invites(
+        organization_id=organization_id, search_value=search_value, offset=offset, limit=page_size, cursor=cursor, with_total=with_total, db=db)
 
-    pointers = paginator.page_urls(
-        page=page,
-        size=page_size,
-        count=count,
-        endpoint=f"/organizations/{organization_id}/invites",
-    )
+    next_cursor = paginator.next_cursor(result, page_size, OrganizationService.invite_sort_columns, has_more=has_more)
+
+    if cursor:
+        pointers = paginator.cursor_urls(
+            size=page_size,
+            endpoint=f"/organizations/{organization_id}/invites",
+            next_cursor=next_cursor,
+            query_params=request.query_params,
+        )
+    else:
+        pointers = paginator.page_urls(
+            page=page,
+            size=page_size,
+            count=count,
+            endpoint=f"/organizations/{organization_id}/invites",
+            has_more=has_more,
+        )
 
     response = {
         "page": page_number,
         "size": page_size,
         "total": count,
+        "has_more": has_more,
         "previous_page": pointers["previous"],
         "next_page": pointers["next"],
+        "next_cursor": next_cursor,
         "items": result,
     }
 
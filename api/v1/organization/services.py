@@ -1,7 +1,9 @@
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import and_
+from sqlalchemy import select, func
 from decouple import config
 from pydantic import EmailStr
 from typing import Optional
@@ -11,9 +13,11 @@ from sqlalchemy import exc as SQLALchemyExceptions
 from api.v1.organization.models import Organization, OrganizationUser, OrganizationInvite, RoleEnum, Role
 from api.v1.organization import schemas as organization_schemas
 from api.v1.user.schemas import ShowUser
+from api.v1.user.models import User
 from api.v1.organization.exceptions import OrganizationNotFoundException, InviteNotFoundException
 from api.v1.user.services import UserService
 from api.core.base.services import Service
+from api.utils import paginator
 from api.v1.emails.services import EmailService
 from slugify import slugify
 import random
@@ -29,6 +33,7 @@ DEFAULT_ORG_ROLES = ["Admin", "Regular"]
 
 
 class OrganizationService(Service):
+    invite_sort_columns = (OrganizationInvite.created_at, OrganizationInvite.id)
 
     def __init__(self) -> None:
         pass
@@ -76,12 +81,14 @@ class OrganizationService(Service):
         return org
 
     @staticmethod
-    async def fetch_all(user_id: str, db: Session):
-        query = db.query(Organization).join(OrganizationUser, OrganizationUser.organization_id ==
-                                            Organization.id).filter(OrganizationUser.user_id == user_id)
+    async def fetch_all(user_id: str, db: AsyncSession):
+        query = select(Organization).join(OrganizationUser, OrganizationUser.organization_id ==
+                                          Organization.id).filter(OrganizationUser.user_id == user_id)
 
-        total = query.all()
-        count = query.count()  # change to the more efficient count method
+        total = (await db.scalars(
+            query.options(selectinload(Organization.creator).selectinload(User.user_orgs).selectinload(OrganizationUser.role))
+        )).all()
+        count = len(total)
 
         return (total, count)
 
@@ -245,19 +252,24 @@ class OrganizationService(Service):
         return invite_response
 
     @classmethod
-    async def get_organization_invites(cls, organization_id: int, db: Session,  search_value: Optional[str] = None, offset: int = 1, limit: int = 20):
-        query = db.query(OrganizationInvite).filter(
+    async def get_organization_invites(cls, organization_id: int, db: AsyncSession,  search_value: Optional[str] = None, offset: int = 1, limit: int = 20, cursor: str = None, with_total: paginator.TotalEnum = paginator.TotalEnum.NONE):
+        query = select(OrganizationInvite).filter(
             OrganizationInvite.organization_id == organization_id)
 
         if search_value:
             query = query.filter(OrganizationInvite.reciever_email.ilike(
                 f"%{search_value.lower()}%"))
 
-        count = query.count()
-        result = query.order_by(OrganizationInvite.created_at.desc()).offset(
-            offset).limit(limit).all()
+        count = await paginator.resolve_total_async(
+            with_total,
+            ("invites", organization_id, search_value),
+            lambda: db.scalar(select(func.count()).select_from(query.subquery()))
+        )
+        result, has_more = paginator.split_page((await db.scalars(
+            paginator.order_by_keyset(query, cls.invite_sort_columns, cursor=cursor).offset(offset).limit(limit + 1)
+        )).all(), limit)
 
-        return result, count
+        return result, count, has_more
 
 
 class OrganizationUserService:
@@ -4,6 +4,11 @@ class RequestMessages:
     REQUEST_NOT_FOUND = "Request not found."
     NOT_ALLOWED_TO_UPDATE_STATUS = "You are not allowed to update the status of this request"
     LOWER_APPROVER_HAS_NOT_APPROVED = "Cannot add approval until all lower approvers have approved"
+    BULK_ITEM_WRONG_ORGANIZATION = "Request belongs to a different organization"
+    BULK_ITEM_REQUESTER_NOT_MEMBER = "Requester is not a member of this organization"
+    APPROVAL_CONFLICT = "Another approval on this request is in progress, please retry"
+    OVERLAPPING_TRIP = "The requester already has a pending or approved trip overlapping these dates"
+    INVALID_TRAVEL_WINDOW = "The window must end on or after its start and span at most {} days"
 
 messages = RequestMessages()
 
@@ -28,4 +33,28 @@ class LowerApproverHasNotApprovedException(HTTPException):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=detail if detail else messages.LOWER_APPROVER_HAS_NOT_APPROVED,
             headers=None,
-        )
\ No newline at end of file
+        )
+
+class ApprovalConflictException(HTTPException):
+    def __init__(self, detail: str = None):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail if detail else messages.APPROVAL_CONFLICT,
+            headers=None,
+        )
+
+class InvalidTravelWindowException(HTTPException):
+    def __init__(self, detail: str = None):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail if detail else messages.INVALID_TRAVEL_WINDOW,
+            headers=None,
+        )
+
+class OverlappingTripException(HTTPException):
+    def __init__(self, detail: str = None):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=detail if detail else messages.OVERLAPPING_TRIP,
+            headers=None,
+        )
@@ -1,11 +1,12 @@
 from sqlalchemy import (
-    Boolean, Column, ForeignKey, String,
+    Column, ForeignKey, String,
     DateTime, BIGINT, Date, Text, Float,
-    UniqueConstraint, Integer
+    UniqueConstraint, Integer, Index, text
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 from api.db.database import Base
+from api.db.soft_delete import SoftDeleteMixin
 import enum
 
 
@@ -15,28 +16,49 @@ class RequestStatusEnum(enum.Enum):
     REJECTED = "rejected"
 
 
-class Request(Base):
+class Request(SoftDeleteMixin, Base):
     __tablename__ = "requests"
+    __table_args__ = (
+        # every list query filters on the organization and live rows, newest first
+        Index('ix_requests_org_deleted_created', 'organization_id', 'is_deleted', 'date_created'),
+        Index('ix_requests_org_status_created', 'organization_id', 'status', 'date_created'),
+        # live rows only, the soft-delete criterion lets the planner use it for every ORM query on Postgres
+        Index(
+            'ix_requests_live_org_created', 'organization_id', 'date_created', postgresql_where=text('NOT is_deleted')
+        ).ddl_if(dialect='postgresql'),
+        # delta sync reads an organization's changes in (last_updated, id) order
+        Index('ix_requests_org_updated', 'organization_id', 'last_updated', 'id'),
+        # a requester's trips by date, for overlap checks at creation; also backs the `requester_id` foreign key
+        Index('ix_requests_requester_start_end', 'requester_id', 'start', 'end'),
+        # full-text search, see `api.v1.requests.search` (SQLite gets an FTS5 table instead)
+        Index('ix_requests_search_document', 'search_document', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+        Index(
+            'ix_requests_search_document_tsv',
+            text("to_tsvector('simple', coalesce(search_document, ''))"),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+    )
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
-    organization_id = Column(BIGINT, index=True, nullable=False)
-    requester_id = Column(BIGINT, ForeignKey('users.id'), index=True, nullable=False)
-    country = Column(String(255), index=True, nullable=False)
-    state = Column(String(255), index=True, nullable=False)
-    city = Column(String(255), index=True, nullable=False)
-    start = Column(Date, index=True, nullable=False)
-    end = Column(Date, index=True, nullable=False)
+    organization_id = Column(BIGINT, nullable=False)
+    requester_id = Column(BIGINT, ForeignKey('users.id'), nullable=False)
+    country = Column(String(255), nullable=False)
+    state = Column(String(255), nullable=False)
+    city = Column(String(255), nullable=False)
+    start = Column(Date, nullable=False)
+    end = Column(Date, nullable=False)
     purpose = Column(Text(1000))
-    hotel = Column(String(255), index=True, nullable=False)
+    hotel = Column(String(255), nullable=False)
     room = Column(String(255), nullable=False)
-    rate = Column(Float, index=True)
+    rate = Column(Float)
     meal = Column(Text(1000))
     transport = Column(Text(1000))
     other_requests = Column(Text(1000))
     rejection_reason = Column(Text(1000))
     status = Column(String(255), default=RequestStatusEnum.PENDING.value)
+    # only read by the text indexes, so never loaded with the row
+    search_document = deferred(Column(Text))
     date_created = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow)
-    is_deleted = Column(Boolean, default=False)
 
     requester = relationship("User", viewonly=True)
     request_approvals = relationship("RequestApproval", viewonly=True)
@@ -46,16 +68,30 @@ class RequestApproval(Base):
     __tablename__ = "request_approvals"
     __table_args__ = (
         UniqueConstraint('request_id', 'approver_id'),
+        Index('ix_request_approvals_request_position', 'request_id', 'position'),
+        # approver inbox: an approver's pending approvals in one range scan
+        Index('ix_request_approvals_approver_status_position', 'approver_id', 'status', 'position'),
+        # delta sync
+        Index('ix_request_approvals_updated', 'last_updated', 'id'),
     )
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     request_id = Column(BIGINT, ForeignKey('requests.id'),
                         index=True, nullable=False)
     approver_id = Column(BIGINT, ForeignKey(
-        'users.id'), index=True, nullable=False)
-    position = Column(Integer, index=True, default=1)
+        'users.id'), nullable=False)
+    position = Column(Integer, default=1)
     status = Column(String(255), default=RequestStatusEnum.PENDING.value)
     date_created = Column(DateTime, default=datetime.utcnow)
     last_updated = Column(DateTime, default=datetime.utcnow)
 
     request = relationship("Request", viewonly=True)
     approver = relationship("User", viewonly=True)
+
+
+# one row per calendar week (keyed by its Monday) a request's trip overlaps, kept in sync by `api.v1.requests.travel`
+class RequestTravelWeek(Base):
+    __tablename__ = "request_travel_weeks"
+    # the primary key is the lookup index: an organization's trips in a window of weeks are one range scan
+    organization_id = Column(BIGINT, primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    request_id = Column(BIGINT, ForeignKey('requests.id'), primary_key=True, index=True)
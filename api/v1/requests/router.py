@@ -1,78 +1,289 @@
-from fastapi import APIRouter, Depends, status, BackgroundTasks
+from fastapi import APIRouter, Depends, Query, Request, Response, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from api.v1.user import schemas as user_schema
-from api.db.database import get_db
+from api.db.database import get_db, get_async_db, get_async_read_db, get_async_read_session_factory
 from api.core.dependencies.user import is_authenticated, is_org_member
 from api.v1.requests import schemas as req_schemas
-from api.v1.requests.services import RequestService
+from api.v1.requests.services import RequestService, REQUEST_EMBEDS, EXPORT_COLUMNS
+from api.v1.requests.exceptions import messages, InvalidTravelWindowException
 from api.v1.emails.services import EmailService
 from api.v1.user.services import UserService
 from api.v1.auth.services import Auth
 from api.v1.groups.services import GroupMemberService
 from api.utils import paginator
+from api.utils.fieldsets import parse_fieldset, sparse_response
+from api.utils.conditional import check_not_modified, conditional_list_response
+from api.utils.export import stream_csv, stream_ndjson
 from api.v1.requests.models import RequestStatusEnum
-from datetime import timedelta
+from datetime import date, timedelta
 from api.utils.callingOpenaiForApprovedStatus import OpenAiService
 from decouple import config
 
 MAGIC_TOKEN_EXPIRE_MINUTES = int(config('ACCESS_TOKEN_EXPIRE_MINUTES'))
+MAX_TRAVEL_WINDOW_DAYS = 366
 
 app = APIRouter(tags=["Requests"])
 
 
-@app.post("/requests", status_code=status.HTTP_201_CREATED, response_model=req_schemas.ShowRequest)
+@app.post("/requests", status_code=status.HTTP_201_CREATED, response_model=req_schemas.CreatedRequest)
 async def create_request(
     payload: req_schemas.CreateRequest,
     background_task: BackgroundTasks,
+    on_overlap: req_schemas.OverlapPolicyEnum = req_schemas.OverlapPolicyEnum.FLAG,
     user: user_schema.ShowUser = Depends(is_authenticated),
     db: Session = Depends(get_db)
 ):
+    """
+        Creates a request. If the requester already has a pending or approved trip overlapping these dates the
+        request is still created with the conflicts in `overlapping_request_ids`, or refused with 409 when
+        `on_overlap` is `reject`.
+    """
     await is_org_member(organization_id=payload.organization_id, user=user, db=db)
 
-    created_request = await RequestService.create(payload=payload, db=db)
+    created_request = await RequestService.create(payload=payload, db=db, on_overlap=on_overlap)
 
     
     return created_request
 
 
+@app.post("/requests/bulk", status_code=status.HTTP_201_CREATED, response_model=req_schemas.BulkCreateRequestsResponse)
+async def create_requests(
+    payload: req_schemas.BulkCreateRequests,
+    on_overlap: req_schemas.OverlapPolicyEnum = req_schemas.OverlapPolicyEnum.FLAG,
+    user: user_schema.ShowUser = Depends(is_authenticated),
+    db: Session = Depends(get_db)
+):
+    """
+        Creates up to 500 requests for an organization in one transaction.
+
+        Each item in `results` has the created request's `id`, or an `error` if that item was skipped.
+        `overlapping_request_ids` lists the requester's trips it overlaps; with `on_overlap=reject` such items are skipped.
+    """
+    await is_org_member(organization_id=payload.organization_id, user=user, db=db)
+
+    return await RequestService.create_many(
+        organization_id=payload.organization_id, payloads=payload.requests, db=db, on_overlap=on_overlap)
+
+
 @app.get("/requests", status_code=status.HTTP_200_OK, response_model=req_schemas.PaginatedRequestsResponse)
 async def get_requests(
+    http_request: Request,
     organization_id: int,
     status: req_schemas.RequestStatusEnum = None,
     requester: int = None,
     approver: int = None,
     user: user_schema.ShowUser = Depends(is_org_member),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     size: int = 20,
     page: int = 1,
+    cursor: str = None,
+    with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
+    fields: str = None,
+    embed: str = None,
 ):
+    """
+        Lists an organization's requests.
+
+        `fields` (e.g. `id,status,city,start,end`) and `embed` (`requester`, `request_approvals`) narrow each item
+        to the named fields and nested objects; when either is given, nothing else is embedded.
+
+        Pages carry a weak `ETag`, send it back in `If-None-Match` to get a `304` while the page is unchanged.
+    """
+    fieldset = parse_fieldset(req_schemas.ShowRequest, fields=fields, embed=embed, embeddable=REQUEST_EMBEDS)
     page_size = 20 if size < 1 or size > 20 else size
-    page_number = 1 if page <= 0 else page
+    page_number = 1 if page <= 0 or cursor else page
     offset = paginator.off_set(page=page_number, size=page_size)
 
-    requests, total = await RequestService.fetch_all(
+    requests, total, has_more = await RequestService.fetch_all(
         org_id=organization_id,
         db=db,
         size=page_size,
         offset=offset,
+        cursor=cursor,
+        with_total=with_total,
+        fieldset=fieldset,
         requester=requester,
         approver=approver,
         status=status
     )
 
-    pointers = paginator.page_urls(
+    next_cursor = paginator.next_cursor(requests, page_size, RequestService.sort_columns, has_more=has_more)
+
+    if cursor:
+        pointers = paginator.cursor_urls(
+            size=page_size, endpoint='/requests', next_cursor=next_cursor, query_params=http_request.query_params)
+    else:
+        pointers = paginator.page_urls(
+            page=page_number,
+            size=page_size,
+            count=total,
+            endpoint='/requests',
+            has_more=has_more,
+        )
+
+    response = paginator.build_paginated_response(
         page=page_number,
         size=page_size,
-        count=total,
-        endpoint='/requests',
+        total=total,
+        pointers=pointers,
+        next_cursor=next_cursor,
+        has_more=has_more,
+        items=list(map((lambda request: req_schemas.ShowRequest.model_validate(request)), requests))
+            if fieldset is None else fieldset.serialize(requests))
+
+    return conditional_list_response(
+        http_request, response, response_model=req_schemas.PaginatedRequestsResponse if fieldset is None else None)
+
+
+@app.get("/requests/export", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def export_requests(
+    organization_id: int,
+    format: req_schemas.ExportFormatEnum = req_schemas.ExportFormatEnum.CSV,
+    status: req_schemas.RequestStatusEnum = None,
+    requester: int = None,
+    approver: int = None,
+    created_from: date = None,
+    created_to: date = None,
+    user: user_schema.ShowUser = Depends(is_org_member),
+    session_factory: async_sessionmaker = Depends(get_async_read_session_factory),
+):
+    """
+        Streams every request matching the `GET /requests` filters, created between `created_from` and `created_to`
+        (inclusive), as CSV or newline delimited JSON in one response, oldest first.
+    """
+    async def rows():
+        # the body is streamed after the endpoint's dependencies are closed, so it opens its own session
+        async with session_factory() as db:
+            async for row in RequestService.stream_export(
+                org_id=organization_id,
+                db=db,
+                requester=requester,
+                status=status,
+                approver=approver,
+                created_from=created_from,
+                created_to=created_to
+            ):
+                yield row
+
+    filename = f"requests-{organization_id}.{format.value}"
+
+    if format == req_schemas.ExportFormatEnum.NDJSON:
+        body, media_type = stream_ndjson(rows()), "application/x-ndjson"
+    else:
+        body, media_type = stream_csv(rows(), columns=EXPORT_COLUMNS), "text/csv"
+
+    return StreamingResponse(body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@app.get("/requests/search", status_code=status.HTTP_200_OK, response_model=req_schemas.PaginatedRequestsResponse)
+async def search_requests(
+    http_request: Request,
+    organization_id: int,
+    q: str = Query(..., min_length=1, max_length=255),
+    user: user_schema.ShowUser = Depends(is_org_member),
+    db: AsyncSession = Depends(get_async_read_db),
+    size: int = 20,
+    cursor: str = None,
+):
+    """
+        Full-text search over an organization's requests by purpose, hotel, city, state, country or requester name,
+        best match first. Follow `next_cursor` for more results.
+    """
+    page_size = 20 if size < 1 or size > 20 else size
+
+    requests, has_more, next_cursor = await RequestService.search(
+        org_id=organization_id, q=q, db=db, size=page_size, cursor=cursor)
+
+    pointers = paginator.cursor_urls(
+        size=page_size, endpoint='/requests/search', next_cursor=next_cursor, query_params=http_request.query_params)
+
+    response = paginator.build_paginated_response(
+        page=1,
+        size=page_size,
+        total=None,
+        pointers=pointers,
+        next_cursor=next_cursor,
+        has_more=has_more,
+        items=list(map((lambda request: req_schemas.ShowRequest.model_validate(request)), requests)))
+
+    return response
+
+
+@app.get("/requests/travelling", status_code=status.HTTP_200_OK, response_model=req_schemas.TravellingResponse)
+async def get_travelling(
+    organization_id: int,
+    start: date,
+    end: date,
+    city: str = None,
+    user: user_schema.ShowUser = Depends(is_org_member),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+        Approved trips overlapping `start`..`end` (inclusive), grouped by city and department, for the
+        organization's travel calendar. Optionally narrowed to one `city`.
+    """
+    if end < start or (end - start).days > MAX_TRAVEL_WINDOW_DAYS:
+        raise InvalidTravelWindowException(detail=messages.INVALID_TRAVEL_WINDOW.format(MAX_TRAVEL_WINDOW_DAYS))
+
+    groups = await RequestService.fetch_travelling(
+        org_id=organization_id, window_start=start, window_end=end, db=db, city=city)
+
+    return {"start": start, "end": end, "groups": groups}
+
+
+@app.get("/approvals/inbox", status_code=status.HTTP_200_OK, response_model=req_schemas.ApproverInboxResponse)
+async def get_approver_inbox(
+    http_request: Request,
+    organization_id: int,
+    user: user_schema.ShowUser = Depends(is_org_member),
+    db: AsyncSession = Depends(get_async_read_db),
+    size: int = 20,
+    page: int = 1,
+    cursor: str = None,
+):
+    """
+        Lists the pending requests waiting on the current user's approval, oldest first.
+
+        `counts` has the number of the user's approvals in the organization per status.
+    """
+    page_size = 20 if size < 1 or size > 20 else size
+    page_number = 1 if page <= 0 or cursor else page
+    offset = paginator.off_set(page=page_number, size=page_size)
+
+    requests, counts, has_more = await RequestService.fetch_approver_inbox(
+        approver_id=user.id,
+        org_id=organization_id,
+        db=db,
+        size=page_size,
+        offset=offset,
+        cursor=cursor
     )
 
+    next_cursor = paginator.next_cursor(requests, page_size, RequestService.sort_columns, has_more=has_more)
+
+    if cursor:
+        pointers = paginator.cursor_urls(
+            size=page_size, endpoint='/approvals/inbox', next_cursor=next_cursor, query_params=http_request.query_params)
+    else:
+        pointers = paginator.page_urls(
+            page=page_number,
+            size=page_size,
+            count=None,
+            endpoint='/approvals/inbox',
+            has_more=has_more,
+        )
+
     response = paginator.build_paginated_response(
         page=page_number,
         size=page_size,
-        total=total,
+        total=None,
         pointers=pointers,
+        next_cursor=next_cursor,
+        has_more=has_more,
         items=list(map((lambda request: req_schemas.ShowRequest.model_validate(request)), requests)))
+    response["counts"] = req_schemas.ApprovalStatusCounts(**counts)
 
     return response
 
@@ -81,13 +292,31 @@ async def get_requests(
 async def get_request(
     id: int,
     organization_id: int,
-    user: user_schema.ShowUser = Depends(is_authenticated),
-    db: Session = Depends(get_db)
+    http_request: Request,
+    response: Response,
+    fields: str = None,
+    embed: str = None,
+    user: user_schema.ShowUser = Depends(is_org_member),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    await is_org_member(organization_id=organization_id, user=user, db=db)
+    """
+        Retrieves a request, `fields` and `embed` narrow it like on `GET /requests`
+
+        Answers `304` when `If-None-Match` or `If-Modified-Since` show the client's copy is current.
+    """
+    fieldset = parse_fieldset(req_schemas.ShowRequest, fields=fields, embed=embed, embeddable=REQUEST_EMBEDS)
+
+    version = await RequestService.fetch_version(id=id, org_id=organization_id, db=db)
+    not_modified, validators = check_not_modified(http_request, version, vary=(fields, embed))
+    if not_modified:
+        return not_modified
+
+    request = await RequestService.get_request_in_organization(id=id, org_id=organization_id, db=db, fieldset=fieldset)
 
-    request = await RequestService.get_request_in_organization(id=id, org_id=organization_id, db=db)
+    if fieldset is not None:
+        return sparse_response(fieldset.serialize([request])[0], headers=validators)
 
+    response.headers.update(validators)
     return request
 
 
@@ -1,7 +1,8 @@
 from fastapi import HTTPException, status
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime, date
 from typing import Optional
+from enum import Enum
 from api.v1.requests.models import RequestStatusEnum
 from api.utils.utils import PaginatedResponse
 from api.v1.user.schemas import ShowUser
@@ -60,6 +61,15 @@ class ShowRequest(RequestBase):
         from_attributes = True
 
 
+class CreatedRequest(ShowRequest):
+    overlapping_request_ids: list[int] = []
+
+
+class OverlapPolicyEnum(str, Enum):
+    FLAG = "flag"
+    REJECT = "reject"
+
+
 class UpdateRequest(BaseModel):
     organization_id: int
     status: Optional[RequestStatusEnum] = None
@@ -82,5 +92,66 @@ class UpdateRequestApproval(BaseModel):
     status: RequestStatusEnum
 
 
+class BulkCreateRequests(BaseModel):
+    organization_id: int
+    requests: list[CreateRequest] = Field(..., min_length=1, max_length=500)
+
+
+class BulkCreateRequestResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+    overlapping_request_ids: list[int] = []
+
+
+class BulkCreateRequestsResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkCreateRequestResult]
+
+
 class PaginatedRequestsResponse(PaginatedResponse):
     items: list[ShowRequest]
+
+
+class ExportFormatEnum(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ApprovalStatusCounts(BaseModel):
+    pending: int = 0
+    approved: int = 0
+    rejected: int = 0
+
+
+class ApproverInboxResponse(PaginatedResponse):
+    items: list[ShowRequest]
+    counts: ApprovalStatusCounts
+
+
+class TravellingDepartment(BaseModel):
+    id: int
+    name: str
+
+
+class TravellingTrip(BaseModel):
+    request_id: int
+    requester_id: int
+    requester_name: str
+    start: date
+    end: date
+
+
+class TravellingGroup(BaseModel):
+    country: str
+    state: str
+    city: str
+    department: Optional[TravellingDepartment] = None
+    trips: list[TravellingTrip]
+
+
+class TravellingResponse(BaseModel):
+    start: date
+    end: date
+    groups: list[TravellingGroup]
@@ -0,0 +1,113 @@
+"""
+    Full-text search over requests.
+
+    Each request keeps a `search_document` (purpose, hotel, location and requester name) refreshed on flush, and
+    on its requester's rename, indexed natively per dialect: a FULLTEXT index on MySQL, a GIN `tsvector` expression
+    index on Postgres and an FTS5 table kept in sync by triggers on SQLite.
+"""
+from itertools import chain
+from sqlalchemy import DDL, Float, event, inspect, literal_column, select, type_coerce
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import column, func, table
+from api.v1.requests.models import Request as RequestModel
+from api.v1.user.models import User
+
+SEARCHED_COLUMNS = ("purpose", "hotel", "city", "state", "country", "requester_id")
+SEARCHED_USER_COLUMNS = ("first_name", "last_name")
+
+requests_fts = table("requests_fts", column("rowid"), column("search_document"))
+
+_SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS requests_fts USING fts5(search_document, content='requests', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS requests_fts_insert AFTER INSERT ON requests BEGIN
+        INSERT INTO requests_fts(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS requests_fts_delete AFTER DELETE ON requests BEGIN
+        INSERT INTO requests_fts(requests_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS requests_fts_update AFTER UPDATE OF search_document ON requests BEGIN
+        INSERT INTO requests_fts(requests_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document);
+        INSERT INTO requests_fts(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+]
+
+for statement in _SQLITE_FTS_DDL:
+    event.listen(RequestModel.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+event.listen(RequestModel.__table__, "before_drop", DDL("DROP TABLE IF EXISTS requests_fts").execute_if(dialect="sqlite"))
+
+
+@event.listens_for(Session, "before_flush")
+def _refresh_search_documents(session, flush_context, instances):
+    stale_requests = {
+        request for request in chain(session.new, session.dirty)
+        if isinstance(request, RequestModel) and (
+            request in session.new
+            or any(inspect(request).attrs[name].history.has_changes() for name in SEARCHED_COLUMNS)
+        )
+    }
+
+    renamed_users = [
+        user for user in session.dirty
+        if isinstance(user, User)
+        and any(inspect(user).attrs[name].history.has_changes() for name in SEARCHED_USER_COLUMNS)
+    ]
+
+    if renamed_users:
+        # a requester's new name reaches every request they made
+        stale_requests.update(session.scalars(
+            select(RequestModel)
+            .filter(RequestModel.requester_id.in_({user.id for user in renamed_users}))
+            .execution_options(include_deleted=True)
+        ))
+
+    if not stale_requests:
+        return
+
+    # one lookup for every requester in the flush, deleted users keep their name on old requests
+    requester_names = {
+        id: f"{first_name} {last_name}"
+        for id, first_name, last_name in session.execute(
+            select(User.id, User.first_name, User.last_name)
+            .filter(User.id.in_({request.requester_id for request in stale_requests}))
+            .execution_options(include_deleted=True)
+        )
+    }
+    # renames are only written by this flush
+    requester_names.update({user.id: f"{user.first_name} {user.last_name}" for user in renamed_users})
+
+    for request in stale_requests:
+        request.search_document = " ".join(filter(None, [
+            request.purpose, request.hotel, request.city, request.state, request.country,
+            requester_names.get(request.requester_id),
+        ]))
+
+
+def apply_search(query, q: str, dialect_name: str) -> tuple:
+    """
+        Narrows a `select(Request)` to rows matching `q` using the dialect's text index.
+        Returns (query, score) where a higher `score` is a better match.
+    """
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import match
+
+        score = type_coerce(match(RequestModel.search_document, against=q).in_natural_language_mode(), Float)
+        return query.filter(score > 0), score
+
+    if dialect_name == "postgresql":
+        # must match the `ix_requests_search_document_tsv` expression for the planner to use it
+        document = func.to_tsvector(literal_column("'simple'"), func.coalesce(RequestModel.search_document, literal_column("''")))
+        search_query = func.websearch_to_tsquery(literal_column("'simple'"), q)
+
+        score = type_coerce(func.ts_rank(document, search_query), Float)
+        return query.filter(document.op("@@")(search_query)), score
+
+    # SQLite FTS5: quote every term so user input can't use the query syntax, terms are ANDed
+    fts_query = " ".join('"{}"'.format(term.replace('"', '""')) for term in q.split())
+    score = type_coerce(-func.bm25(literal_column("requests_fts")), Float)
+
+    return (
+        query.join(requests_fts, requests_fts.c.rowid == RequestModel.id)
+        .filter(literal_column("requests_fts").op("MATCH")(fts_query)),
+        score,
+    )
@@ -1,20 +1,137 @@
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator
 from sqlalchemy import exc as SQLALchemyExceptions
 
 from api.core.base.services import Service
 from api.v1.requests import schemas as req_schemas
-from api.v1.requests.models import Request as RequestModel, RequestStatusEnum, RequestApproval
-from api.v1.groups.models import GroupMember, GroupApprover
-from sqlalchemy.orm import Session
+from api.v1.requests.models import Request as RequestModel, RequestStatusEnum, RequestApproval, RequestTravelWeek
+from api.v1.groups.models import Group, GroupMember
+from api.v1.user.models import User
+from api.v1.organization.models import OrganizationUser, Role
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
 from sqlalchemy.sql import and_
+from api.utils.sql import insert_ignore
+from api.utils import paginator
+from api.utils.fieldsets import Fieldset
+from api.utils.events import event_hub, EventTypeEnum
+from api.v1.requests.search import apply_search
+from api.v1.requests.travel import TripIndex, week_start
+from api.v1.groups.approver_chains import resolve_approver_chains
 from api.v1.requests.exceptions import (
+    messages,
     RequestNotFoundException,
+    OverlappingTripException,
     NotAllowedToUpdateRequestStatusException,
-    LowerApproverHasNotApprovedException
+    LowerApproverHasNotApprovedException,
+    ApprovalConflictException
 )
 
+BULK_INSERT_CHUNK_SIZE = 1000
+# trips in these statuses block the requester's calendar
+OVERLAP_STATUSES = (RequestStatusEnum.PENDING.value, RequestStatusEnum.APPROVED.value)
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = [
+    "id", "organization_id", "requester_id", "status", "country", "state", "city", "start", "end",
+    "hotel", "room", "rate", "purpose", "meal", "transport", "other_requests", "rejection_reason",
+    "date_created", "last_updated",
+]
+
+
+REQUEST_EMBEDS = ("requester", "request_approvals")
+# lock wait timeout and deadlock, as MySQL error numbers and Postgres SQLSTATEs
+LOCK_CONFLICT_ERRNOS = (1205, 1213)
+LOCK_CONFLICT_SQLSTATES = ("40001", "40P01")
+
+
+def request_created_event(request: RequestModel) -> dict:
+    return {
+        "id": request.id,
+        "organization_id": request.organization_id,
+        "requester_id": request.requester_id,
+        "status": request.status,
+        "start": request.start,
+        "end": request.end,
+    }
+
+
+def is_lock_conflict(ex: SQLALchemyExceptions.OperationalError) -> bool:
+    """
+        Whether the database gave up on a lock wait or picked this transaction as a deadlock victim
+    """
+    orig = ex.orig
+    if getattr(orig, "pgcode", None) in LOCK_CONFLICT_SQLSTATES:
+        return True
+
+    args = getattr(orig, "args", ())
+    return bool(args) and args[0] in LOCK_CONFLICT_ERRNOS
+
+
+def lower_approval_pending(request_id, position):
+    """
+        Whether an approval below `position` on the request is still pending. It is an approver's turn once none is:
+        the approver inbox lists the requests where this is false and a status update is refused while it is true.
+    """
+    lower_approval = aliased(RequestApproval)
+
+    return (
+        select(lower_approval.id)
+        .filter(
+            lower_approval.request_id == request_id,
+            lower_approval.position < position,
+            lower_approval.status == RequestStatusEnum.PENDING.value
+        )
+        .exists()
+    )
+
+
+def embedded_users_version(user_ids):
+    """
+        Scalar subqueries stamping what `ShowUser` embeds for the users `user_ids` selects: the users themselves,
+        their memberships and the memberships' roles
+    """
+    memberships = (OrganizationUser.user_id.in_(user_ids), OrganizationUser.is_deleted == False)
+
+    return (
+        select(func.max(User.last_updated)).filter(User.id.in_(user_ids)).scalar_subquery(),
+        select(func.count(OrganizationUser.id)).filter(*memberships).scalar_subquery(),
+        select(func.max(OrganizationUser.updated_at)).filter(*memberships).scalar_subquery(),
+        select(func.max(Role.last_updated))
+            .join(OrganizationUser, OrganizationUser.role_id == Role.id)
+            .filter(*memberships)
+            .scalar_subquery(),
+    )
+
+
+def show_request_load_options(fieldset: Fieldset = None):
+    """
+        Eager-load plan covering everything `ShowRequest` reads, needed because an `AsyncSession` can't lazy-load.
+        Many-to-one hops are joined into the statement that loads their parent and collections are selectin-loaded,
+        so a page costs four statements whatever its size.
+
+        With a `fieldset` only its columns and embedded relationships are loaded.
+    """
+    user_orgs = selectinload(User.user_orgs).joinedload(OrganizationUser.role)
+    embeds = {
+        "requester": joinedload(RequestModel.requester, innerjoin=True).options(user_orgs),
+        "request_approvals": selectinload(RequestModel.request_approvals)
+            .joinedload(RequestApproval.approver, innerjoin=True).options(user_orgs),
+    }
+
+    if fieldset is None:
+        return list(embeds.values())
+
+    return [
+        # the keyset sort columns are needed for `next_cursor`, `requester_id` for the requester join
+        fieldset.load_only(RequestModel, required=("date_created", "requester_id")),
+        *[embeds[name] for name in fieldset.embeds],
+    ]
+
 
 class RequestService(Service):
+    sort_columns = (RequestModel.date_created, RequestModel.id)
+
     def __init__(self) -> None:
         super().__init__()
     
@@ -22,59 +139,250 @@ class RequestService(Service):
         pass
 
     @classmethod
-    async def create(cls, payload: req_schemas.CreateRequest, db: Session) -> req_schemas.ShowRequest:
-        """
-            Create a request
-        """
-        created_request = RequestModel(
-            organization_id=payload.organization_id,
-            state=payload.state,
-            city=payload.city,
-            country=payload.country,
-            start=payload.start,
-            end=payload.end,
-            purpose=payload.purpose,
-            hotel=payload.hotel,
-            room=payload.room,
-            rate=payload.rate,
-            meal=payload.meal,
-            transport=payload.transport,
-            other_requests=payload.other_requests,
-            requester_id=payload.requester_id,
-            rejection_reason=payload.rejection_reason,
-            status=payload.status.value  
-        )
+    async def create(
+        cls,
+        payload: req_schemas.CreateRequest,
+        db: Session,
+        on_overlap: req_schemas.OverlapPolicyEnum = req_schemas.OverlapPolicyEnum.FLAG
+    ) -> req_schemas.CreatedRequest:
+        """
+            Create a request. A trip overlapping another pending or approved trip of the same requester
+            is rejected or created with the conflicting ids in `overlapping_request_ids`, depending on `on_overlap`.
+            Creates for the same requester are serialized, so two overlapping trips can't both pass a `reject` check.
+        """
+        cls.lock_requesters({payload.requester_id}, db=db)
+        overlapping_request_ids, = cls.find_overlapping_trips(payloads=[payload], db=db)
+
+        if overlapping_request_ids and on_overlap == req_schemas.OverlapPolicyEnum.REJECT:
+            db.rollback()
+            raise OverlappingTripException()
+
+        created_request, = cls.insert_requests(payloads=[payload], db=db)
+        event = request_created_event(created_request)
 
-        db.add(created_request)
         db.commit()
 
-        required_group_approvers = (
-                db.query(GroupApprover)
-                .join(GroupMember, GroupMember.member_id == created_request.requester_id)
-                .filter(GroupApprover.group_id == GroupMember.group_id)
-                .all()
+        event_hub.publish(payload.organization_id, EventTypeEnum.REQUEST_CREATED, event)
+        created_request.overlapping_request_ids = overlapping_request_ids
+
+        return created_request
+
+    @classmethod
+    async def create_many(
+        cls,
+        organization_id: int,
+        payloads: list[req_schemas.CreateRequest],
+        db: Session,
+        on_overlap: req_schemas.OverlapPolicyEnum = req_schemas.OverlapPolicyEnum.FLAG
+    ) -> dict:
+        """
+            Creates requests for an organization in a single transaction.
+            Items for another organization or with a requester who isn't a member of the organization are reported
+            as failed and skipped; the rest are created together.
+
+            Trips overlapping an existing trip or an earlier item of the same requester are flagged in
+            `overlapping_request_ids`, or reported as failed when `on_overlap` is `reject`. The requesters are locked
+            for the whole transaction, see `lock_requesters`.
+        """
+        requester_ids = {payload.requester_id for payload in payloads}
+        member_ids = set(
+            db.scalars(
+                select(OrganizationUser.user_id)
+                .filter(OrganizationUser.organization_id == organization_id, OrganizationUser.user_id.in_(requester_ids))
+            ).all()
         )
 
-        for group_approver in required_group_approvers:
-            # create request approval entries
-                request_approval = RequestApproval(
-                    request_id=created_request.id,
-                    approver_id=group_approver.approver_id,
-                    position=group_approver.position,
-                    status=RequestStatusEnum.PENDING.value,
+        results: list[dict] = []
+        valid_payloads: list[req_schemas.CreateRequest] = []
+
+        for index, payload in enumerate(payloads):
+            error = None
+
+            if payload.organization_id != organization_id:
+                error = messages.BULK_ITEM_WRONG_ORGANIZATION
+            elif payload.requester_id not in member_ids:
+                error = messages.BULK_ITEM_REQUESTER_NOT_MEMBER
+
+            result = {"index": index, "id": None, "error": error, "overlapping_request_ids": []}
+            results.append(result)
+
+        checked_payloads = [payload for payload, result in zip(payloads, results) if not result["error"]]
+        cls.lock_requesters({payload.requester_id for payload in checked_payloads}, db=db)
+        existing_overlaps = iter(cls.find_overlapping_trips(payloads=checked_payloads, db=db))
+
+        # every item that blocks a calendar, per requester, activated once the item is accepted
+        batch_trips: dict[int, list[tuple]] = {}
+        for index, (payload, result) in enumerate(zip(payloads, results)):
+            if not result["error"] and RequestStatusEnum(payload.status).value in OVERLAP_STATUSES:
+                batch_trips.setdefault(payload.requester_id, []).append((payload.start, payload.end, index))
+        batch_trip_indexes = {
+            requester_id: TripIndex(trips, active=False) for requester_id, trips in batch_trips.items()
+        }
+        # the earlier items each item overlaps
+        batch_overlaps: list[tuple[dict, list[dict]]] = []
+
+        for index, (payload, result) in enumerate(zip(payloads, results)):
+            if result["error"]:
+                continue
+
+            result["overlapping_request_ids"] = next(existing_overlaps)
+            trip_index = batch_trip_indexes.get(payload.requester_id)
+            earlier_results = [
+                results[earlier_index] for earlier_index in trip_index.overlapping(payload.start, payload.end)
+            ] if trip_index else []
+
+            if (result["overlapping_request_ids"] or earlier_results) and on_overlap == req_schemas.OverlapPolicyEnum.REJECT:
+                result["error"] = messages.OVERLAPPING_TRIP
+                continue
+
+            valid_payloads.append(payload)
+            if earlier_results:
+                batch_overlaps.append((result, earlier_results))
+            if RequestStatusEnum(payload.status).value in OVERLAP_STATUSES:
+                trip_index.activate(index)
+
+        created_requests = cls.insert_requests(payloads=valid_payloads, db=db)
+        events = [request_created_event(created_request) for created_request in created_requests]
+        db.commit()
+
+        for event in events:
+            event_hub.publish(organization_id, EventTypeEnum.REQUEST_CREATED, event)
+
+        created = iter(events)
+        for result in results:
+            if not result["error"]:
+                result["id"] = next(created)["id"]
+
+        for result, earlier_results in batch_overlaps:
+            result["overlapping_request_ids"] += [earlier_result["id"] for earlier_result in earlier_results]
+
+        return {
+            "created": len(created_requests),
+            "failed": len(payloads) - len(created_requests),
+            "results": results,
+        }
+
+    @staticmethod
+    def lock_requesters(requester_ids: set[int], db: Session) -> None:
+        """
+            Locks the requesters' user rows until the transaction ends, so concurrent creates for the same requester
+            run their overlap check and insert one after the other. Rows are locked in id order to avoid deadlocks.
+        """
+        db.execute(select(User.id).filter(User.id.in_(requester_ids)).order_by(User.id).with_for_update())
+
+    @staticmethod
+    def find_overlapping_trips(payloads: list[req_schemas.CreateRequest], db: Session) -> list[list[int]]:
+        """
+            For each payload, the ids of its requester's pending or approved requests in the payload's organization
+            whose dates overlap it. The whole batch is one query, a range scan per requester on
+            `ix_requests_requester_start_end` bounded by that requester's earliest start and latest end, and each
+            payload is then matched against a `TripIndex` of its requester's trips.
+
+            Callers serialize creates per requester with `lock_requesters` first. The trips are read with a shared
+            lock, which also reads the latest committed rows instead of the transaction's snapshot, so a trip
+            committed by a create that held the lock before is seen.
+        """
+        checked_payloads = [
+            payload for payload in payloads if RequestStatusEnum(payload.status).value in OVERLAP_STATUSES
+        ]
+        if not checked_payloads:
+            return [[] for _ in payloads]
+
+        date_ranges: dict[tuple[int, int], tuple[date, date]] = {}
+        for payload in checked_payloads:
+            key = (payload.organization_id, payload.requester_id)
+            earliest_start, latest_end = date_ranges.get(key, (payload.start, payload.end))
+            date_ranges[key] = (min(earliest_start, payload.start), max(latest_end, payload.end))
+
+        trips_by_requester: dict[tuple[int, int], list[tuple]] = {}
+        for id, organization_id, requester_id, start, end in db.execute(
+            select(RequestModel.id, RequestModel.organization_id, RequestModel.requester_id, RequestModel.start, RequestModel.end)
+            .filter(
+                or_(*[
+                    and_(
+                        RequestModel.requester_id == requester_id,
+                        RequestModel.organization_id == organization_id,
+                        RequestModel.start <= latest_end,
+                        RequestModel.end >= earliest_start,
                     )
-                
-                db.add(request_approval)
+                    for (organization_id, requester_id), (earliest_start, latest_end) in date_ranges.items()
+                ]),
+                RequestModel.status.in_(OVERLAP_STATUSES)
+            )
+            .with_for_update(read=True)
+        ):
+            trips_by_requester.setdefault((organization_id, requester_id), []).append((start, end, id))
 
-                try:
-                    db.commit()
-                except SQLALchemyExceptions.IntegrityError as ex:
-                # this would handle fail FK checks incase the approver_id passed doesn't exist as a user id in the DB
-                # and if an approval with the request_id and approver_id already exists in the DB.
-                    db.rollback()
-                    continue
+        trip_indexes = {key: TripIndex(trips) for key, trips in trips_by_requester.items()}
 
-        return created_request
+        overlaps = []
+        for payload in payloads:
+            trip_index = trip_indexes.get((payload.organization_id, payload.requester_id))
+            if trip_index is None or RequestStatusEnum(payload.status).value not in OVERLAP_STATUSES:
+                overlaps.append([])
+                continue
+
+            overlaps.append(trip_index.overlapping(payload.start, payload.end))
+
+        return overlaps
+
+    @classmethod
+    def insert_requests(cls, payloads: list[req_schemas.CreateRequest], db: Session) -> list[RequestModel]:
+        """
+            Inserts requests and their approval rows without committing.
+            Approvers come from the cached approver chains (a chain version lookup, plus one query for the requesters
+            not cached at that version) and all
+            approvals go out as multi-row `INSERT IGNORE`s, so duplicate (request, approver) pairs are skipped.
+        """
+        if not payloads:
+            return []
+
+        created_requests = [
+            RequestModel(
+                organization_id=payload.organization_id,
+                state=payload.state,
+                city=payload.city,
+                country=payload.country,
+                start=payload.start,
+                end=payload.end,
+                purpose=payload.purpose,
+                hotel=payload.hotel,
+                room=payload.room,
+                rate=payload.rate,
+                meal=payload.meal,
+                transport=payload.transport,
+                other_requests=payload.other_requests,
+                requester_id=payload.requester_id,
+                rejection_reason=payload.rejection_reason,
+                status=RequestStatusEnum(payload.status).value
+            )
+            for payload in payloads
+        ]
+
+        db.add_all(created_requests)
+        db.flush()
+
+        approver_chains = resolve_approver_chains(
+            {(created_request.organization_id, created_request.requester_id) for created_request in created_requests}, db=db)
+
+        request_approvals = [
+            {
+                "request_id": created_request.id,
+                "approver_id": approver_id,
+                "position": position,
+                "status": RequestStatusEnum.PENDING.value,
+            }
+            for created_request in created_requests
+            for approver_id, position in approver_chains[(created_request.organization_id, created_request.requester_id)]
+        ]
+
+        for chunk_start in range(0, len(request_approvals), BULK_INSERT_CHUNK_SIZE):
+            db.execute(
+                insert_ignore(RequestApproval, db),
+                request_approvals[chunk_start:chunk_start + BULK_INSERT_CHUNK_SIZE]
+            )
+
+        return created_requests
 
     @classmethod
     async def update(cls):
@@ -85,179 +393,381 @@ class RequestService(Service):
         pass
 
     @classmethod
-    async def get_request_in_organization(cls, id: int, org_id: int, db: Session) -> req_schemas.ShowRequest:
+    async def get_request_in_organization(cls, id: int, org_id: int, db: AsyncSession, fieldset: Fieldset = None) -> req_schemas.ShowRequest:
         """
             Get request in an organization by ID
         """
-        request = db.query(RequestModel).filter(and_(
-            RequestModel.id == id, RequestModel.organization_id == org_id, RequestModel.is_deleted == False)).first()
+        query = (
+            select(RequestModel)
+            .filter(and_(RequestModel.id == id, RequestModel.organization_id == org_id))
+            .options(*show_request_load_options(fieldset))
+        )
+        request = (await db.scalars(query)).first()
 
         if not request:
             raise RequestNotFoundException()
 
         return request
 
+    @classmethod
+    async def fetch_version(cls, id: int, org_id: int, db: AsyncSession) -> tuple:
+        """
+            What a request's representation depends on, for conditional GETs: its id and `last_updated`, the count and
+            latest update of its approvals, and its requester and approvers with their memberships and roles.
+            One primary key lookup with index-backed subqueries.
+        """
+        approver_ids = select(RequestApproval.approver_id).filter(RequestApproval.request_id == RequestModel.id)
+
+        version = (await db.execute(
+            select(
+                RequestModel.id,
+                RequestModel.last_updated,
+                select(func.count(RequestApproval.id)).filter(RequestApproval.request_id == RequestModel.id).scalar_subquery(),
+                select(func.max(RequestApproval.last_updated)).filter(RequestApproval.request_id == RequestModel.id).scalar_subquery(),
+                *embedded_users_version(select(User.id).filter(User.id == RequestModel.requester_id)),
+                *embedded_users_version(approver_ids),
+            )
+            .filter(RequestModel.id == id, RequestModel.organization_id == org_id)
+        )).first()
+
+        if not version:
+            raise RequestNotFoundException()
+
+        return tuple(version)
+
     @classmethod
     async def get(cls, id: int, db: Session):
         """
             Get a request by ID
         """
-        request = db.query(RequestModel).filter(
-            and_(RequestModel.id == id, RequestModel.is_deleted == False)).first()
+        request = db.query(RequestModel).filter(RequestModel.id == id).first()
 
         if not request:
             raise RequestNotFoundException()
 
         return request
 
+    @staticmethod
+    def filter_requests(query, org_id: int, requester: int = None, status: RequestStatusEnum = None, approver: int = None):
+        """
+            Applies the `GET /requests` filters to a select on `requests`
+        """
+        query = query.filter(RequestModel.organization_id == org_id)
+
+        if approver:
+            query = query.filter(RequestModel.id.in_(
+                select(RequestApproval.request_id).filter(RequestApproval.approver_id == approver)
+            ))
+
+        if requester:
+            query = query.filter(RequestModel.requester_id == requester)
+
+        if status:
+            query = query.filter(RequestModel.status == status.value)
+
+        return query
+
     @classmethod
     async def fetch_all(
         cls,
         org_id: int,
-        db: Session,
+        db: AsyncSession,
         requester: int = None,
         status: RequestStatusEnum = None,
         approver: int = None,
         size: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: str = None,
+        with_total: paginator.TotalEnum = paginator.TotalEnum.NONE,
+        fieldset: Fieldset = None
     ) -> tuple:
         """
-            Returns the requests objects matching the filters and the total number of requests for the organization with `org_id` as (requests, total)
+            Returns the requests objects matching the filters as (requests, total, has_more).
+            `total` is only counted when `with_total` asks for it, `has_more` comes from fetching one row past the page.
+            When `cursor` is given the page starts after it instead of at `offset`.
         """
 
-        base_query = db.query(RequestModel).filter(
-            and_(RequestModel.organization_id == org_id, RequestModel.is_deleted == False))
+        base_query = cls.filter_requests(
+            select(RequestModel), org_id=org_id, requester=requester, status=status, approver=approver)
 
-        if approver:
-            # not working correctly, pulling requests for other approvers
-            base_query = (
-                base_query.join(
-                    GroupMember, GroupMember.member_id == RequestModel.requester_id)
-                .join(GroupApprover, GroupApprover.group_id == GroupMember.group_id)
-                .filter(GroupApprover.approver_id == approver)
+        total = await paginator.resolve_total_async(
+            with_total,
+            ("requests", org_id, requester, approver, status),
+            lambda: db.scalar(select(func.count()).select_from(base_query.subquery()))
+        )
+        requests, has_more = paginator.split_page((await db.scalars(
+            paginator.order_by_keyset(base_query, cls.sort_columns, cursor=cursor)
+            .options(*show_request_load_options(fieldset))
+            .limit(size + 1)
+            .offset(offset)
+        )).all(), size)
+
+        return requests, total, has_more
+
+    @classmethod
+    async def stream_export(
+        cls,
+        org_id: int,
+        db: AsyncSession,
+        requester: int = None,
+        status: RequestStatusEnum = None,
+        approver: int = None,
+        created_from: date = None,
+        created_to: date = None
+    ) -> AsyncIterator:
+        """
+            Yields the matching requests' `EXPORT_COLUMNS` as mappings, oldest first.
+            Rows come off a server-side cursor `EXPORT_BATCH_SIZE` at a time, so memory stays flat however many match.
+        """
+        query = cls.filter_requests(
+            select(*[getattr(RequestModel, name) for name in EXPORT_COLUMNS]),
+            org_id=org_id, requester=requester, status=status, approver=approver
+        )
+
+        if created_from:
+            query = query.filter(RequestModel.date_created >= created_from)
+
+        if created_to:
+            query = query.filter(RequestModel.date_created < created_to + timedelta(days=1))
+
+        result = await db.stream(
+            query.order_by(*cls.sort_columns).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+
+        async for row in result.mappings():
+            yield row
+
+    @classmethod
+    async def search(cls, org_id: int, q: str, db: AsyncSession, size: int = 20, cursor: str = None) -> tuple:
+        """
+            Ranked full-text search over the organization's requests, best match first, as (requests, has_more, next_cursor).
+            Matches purpose, hotel, location and requester name.
+        """
+        if not q.split():
+            return [], False, None
+
+        base_query, score = apply_search(
+            select(RequestModel).filter(RequestModel.organization_id == org_id), q, db.get_bind().dialect.name)
+        sort_columns = (score, RequestModel.id)
+
+        rows, has_more = paginator.split_page((await db.execute(
+            paginator.order_by_keyset(base_query.add_columns(score), sort_columns, cursor=cursor)
+            .options(*show_request_load_options())
+            .limit(size + 1)
+        )).all(), size)
+
+        next_cursor = paginator.encode_cursor([rows[-1][1], rows[-1][0].id]) if has_more else None
+
+        return [request for request, _ in rows], has_more, next_cursor
+
+    @classmethod
+    async def fetch_travelling(cls, org_id: int, window_start: date, window_end: date, db: AsyncSession, city: str = None) -> list[dict]:
+        """
+            Approved trips overlapping `window_start`..`window_end`, grouped by city and by the requester's
+            department (group) in the organization. A requester in several groups is listed under each of them.
+        """
+        candidates = (
+            select(RequestTravelWeek.request_id)
+            .filter(
+                RequestTravelWeek.organization_id == org_id,
+                RequestTravelWeek.week_start.between(week_start(window_start), week_start(window_end))
             )
+        )
 
-        if requester:
-            base_query = base_query.filter(RequestModel.requester_id == requester)
+        departments = (
+            select(GroupMember.member_id, Group.id.label("group_id"), Group.name.label("group_name"))
+            .join(Group, Group.id == GroupMember.group_id)
+            .filter(Group.organization_id == org_id)
+            .subquery()
+        )
 
-        if status:
-            base_query = base_query.filter(RequestModel.status == status.value)
+        query = (
+            select(
+                RequestModel.id, RequestModel.requester_id, RequestModel.country, RequestModel.state, RequestModel.city,
+                RequestModel.start, RequestModel.end, User.first_name, User.last_name,
+                departments.c.group_id, departments.c.group_name,
+            )
+            .join(User, User.id == RequestModel.requester_id)
+            .outerjoin(departments, departments.c.member_id == RequestModel.requester_id)
+            .filter(
+                RequestModel.id.in_(candidates),
+                RequestModel.organization_id == org_id,
+                RequestModel.status == RequestStatusEnum.APPROVED.value,
+                RequestModel.start <= window_end,
+                RequestModel.end >= window_start,
+            )
+            .order_by(RequestModel.country, RequestModel.state, RequestModel.city, departments.c.group_name, RequestModel.start)
+        )
 
-        print(base_query)
+        if city:
+            query = query.filter(RequestModel.city == city)
+
+        grouped = {}
+        for row in (await db.execute(query)).mappings():
+            key = (row["country"], row["state"], row["city"], row["group_id"])
+            if key not in grouped:
+                grouped[key] = {
+                    "country": row["country"],
+                    "state": row["state"],
+                    "city": row["city"],
+                    "department": {"id": row["group_id"], "name": row["group_name"]} if row["group_id"] else None,
+                    "trips": [],
+                }
+
+            grouped[key]["trips"].append({
+                "request_id": row["id"],
+                "requester_id": row["requester_id"],
+                "requester_name": f"{row['first_name']} {row['last_name']}",
+                "start": row["start"],
+                "end": row["end"],
+            })
+
+        return list(grouped.values())
 
-        total = base_query.count()
-        requests = base_query.order_by(RequestModel.date_created.desc()).limit(
-            limit=size).offset(offset=offset).all()
+    @classmethod
+    async def fetch_approver_inbox(
+        cls,
+        approver_id: int,
+        org_id: int,
+        db: AsyncSession,
+        size: int = 20,
+        offset: int = 0,
+        cursor: str = None
+    ) -> tuple:
+        """
+            Returns the pending requests waiting on `approver_id`'s decision, oldest first, as (requests, counts, has_more).
+            It is the approver's turn once no approval at a lower position on the same request is still pending.
+            `counts` maps each approval status to the number of the approver's approvals in the organization.
+        """
+        base_query = (
+            select(RequestModel)
+            .join(RequestApproval, RequestApproval.request_id == RequestModel.id)
+            .filter(
+                RequestApproval.approver_id == approver_id,
+                RequestApproval.status == RequestStatusEnum.PENDING.value,
+                ~lower_approval_pending(RequestApproval.request_id, RequestApproval.position),
+                RequestModel.organization_id == org_id,
+                RequestModel.status == RequestStatusEnum.PENDING.value
+            )
+        )
 
-        return requests, total
+        requests, has_more = paginator.split_page((await db.scalars(
+            paginator.order_by_keyset(base_query, cls.sort_columns, cursor=cursor, descending=False)
+            .options(*show_request_load_options())
+            .limit(size + 1)
+            .offset(offset)
+        )).all(), size)
+
+        counts = dict((await db.execute(
+            select(RequestApproval.status, func.count())
+            .join(RequestModel, RequestModel.id == RequestApproval.request_id)
+            .filter(RequestApproval.approver_id == approver_id, RequestModel.organization_id == org_id)
+            .group_by(RequestApproval.status)
+        )).all())
+
+        return requests, counts, has_more
 
     @classmethod
     async def update_request_in_organization(cls, id: int, payload: req_schemas.UpdateRequest, updater: int, db: Session):
         """
             Update a request in an organization.
         """
-        request = await cls.get_request_in_organization(id=id, org_id=payload.organization_id, db=db)
-        request_approval_service = RequestApprovalService(request_id=id)
-        request_approvals = request_approval_service.fetch_all(
-            approver_id=updater, db=db)
+        approval_event = None
+
+        try:
+            # the row locks serialize concurrent transitions on this request until the commit below
+            request = db.query(RequestModel).filter(and_(
+                RequestModel.id == id, RequestModel.organization_id == payload.organization_id)) \
+                .with_for_update().populate_existing().first()
+
+            if not request:
+                raise RequestNotFoundException()
 
-        if payload.status:
-            updater_request_approval = [
-                approval for approval in request_approvals if approval.approver_id == updater]
-            
-            if len(updater_request_approval) == 0:
-                raise NotAllowedToUpdateRequestStatusException()
+            if payload.status:
+                request_approval_service = RequestApprovalService(request_id=id)
+                request_approvals = request_approval_service.lock_all(db=db)
 
-            updater_request_approval = updater_request_approval[0]
+                updater_request_approval = [
+                    approval for approval in request_approvals if approval.approver_id == updater]
 
-            """
-                If the lo position hasn't set approval status, the hi position shouldn't be able to
-            """
-            lower_approval = None
+                if len(updater_request_approval) == 0:
+                    raise NotAllowedToUpdateRequestStatusException()
 
-            for approval in request_approvals:
-                is_lower_approver = approval.position == updater_request_approval.position - 1
-                if is_lower_approver:
-                    lower_approval = approval
+                updater_request_approval = updater_request_approval[0]
 
-            """
-                Lowest approver must approve before any higher approver on the hierarchy
-            """
-            if lower_approval:
-                lower_approver_has_not_approved = lower_approval.status == RequestStatusEnum.PENDING.value
+                """
+                    Every lower approver must decide before any higher approver on the hierarchy
+                """
+                lower_approver_has_not_approved = db.scalar(
+                    select(lower_approval_pending(request.id, updater_request_approval.position)))
 
                 if lower_approver_has_not_approved:
                     raise LowerApproverHasNotApprovedException()
 
-            """
-                If updater has the highest position in `updated_request_approvals`, 
-                set request status to approver status.
-            """
-
-            # update request approval
-            request_approval_service.update(
-                id=updater_request_approval.id,
-                payload=req_schemas.UpdateRequestApproval(
-                    **{"status": payload.status}),
-                db=db
-            )
+                updater_request_approval.status = payload.status.value
+                updater_request_approval.last_updated = datetime.utcnow()
 
-            # Using the DB as the single source of truth here instead of updating the `request_approvals` in memory
-            updated_request_approvals = request_approval_service.fetch_all(
-                approver_id=updater, db=db)
-
-            """
-                Has the highest guy approved?
-            """
-            max_position = max(
-                [updated_request_approval.position for updated_request_approval in updated_request_approvals])
-            highest_position_approver = (
-                db.query(RequestApproval)
-                .filter(
-                    RequestApproval.request_id == request.id, RequestApproval.position == max_position
-                ).first()
-            )
+                """
+                    The request takes the status of its highest position approver
+                """
+                highest_position_approval = max(request_approvals, key=lambda approval: approval.position)
+                request.status = highest_position_approval.status
 
-            if highest_position_approver:
-                request.status = highest_position_approver.status
+                approval_event = {
+                    "request_id": request.id,
+                    "approver_id": updater,
+                    "position": updater_request_approval.position,
+                    "status": updater_request_approval.status,
+                    "request_status": request.status,
+                }
 
-        if payload.state:
-            request.state = payload.state
+            if payload.state:
+                request.state = payload.state
 
-        if payload.city:
-            request.city = payload.city
+            if payload.city:
+                request.city = payload.city
 
-        if payload.hotel:
-            request.hotel = payload.hotel
+            if payload.hotel:
+                request.hotel = payload.hotel
 
-        if payload.meal:
-            request.meal = payload.meal
-        
-        if payload.rate:
-            request.rate = payload.rate
-        
-        if payload.room:
-            request.room = payload.room
+            if payload.meal:
+                request.meal = payload.meal
 
-        if payload.purpose:
-            request.purpose = payload.purpose
+            if payload.rate:
+                request.rate = payload.rate
 
-        if payload.start:
-            request.start = payload.start
+            if payload.room:
+                request.room = payload.room
 
-        if payload.end:
-            request.end = payload.end
-        
-        if payload.transport:
-            request.transport = payload.transport
+            if payload.purpose:
+                request.purpose = payload.purpose
 
-        if payload.other_requests:
-            request.other_requests = payload.other_requests
-        
-        request.last_updated = datetime.now()
+            if payload.start:
+                request.start = payload.start
 
-        db.commit()
-        db.refresh(request)
+            if payload.end:
+                request.end = payload.end
+
+            if payload.transport:
+                request.transport = payload.transport
+
+            if payload.other_requests:
+                request.other_requests = payload.other_requests
+
+            request.last_updated = datetime.utcnow()
+
+            db.commit()
+            db.refresh(request)
+        except SQLALchemyExceptions.OperationalError as ex:
+            db.rollback()
+            if not is_lock_conflict(ex):
+                raise
+
+            # lock wait timeout or deadlock, on a lock or at commit: another approver is mid-transition on this request
+            raise ApprovalConflictException()
+
+        if approval_event:
+            event_hub.publish(request.organization_id, EventTypeEnum.APPROVAL_CHANGED, approval_event)
 
         return request
 
@@ -284,11 +794,26 @@ class RequestApprovalService(Service):
             .all()
         )
 
+    def lock_all(self, db: Session):
+        """
+            Every approval on the request ordered by position, locked with `SELECT ... FOR UPDATE` until the transaction ends
+            and refreshed from the locked rows
+        """
+        return (
+            db.query(RequestApproval)
+            .filter(RequestApproval.request_id == self.request_id)
+            .order_by(RequestApproval.position)
+            .with_for_update()
+            # rows already in the identity map would otherwise keep the values read before the lock
+            .populate_existing()
+            .all()
+        )
+
     def update(self, id: int, payload: req_schemas.UpdateRequestApproval, db: Session):
         request_approval = self.fetch(id=id, db=db)
 
         request_approval.status = payload.status.value
-        request_approval.last_updated = datetime.now()
+        request_approval.last_updated = datetime.utcnow()
 
         db.commit()
 
@@ -0,0 +1,116 @@
+"""
+    Interval lookups for trips.
+
+    `start`/`end` overlap can't be answered by a B-tree range scan on either column alone, so every request is
+    bucketed into the calendar weeks its trip touches (`RequestTravelWeek`, refreshed on flush). A window then
+    reads only the buckets it covers and the exact overlap is checked on that short list of candidates.
+
+    A requester's own trips, once loaded, are matched in memory with a `TripIndex`.
+"""
+from bisect import bisect_right
+from datetime import date, timedelta
+from itertools import chain
+from sqlalchemy import delete, event, inspect, insert
+from sqlalchemy.orm import Session
+from api.v1.requests.models import Request as RequestModel, RequestTravelWeek
+
+BUCKETED_COLUMNS = ("organization_id", "start", "end")
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def week_starts(start: date, end: date) -> list[date]:
+    """
+        Mondays of every week from `start` to `end`, both included
+    """
+    first, last = week_start(start), week_start(end)
+
+    return [first + timedelta(weeks=week) for week in range((last - first).days // 7 + 1)]
+
+
+class TripIndex:
+    """
+        Trips as `(start, end, key)`, answering which of them overlap a date range in O(log n) plus O(log n) per
+        trip reported: trips sorted by start sit under a tree of their latest `end`, so only subtrees holding an
+        overlapping trip are visited.
+
+        Trips can be added inactive and activated later, e.g. items of a batch once they are accepted.
+    """
+    def __init__(self, trips: list[tuple[date, date, int]], active: bool = True) -> None:
+        trips = sorted(trips, key=lambda trip: trip[0])
+        self._starts = [start for start, _, _ in trips]
+        self._ends = [end for _, end, _ in trips]
+        self._keys = [key for _, _, key in trips]
+        self._positions = {key: position for position, key in enumerate(self._keys)}
+
+        self._leaves = 1
+        while self._leaves < len(trips):
+            self._leaves *= 2
+
+        self._latest_ends = [date.min] * (2 * self._leaves)
+        if active:
+            self._latest_ends[self._leaves:self._leaves + len(trips)] = self._ends
+            for node in range(self._leaves - 1, 0, -1):
+                self._latest_ends[node] = max(self._latest_ends[2 * node], self._latest_ends[2 * node + 1])
+
+    def activate(self, key: int) -> None:
+        node = self._leaves + self._positions[key]
+        self._latest_ends[node] = self._ends[node - self._leaves]
+
+        node //= 2
+        while node:
+            self._latest_ends[node] = max(self._latest_ends[2 * node], self._latest_ends[2 * node + 1])
+            node //= 2
+
+    def overlapping(self, start: date, end: date) -> list[int]:
+        """
+            Keys of the active trips overlapping `start` to `end`, both included, by trip start
+        """
+        # only trips starting by `end` can overlap, and of those the ones ending on or after `start`
+        starting_by_end = bisect_right(self._starts, end)
+        keys = []
+        nodes = [(1, 0, self._leaves)] if starting_by_end else []
+
+        while nodes:
+            node, first, last = nodes.pop()
+            if first >= starting_by_end or self._latest_ends[node] < start:
+                continue
+
+            if node >= self._leaves:
+                keys.append(self._keys[first])
+                continue
+
+            middle = (first + last) // 2
+            # right first, so the stack pops the left half first and keys come out by start
+            nodes.append((2 * node + 1, middle, last))
+            nodes.append((2 * node, first, middle))
+
+        return keys
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_travel_weeks(session, flush_context):
+    moved_requests = [
+        request for request in chain(session.new, session.dirty)
+        if isinstance(request, RequestModel) and (
+            request in session.new
+            or any(inspect(request).attrs[name].history.has_changes() for name in BUCKETED_COLUMNS)
+        )
+    ]
+
+    if not moved_requests:
+        return
+
+    session.execute(
+        delete(RequestTravelWeek).where(RequestTravelWeek.request_id.in_([request.id for request in moved_requests]))
+    )
+
+    weeks = [
+        {"organization_id": request.organization_id, "week_start": week, "request_id": request.id}
+        for request in moved_requests
+        for week in week_starts(request.start, request.end)
+    ]
+    if weeks:
+        session.execute(insert(RequestTravelWeek), weeks)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, BIGINT, Index
+from datetime import datetime
+from api.db.database import Base
+
+
+class Tombstone(Base):
+    """
+        Records a hard-deleted row so delta sync clients can drop it from their cache
+    """
+    __tablename__ = "sync_tombstones"
+    __table_args__ = (
+        # an organization's deletions in sync order
+        Index('ix_sync_tombstones_org_deleted', 'organization_id', 'deleted_at', 'id'),
+    )
+    id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
+    organization_id = Column(BIGINT, nullable=False)
+    entity = Column(String(255), nullable=False)
+    entity_id = Column(BIGINT, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.db.database import get_async_db
+from api.core.dependencies.user import is_org_member
+from api.v1.user import schemas as user_schema
+from api.v1.sync import schemas as sync_schemas
+from api.v1.sync.services import SyncService
+
+app = APIRouter(tags=["Sync"])
+
+
+@app.get("/sync", status_code=status.HTTP_200_OK, response_model=sync_schemas.SyncResponse)
+async def sync(
+    organization_id: int,
+    since: str = None,
+    user: user_schema.ShowUser = Depends(is_org_member),
+    # the token is a position in commit order as the primary sees it, a lagging replica could let rows slip behind it
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+        Changes to an organization's requests, request approvals, comments and closeds since the `since` token,
+        with `tombstones` for deleted items. Leave out `since` for a first full sync.
+
+        Keep calling with `since=next_token` while `has_more` is true, then store `next_token` for the next sync.
+        A row can show up again in a later sync, clients should upsert by `id`.
+        Changes are held back for `SYNC_SETTLE_SECONDS` after they are written, so slow transactions can commit first.
+    """
+    return await SyncService.fetch_changes(org_id=organization_id, db=db, since=since)
@@ -0,0 +1,64 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+from enum import Enum
+from api.v1.requests.schemas import RequestBase
+from api.v1.requests.models import RequestStatusEnum
+from api.v1.comments.schemas import CommentBase
+from api.v1.closed.schemas import ShowClosed
+
+
+class SyncEntityEnum(str, Enum):
+    REQUEST = "request"
+    REQUEST_APPROVAL = "request_approval"
+    COMMENT = "comment"
+    CLOSED = "closed"
+
+
+class SyncRequest(RequestBase):
+    id: int
+    date_created: datetime
+    last_updated: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SyncRequestApproval(BaseModel):
+    id: int
+    request_id: int
+    approver_id: int
+    position: int = 1
+    status: RequestStatusEnum
+    date_created: datetime
+    last_updated: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SyncComment(CommentBase):
+    id: int
+    author: int
+    is_edited: Optional[bool] = False
+    date_created: datetime
+    last_updated: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SyncTombstone(BaseModel):
+    entity: SyncEntityEnum
+    id: int
+    deleted_at: datetime
+
+
+class SyncResponse(BaseModel):
+    requests: list[SyncRequest]
+    request_approvals: list[SyncRequestApproval]
+    comments: list[SyncComment]
+    closeds: list[ShowClosed]
+    tombstones: list[SyncTombstone]
+    next_token: str
+    has_more: bool
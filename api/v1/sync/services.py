@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+from decouple import config
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.utils import paginator
+from api.v1.closed.models import Closed
+from api.v1.comments.models import Comment
+from api.v1.requests.models import Request as RequestModel, RequestApproval
+from api.v1.sync.models import Tombstone
+from api.v1.sync.schemas import SyncEntityEnum
+from api.v1.sync import tombstones  # noqa: F401, records deletes for the feed below
+
+SYNC_PAGE_SIZE = 500
+# rows stamped within this many seconds may belong to transactions that haven't committed yet, they wait for the next sync.
+# Keep it above the longest write transaction (e.g. a full bulk create), a row committed later than that is never synced.
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=30, cast=int)
+
+
+class SyncService:
+    # every feed is read in (change time, id) order, the sync token is the position reached in each of them
+    feeds = {
+        "requests": (RequestModel.last_updated, RequestModel.id),
+        "request_approvals": (RequestApproval.last_updated, RequestApproval.id),
+        "comments": (Comment.last_updated, Comment.id),
+        "closeds": (Closed.last_updated, Closed.id),
+        "tombstones": (Tombstone.deleted_at, Tombstone.id),
+    }
+
+    @classmethod
+    def decode_token(cls, token: str = None) -> dict:
+        """
+            Positions reached in each feed, `None` for a feed that hasn't been read yet
+        """
+        if not token:
+            return {name: None for name in cls.feeds}
+
+        sort_columns = [column for columns in cls.feeds.values() for column in columns]
+        values = paginator.decode_cursor(token, sort_columns)
+
+        positions, index = {}, 0
+        for name, columns in cls.feeds.items():
+            position = values[index:index + len(columns)]
+            positions[name] = None if position[0] is None else position
+            index += len(columns)
+
+        return positions
+
+    @classmethod
+    def encode_token(cls, positions: dict) -> str:
+        return paginator.encode_cursor([
+            value
+            for name, columns in cls.feeds.items()
+            for value in (positions[name] or [None] * len(columns))
+        ])
+
+    @classmethod
+    def feed_queries(cls, org_id: int) -> dict:
+        return {
+            # soft-deleted requests are returned too and reported as tombstones
+            "requests": select(RequestModel)
+                .filter(RequestModel.organization_id == org_id)
+                .execution_options(include_deleted=True),
+            "request_approvals": select(RequestApproval)
+                .join(RequestModel, RequestModel.id == RequestApproval.request_id)
+                .filter(RequestModel.organization_id == org_id),
+            "comments": select(Comment).filter(Comment.organization_id == org_id),
+            "closeds": select(Closed).filter(Closed.organization_id == org_id),
+            "tombstones": select(Tombstone).filter(Tombstone.organization_id == org_id),
+        }
+
+    @classmethod
+    async def fetch_changes(cls, org_id: int, db: AsyncSession, since: str = None, size: int = SYNC_PAGE_SIZE) -> dict:
+        """
+            Requests, approvals, comments, closeds and deletions changed in an organization after the `since` token,
+            up to `size` of each, oldest change first. Without a token every row is returned, page by page.
+
+            Follow `next_token` while `has_more` is true; afterwards keep it for the next sync.
+
+            Rows are stamped before their transaction commits, so only rows older than `SYNC_SETTLE_SECONDS` are read:
+            a row committed after a newer one was handed out would otherwise fall behind the token and be missed.
+            The window has to exceed the slowest commit, and the feed has to be read from the primary, as a replica
+            can apply commits later than the rows already served.
+        """
+        positions = cls.decode_token(since)
+        settled = datetime.utcnow() - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+        changes, has_more = {}, False
+        for name, query in cls.feed_queries(org_id).items():
+            sort_columns = cls.feeds[name]
+            query = query.filter(sort_columns[0] <= settled)
+            if positions[name] is not None:
+                query = query.filter(paginator.keyset_filter(sort_columns, positions[name], descending=False))
+
+            rows, feed_has_more = paginator.split_page(
+                (await db.scalars(query.order_by(*sort_columns).limit(size + 1))).all(), size)
+
+            changes[name] = rows
+            has_more = has_more or feed_has_more
+            if rows:
+                positions[name] = [getattr(rows[-1], column.key) for column in sort_columns]
+
+        deleted_requests = [request for request in changes["requests"] if request.is_deleted]
+
+        return {
+            "requests": [request for request in changes["requests"] if not request.is_deleted],
+            "request_approvals": changes["request_approvals"],
+            "comments": changes["comments"],
+            "closeds": changes["closeds"],
+            "tombstones": [
+                {"entity": SyncEntityEnum.REQUEST, "id": request.id, "deleted_at": request.last_updated}
+                for request in deleted_requests
+            ] + [
+                {"entity": tombstone.entity, "id": tombstone.entity_id, "deleted_at": tombstone.deleted_at}
+                for tombstone in changes["tombstones"]
+            ],
+            "next_token": cls.encode_token(positions),
+            "has_more": has_more,
+        }
@@ -0,0 +1,24 @@
+"""
+    Comments and closeds are deleted for real, so each delete leaves a `Tombstone` in the same flush for
+    `GET /sync` to report. Soft-deleted rows are reported from their own `is_deleted` flag instead.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from api.v1.closed.models import Closed
+from api.v1.comments.models import Comment
+from api.v1.sync.models import Tombstone
+from api.v1.sync.schemas import SyncEntityEnum
+
+TOMBSTONED_MODELS = {
+    Comment: SyncEntityEnum.COMMENT,
+    Closed: SyncEntityEnum.CLOSED,
+}
+
+
+@event.listens_for(Session, "before_flush")
+def _record_tombstones(session, flush_context, instances):
+    session.add_all([
+        Tombstone(organization_id=instance.organization_id, entity=TOMBSTONED_MODELS[type(instance)].value, entity_id=instance.id)
+        for instance in session.deleted
+        if type(instance) in TOMBSTONED_MODELS
+    ])
@@ -1,10 +1,11 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, BIGINT
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, BIGINT
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
 from api.db.database import Base
+from api.db.soft_delete import SoftDeleteMixin
 
 
-class User(Base):
+class User(SoftDeleteMixin, Base):
     __tablename__ = "users"
     id = Column(BIGINT, primary_key=True, autoincrement=True, index=True)
     unique_id = Column(String(255), nullable=True)
@@ -12,9 +13,8 @@ class User(Base):
     last_name = Column(String(255), nullable=False)
     email = Column(String(500), index=True, nullable=False)
     password = Column(String(500), nullable=False)
-    date_created = Column(DateTime, default=datetime.now)
-    last_updated = Column(DateTime, default=datetime.now)
-    is_deleted = Column(Boolean, default=False)
+    date_created = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow)
 
     user_orgs = relationship(
         "OrganizationUser", 
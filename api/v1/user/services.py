@@ -48,8 +48,7 @@ class UserService(Service):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                                 detail=responses.ID_OR_UNIQUE_ID_REQUIRED)
 
-        user = db.query(UserModel).filter(UserModel.id == id).filter(
-            UserModel.is_deleted == False).first()
+        user = db.query(UserModel).filter(UserModel.id == id).first()
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail=responses.NOT_FOUND)
@@ -62,8 +61,7 @@ class UserService(Service):
 
     @staticmethod
     def fetch_by_email(email: str, db: Session) -> user_schema.User:
-        user = db.query(UserModel).filter(UserModel.email ==
-                                          email, UserModel.is_deleted == False).first()
+        user = db.query(UserModel).filter(UserModel.email == email).first()
 
         return user
 
@@ -2,7 +2,9 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.requests import Request
-from api.db.database import create_database
+from api.db.database import create_database, pin_to_primary
+from api.db.metrics import pool_metrics, current_request_stats
+from api.db.profiler import SQLProfilerMiddleware
 # from api.db.mongo import create_nosql_db
 from scripts.seed_roles import seed_roles
 from api.v1.auth.router import app as auth
@@ -16,6 +18,9 @@ from api.v1.closed.router import app as closed
 from api.v1.analytics.router import app as analytics
 # from api.v1.hotels.router import app as hotels
 from api.v1.files.router import app as files
+from api.v1.metrics.router import app as metrics
+from api.v1.sync.router import app as sync
+from api.v1.events.router import app as events
 
 app = FastAPI()
 
@@ -29,6 +34,43 @@ def startup():
     seed_roles()
 
 
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    """
+        Preserves read-your-writes when read replicas are configured
+    """
+    response = await call_next(request)
+
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        pin_to_primary(response)
+
+    return response
+
+
+@app.middleware("http")
+async def record_connection_hold_time(request: Request, call_next):
+    """
+        Attributes the time DB connections were held during the request to its route template
+    """
+    request_stats = {}
+    token = current_request_stats.set(request_stats)
+
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(token)
+
+    route = request.scope.get("route")
+    if "connection_hold_ms" in request_stats:
+        pool_metrics.observe_route_hold(
+            f"{request.method} {route.path if route else request.url.path}", request_stats["connection_hold_ms"])
+
+    return response
+
+
+app.add_middleware(SQLProfilerMiddleware)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origin_regex="^http(?:s)?://.*",
@@ -49,6 +91,9 @@ app.include_router(analytics, tags=["Analytics"], prefix="/v1")
 app.include_router(closed, tags=["Closeds"], prefix="/v1")
 # app.include_router(hotels, tags=["Hotels"], prefix="/v1")
 app.include_router(files, tags=["Files"], prefix="/v1")
+app.include_router(sync, tags=["Sync"], prefix="/v1")
+app.include_router(events, tags=["Events"], prefix="/v1")
+app.include_router(metrics, tags=["Metrics"], prefix="/internal")
 
 
 
@@ -0,0 +1,135 @@
+"""
+    Hammers one request with approvals from many approvers at once and checks the approval order held.
+
+    Seeds a request with `approvers` approvers at positions 1..N into the database at `BENCH_DATABASE_URL`
+    (use a scratch MySQL/Postgres database, SQLite ignores `FOR UPDATE`), then for every round resets the approvals
+    to pending and starts one thread per approver that keeps approving through `RequestService.update_request_in_organization`
+    until it succeeds. An approval committed before the one below it is a lost race.
+
+    Usage: BENCH_DATABASE_URL=mysql+pymysql://... python -m scripts.benchmarks.approval_race [approvers] [rounds]
+"""
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from decouple import config
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import Session
+
+from api.db.database import Base
+from api.v1.user.models import User
+from api.v1.requests.models import Request as RequestModel, RequestApproval, RequestStatusEnum
+from api.v1.requests.schemas import UpdateRequest
+from api.v1.requests.services import RequestService
+
+ORGANIZATION_ID = 1
+
+
+def seed(db: Session, approvers: int) -> int:
+    users = [
+        User(first_name="Bench", last_name=f"Approver {position}", email=f"approver{position}-{time.time_ns()}@example.com", password="-")
+        for position in range(approvers + 1)
+    ]
+    db.add_all(users)
+    db.flush()
+
+    request = RequestModel(
+        organization_id=ORGANIZATION_ID, requester_id=users[0].id, country="Nigeria", state="Lagos", city="VI",
+        start=date.today(), end=date.today() + timedelta(days=3), hotel="Bench Hotel", room="Standard",
+    )
+    db.add(request)
+    db.flush()
+
+    db.add_all([
+        RequestApproval(request_id=request.id, approver_id=user.id, position=position)
+        for position, user in enumerate(users[1:], start=1)
+    ])
+    db.commit()
+
+    return request.id
+
+
+def approve_until_done(engine, request_id: int, approver_id: int, position: int, outcomes: Counter, commits: list, lock: threading.Lock):
+    payload = UpdateRequest(organization_id=ORGANIZATION_ID, status=RequestStatusEnum.APPROVED)
+
+    def record_commit(session):
+        # recorded as soon as COMMIT returns, while the next approver is still taking its locks
+        with lock:
+            commits.append(position)
+
+    while True:
+        with Session(engine) as db:
+            event.listen(db, "after_commit", record_commit)
+            try:
+                asyncio.run(RequestService.update_request_in_organization(
+                    id=request_id, payload=payload, updater=approver_id, db=db))
+            except HTTPException as ex:
+                with lock:
+                    outcomes[ex.status_code] += 1
+                continue
+
+        with lock:
+            outcomes[200] += 1
+        return
+
+
+def run_round(engine, request_id: int, approvals: list) -> tuple:
+    with Session(engine) as db:
+        db.execute(
+            update(RequestApproval).where(RequestApproval.request_id == request_id)
+            .values(status=RequestStatusEnum.PENDING.value)
+        )
+        db.execute(
+            update(RequestModel).where(RequestModel.id == request_id).values(status=RequestStatusEnum.PENDING.value)
+        )
+        db.commit()
+
+    outcomes, commits, lock = Counter(), [], threading.Lock()
+    threads = [
+        threading.Thread(target=approve_until_done, args=(engine, request_id, approver_id, position, outcomes, commits, lock))
+        for approver_id, position in approvals
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    # with the row locks held every approval commits after the one below it
+    out_of_order = sum(1 for previous, current in zip(commits, commits[1:]) if current < previous)
+
+    return elapsed, outcomes, out_of_order
+
+
+def main(approvers: int, rounds: int):
+    engine = create_engine(config("BENCH_DATABASE_URL"), pool_size=approvers, max_overflow=approvers)
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as db:
+        request_id = seed(db, approvers)
+        approvals = [
+            (approval.approver_id, approval.position)
+            for approval in db.query(RequestApproval).filter(RequestApproval.request_id == request_id)
+        ]
+
+    totals, lost_races = Counter(), 0
+    for round_number in range(1, rounds + 1):
+        elapsed, outcomes, out_of_order = run_round(engine, request_id, approvals)
+        totals.update(outcomes)
+        lost_races += out_of_order
+        print(f"round {round_number}: {elapsed * 1000:.1f} ms, attempts={sum(outcomes.values())} out_of_order={out_of_order}")
+
+    print(f"outcomes by status code: {dict(totals)}; lost races: {lost_races}")
+
+
+if __name__ == "__main__":
+    approvers = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    main(approvers, rounds)
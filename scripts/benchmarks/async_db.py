@@ -0,0 +1,55 @@
+"""
+    Compares how many `GET /requests` list queries a single event loop (i.e. one uvicorn worker)
+    completes per second when the query runs on the blocking `Session` versus the `AsyncSession`.
+
+    Usage: python -m scripts.benchmarks.async_db <organization_id> [concurrency] [iterations]
+"""
+import asyncio
+import sys
+import time
+
+from sqlalchemy.sql import and_
+
+from api.db.database import SessionLocal, AsyncSessionLocal
+from api.v1.requests.models import Request as RequestModel
+from api.v1.requests.services import RequestService
+
+
+async def sync_list_requests(organization_id: int):
+    # the pre-async code path: a blocking query inside an `async def`
+    with SessionLocal() as db:
+        query = db.query(RequestModel).filter(
+            and_(RequestModel.organization_id == organization_id, RequestModel.is_deleted == False))
+        query.count()
+        query.order_by(RequestModel.date_created.desc()).limit(20).all()
+
+
+async def async_list_requests(organization_id: int):
+    async with AsyncSessionLocal() as db:
+        await RequestService.fetch_all(org_id=organization_id, db=db, size=20, offset=0)
+
+
+async def run(handler, organization_id: int, concurrency: int, iterations: int) -> float:
+    async def worker():
+        for _ in range(iterations):
+            await handler(organization_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    return (concurrency * iterations) / elapsed
+
+
+async def main(organization_id: int, concurrency: int, iterations: int):
+    for name, handler in [("sync Session", sync_list_requests), ("AsyncSession", async_list_requests)]:
+        throughput = await run(handler, organization_id, concurrency, iterations)
+        print(f"{name:<14} concurrency={concurrency} -> {throughput:.1f} requests/s")
+
+
+if __name__ == "__main__":
+    organization_id = int(sys.argv[1])
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    asyncio.run(main(organization_id, concurrency, iterations))
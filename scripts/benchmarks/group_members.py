@@ -0,0 +1,131 @@
+"""
+    Query count, payload size and latency of walking a large department's member listing.
+
+    Seeds a group of `members` members (default 5,000) with organization roles into the database at
+    `BENCH_DATABASE_URL` (use a scratch database, the tables are created if missing), then pages through it
+    the way `GET /groups/{id}/members` does, once with the former rows (the full `ShowGroupMember`, lazy loads)
+    and once with the compact `GroupMemberListItem` rows and their `selectinload` plan.
+
+    Usage: BENCH_DATABASE_URL=mysql+pymysql://... python -m scripts.benchmarks.group_members [members] [page_size]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from decouple import config
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from api.db.database import Base
+from api.utils import paginator
+from api.v1.user.models import User
+from api.v1.organization.models import Organization, OrganizationUser, Role
+from api.v1.groups.models import Group, GroupMember, GroupApprover
+from api.v1.groups import schemas as group_schemas
+from api.v1.groups.services import GroupMemberService, load_open_requests_counts
+
+BATCH_SIZE = 1000
+APPROVERS = 3
+
+
+def seed(db: Session, members: int) -> tuple[int, int]:
+    creator = User(first_name="Bench", last_name="Creator", email=f"creator-{time.time_ns()}@example.com", password="-")
+    db.add(creator)
+    db.flush()
+
+    organization = Organization(name="Bench Organization", created_by=creator.id)
+    db.add(organization)
+    db.flush()
+
+    role = Role(organization_id=organization.id, name="Regular", permissions={})
+    group = Group(organization_id=organization.id, name="Bench Department", created_by=creator.id)
+    db.add_all([role, group])
+    db.flush()
+
+    for batch_start in range(0, members, BATCH_SIZE):
+        users = [
+            User(first_name="Bench", last_name=f"Member {number}", email=f"member{number}-{time.time_ns()}@example.com", password="-")
+            for number in range(batch_start, min(batch_start + BATCH_SIZE, members))
+        ]
+        db.add_all(users)
+        db.flush()
+
+        db.add_all([OrganizationUser(organization_id=organization.id, user_id=user.id, role_id=role.id) for user in users])
+        db.add_all([GroupMember(group_id=group.id, member_id=user.id) for user in users])
+        if batch_start == 0:
+            db.add_all([
+                GroupApprover(group_id=group.id, approver_id=user.id, position=position)
+                for position, user in enumerate(users[:APPROVERS], start=1)
+            ])
+        db.commit()
+
+    return organization.id, group.id
+
+
+def former_page(service: GroupMemberService, size: int, cursor: str = None) -> list:
+    # the listing before explicit load plans: every row's user, organizations and roles are lazy loads
+    query = service.db.query(GroupMember).filter(GroupMember.group_id == service.group_id)
+    query.count()
+
+    return paginator.order_by_keyset(query, GroupMemberService.sort_columns, cursor=cursor, descending=False).limit(size).all()
+
+
+def walk(engine, organization_id: int, group_id: int, page_size: int, compact: bool) -> tuple[int, int, int, float]:
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record_statement)
+
+    pages, payload_bytes, cursor = 0, 0, None
+    started = time.perf_counter()
+
+    while True:
+        # a session per page, like a request
+        with Session(engine) as db:
+            service = GroupMemberService(group_id=group_id, organization_id=organization_id, db=db)
+
+            if compact:
+                members, _ = asyncio.run(service.get_group_members(size=page_size, cursor=cursor))
+                items = [group_schemas.GroupMemberListItem.model_validate(member).model_dump(mode="json") for member in members]
+            else:
+                members = former_page(service, page_size, cursor)
+                # preloaded so the count doesn't open a session on the application database
+                load_open_requests_counts([service.group], db=db)
+                items = [group_schemas.ShowGroupMember.model_validate(member).model_dump(mode="json") for member in members]
+
+        pages += 1
+        payload_bytes += len(json.dumps(items, default=str))
+
+        if len(members) < page_size:
+            break
+        cursor = paginator.encode_cursor([members[-1].id])
+
+    elapsed = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", record_statement)
+
+    return pages, len(statements), payload_bytes, elapsed
+
+
+def main(members: int, page_size: int):
+    engine = create_engine(config("BENCH_DATABASE_URL"))
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as db:
+        organization_id, group_id = seed(db, members)
+
+    for label, compact in (("full ShowGroupMember rows", False), ("compact GroupMemberListItem rows", True)):
+        pages, statements, payload_bytes, elapsed = walk(engine, organization_id, group_id, page_size, compact)
+        print(
+            f"{label}: {pages} pages, {statements} statements ({statements / pages:.1f}/page), "
+            f"{payload_bytes / 1024:.0f} KiB ({payload_bytes / members:.0f} B/member), {elapsed:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    main(members, page_size)
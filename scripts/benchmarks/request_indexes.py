@@ -0,0 +1,128 @@
+"""
+    Insert and list latency of the `requests` table at scale.
+
+    Seeds `rows` requests (default 1M) spread across organizations into the database at `BENCH_DATABASE_URL`
+    (use a scratch database, the tables are created if missing), then times the list queries served by
+    `RequestService.fetch_all` and `RequestService.search`. Run it once per index layout,
+    e.g. before and after `alembic upgrade 3f1c9a7d2b40`. Search is only seeded and timed when the schema has
+    `requests.search_document` (revision `e5b92f0a7c14` onwards).
+
+    Usage: BENCH_DATABASE_URL=mysql+pymysql://... python -m scripts.benchmarks.request_indexes [rows]
+"""
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from decouple import config
+from sqlalchemy import create_engine, insert, inspect, select, func
+from sqlalchemy.orm import Session
+
+from api.db.database import Base
+from api.v1.user.models import User
+from api.v1.organization import models as organization_models  # noqa: F401, maps `User.user_orgs`
+from api.v1.requests.models import Request as RequestModel, RequestStatusEnum
+from api.v1.requests.search import apply_search
+
+BATCH_SIZE = 10_000
+ORGANIZATIONS = 50
+STATUSES = [status.value for status in RequestStatusEnum]
+
+
+def has_search_document(engine) -> bool:
+    return "search_document" in {column["name"] for column in inspect(engine).get_columns("requests")}
+
+
+def seed(db: Session, rows: int, with_search_document: bool = True) -> list[float]:
+    requester = User(first_name="Bench", last_name="Requester", email="bench@example.com", password="-")
+    db.add(requester)
+    db.commit()
+
+    started_on = datetime(2020, 1, 1)
+    batch_latencies = []
+
+    for batch_start in range(0, rows, BATCH_SIZE):
+        batch = []
+        for offset in range(min(BATCH_SIZE, rows - batch_start)):
+            created = started_on + timedelta(minutes=batch_start + offset)
+            start = created.date() + timedelta(days=random.randint(1, 60))
+            hotel = f"Hotel {random.randint(1, 500)}"
+            state = random.choice(["Lagos", "Abuja", "Rivers", "Oyo"])
+            city = random.choice(["VI", "Ikeja", "Wuse", "Garki"])
+            row = {
+                "organization_id": random.randint(1, ORGANIZATIONS),
+                "requester_id": requester.id,
+                "country": "Nigeria",
+                "state": state,
+                "city": city,
+                "start": start,
+                "end": start + timedelta(days=random.randint(1, 14)),
+                "hotel": hotel,
+                "room": "Standard",
+                "rate": random.randint(10_000, 90_000),
+                "status": random.choice(STATUSES),
+                "date_created": created,
+                "last_updated": created,
+                "is_deleted": random.random() < 0.05,
+            }
+            if with_search_document:
+                # what the flush hook in `api.v1.requests.search` would store, core inserts bypass it
+                row["search_document"] = f"{hotel} {city} {state} Nigeria Bench Requester"
+            batch.append(row)
+
+        batch_started = time.perf_counter()
+        db.execute(insert(RequestModel), batch)
+        db.commit()
+        batch_latencies.append((time.perf_counter() - batch_started) * 1000 / len(batch))
+
+    return batch_latencies
+
+
+def time_query(db: Session, query, repeat: int = 50) -> tuple[float, float]:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.execute(query).all()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main(rows: int):
+    engine = create_engine(config("BENCH_DATABASE_URL"))
+    Base.metadata.create_all(bind=engine)
+    searchable = has_search_document(engine)
+
+    with Session(engine) as db:
+        existing = db.scalar(select(func.count(RequestModel.id)))
+        if existing < rows:
+            latencies = seed(db, rows - existing, with_search_document=searchable)
+            print(f"insert: {statistics.mean(latencies):.4f} ms/row (mean over {len(latencies)} batches of {BATCH_SIZE})")
+
+        organization_id = random.randint(1, ORGANIZATIONS)
+        live_rows = (
+            select(RequestModel)
+            .filter(RequestModel.organization_id == organization_id, RequestModel.is_deleted == False)
+        )
+        queries = {
+            "list (org, live, newest first)": live_rows.order_by(RequestModel.date_created.desc()).limit(20),
+            "list by status": live_rows.filter(RequestModel.status == RequestStatusEnum.PENDING.value)
+                .order_by(RequestModel.date_created.desc()).limit(20),
+            "deep page (offset 5000)": live_rows.order_by(RequestModel.date_created.desc()).limit(20).offset(5000),
+        }
+
+        if searchable:
+            search_query, score = apply_search(live_rows, "Hotel 42 Ikeja", engine.dialect.name)
+            queries["full-text search"] = search_query.add_columns(score).order_by(score.desc(), RequestModel.id.desc()).limit(20)
+        else:
+            print("full-text search: skipped, no requests.search_document at this revision")
+
+        for name, query in queries.items():
+            median, p95 = time_query(db, query)
+            print(f"{name:<32} median={median:.2f} ms p95={p95:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -1,19 +1,27 @@
 from fastapi.testclient import TestClient
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from sqlalchemy.orm import declarative_base
 
 from main import app
 from decouple import config
 import json
+from collections import OrderedDict
 from datetime import date
 
-from api.db.database import get_db
+from api.db.database import get_db, get_async_db, get_read_db, get_async_read_db, get_async_read_session_factory
 from api.db.database import Base
+from api.db.metrics import instrument_engine, pool_metrics
+from api.db.profiler import instrument_engine_for_profiling, profiler
+from api.v1.metrics import router as metrics_router
 
-from api.v1.organization.models import Role
+from api.v1.organization.models import Role, OrganizationUser
+from api.v1.requests.models import RequestApproval
+from api.v1.groups.approver_chains import approver_chain_cache
 
 
 DB_TYPE = config("DB_TYPE")
@@ -23,17 +31,30 @@ DB_PASSWORD = config("DB_PASSWORD")
 DB_HOST = config("DB_HOST")
 DB_PORT = config("DB_PORT")
 MYSQL_DRIVER = config("MYSQL_DRIVER")
+ASYNC_MYSQL_DRIVER = config("ASYNC_MYSQL_DRIVER", default="aiomysql")
 
 SQLALCHEMY_DATABASE_URL_TEST = f'{DB_TYPE}+{MYSQL_DRIVER}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}_test'
+SQLALCHEMY_ASYNC_DATABASE_URL_TEST = f'{DB_TYPE}+{ASYNC_MYSQL_DRIVER}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}_test'
 
 engine = create_engine(SQLALCHEMY_DATABASE_URL_TEST)
 
+# the TestClient may run each request on a fresh event loop, so async connections can't be pooled across requests
+async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL_TEST, poolclass=NullPool)
+
+# wired like the app's own engines, so pool metrics and the SQL profiler see the statements tests run
+for name, test_engine in (("test", engine), ("test_async", async_engine.sync_engine)):
+    instrument_engine(name, test_engine)
+    instrument_engine_for_profiling(test_engine)
+
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
 @pytest.fixture()
 def session():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # ids restart with the database, chains cached by an earlier test would match them
+    approver_chain_cache.clear()
     db = TestingSessionLocal()
     try:
         yield db
@@ -41,6 +62,63 @@ def session():
         db.close()
 
 
+@pytest.fixture()
+def statement_counter():
+    """
+        Collects the SQL statements both test engines run while the test is active
+    """
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for test_engine in (engine, async_engine.sync_engine):
+        event.listen(test_engine, "before_cursor_execute", record_statement)
+
+    yield statements
+
+    for test_engine in (engine, async_engine.sync_engine):
+        event.remove(test_engine, "before_cursor_execute", record_statement)
+
+
+@pytest.fixture()
+def route_hold_times(monkeypatch):
+    """
+        Collects the (route, connection hold ms) pairs the hold time middleware reports while the test is active
+    """
+    observed = []
+    observe_route_hold = pool_metrics.observe_route_hold
+
+    def record_route_hold(route, hold_ms):
+        observed.append((route, hold_ms))
+        observe_route_hold(route, hold_ms)
+
+    monkeypatch.setattr(pool_metrics, "observe_route_hold", record_route_hold)
+
+    return observed
+
+
+@pytest.fixture()
+def metrics_headers(monkeypatch):
+    """
+        Headers reaching the `/internal` endpoints, which stay disabled until a metrics token is configured
+    """
+    monkeypatch.setattr(metrics_router, "METRICS_TOKEN", "test-metrics-token")
+
+    return {"X-Metrics-Token": "test-metrics-token"}
+
+
+@pytest.fixture()
+def sql_profiler(monkeypatch):
+    """
+        Turns the SQL profiler on for the test, with no profiles stored by earlier ones
+    """
+    monkeypatch.setattr(profiler, "enabled", True)
+    monkeypatch.setattr(profiler, "profiles", OrderedDict())
+
+    return profiler
+
+
 @pytest.fixture()
 def client(session):
     def override_get_db():
@@ -48,7 +126,16 @@ def client(session):
             yield session
         finally:
             session.close()
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_session_factory] = lambda: TestingAsyncSessionLocal
     yield TestClient(app)
 
 
@@ -207,3 +294,30 @@ def test_comment2(client, test_user, test_org, test_group1):
         "v1/comments", data=json.dumps(payload), headers=headers)
 
     return response.json()
+
+
+@pytest.fixture
+def test_second_approver(client, session, test_user, test_org, test_request):
+    """
+        Another member of `test_org` approving `test_request` after `test_user`, at position 2
+    """
+    payload = {
+        "first_name": "Second",
+        "last_name": "Approver",
+        "email": "second.approver@gmail.com",
+        "password": "password123",
+        "unique_id": "1006"
+    }
+    res = client.post("/v1/auth/signup", data=json.dumps(payload))
+
+    approver = res.json()['data']
+    approver['access_token'] = res.json()['access_token']
+
+    role_id = session.query(OrganizationUser.role_id).filter(OrganizationUser.user_id == test_user['id']).scalar()
+    session.add_all([
+        OrganizationUser(organization_id=test_org['id'], user_id=approver['id'], role_id=role_id),
+        RequestApproval(request_id=test_request['id'], approver_id=approver['id'], position=2, status="pending"),
+    ])
+    session.commit()
+
+    return approver
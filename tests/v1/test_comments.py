@@ -1,7 +1,8 @@
 import pytest
 from fastapi import status
 import json
-from datetime import date
+from datetime import date, datetime, timedelta
+from api.v1.user.models import User
 
 
 def test_create_comment(client, test_user, test_org, test_group1):
@@ -29,10 +30,25 @@ def test_get_comment(client, test_user, test_comment, test_org):
     assert response.json()["content"] == test_comment['content']
 
 
+def test_comment_etag_follows_author(client, session, test_user, test_comment, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    def etag():
+        return client.get(f"v1/comments/{test_comment['id']}", headers=headers).headers['etag']
+
+    before = etag()
+    author = session.get(User, test_user['id'])
+    author.last_updated = datetime.utcnow() + timedelta(seconds=1)
+    session.commit()
+
+    assert etag() != before
+
+
 def test_get_comments(client, test_user, test_group1, test_comment, test_comment2, test_org):
 
     params = {"table_name": "groups",
-              "record_id": test_group1['id']}
+              "record_id": test_group1['id'],
+              "with_total": "exact"}
 
     headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
 
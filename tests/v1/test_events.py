@@ -0,0 +1,70 @@
+import asyncio
+import json
+import pytest
+from fastapi import Request, status
+from api.utils.events import event_hub, EventTypeEnum
+from api.v1.events.router import stream_events
+
+
+def test_request_created_event(client, test_user, test_org):
+    payload = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "VI",
+        "start": "2024-08-08",
+        "end": "2024-09-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    async def create_and_listen():
+        subscription = event_hub.subscribe(test_org['id'])
+        try:
+            # the app runs on the test client's own loop, events reach this one thread-safely
+            res = await asyncio.to_thread(client.post, 'v1/requests', headers=headers, data=json.dumps(payload))
+            _, type, data = await asyncio.wait_for(subscription.get(), timeout=5)
+        finally:
+            event_hub.unsubscribe(subscription)
+
+        return res, type, data
+
+    res, type, data = asyncio.run(create_and_listen())
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert type == EventTypeEnum.REQUEST_CREATED
+    assert data['id'] == res.json()['id']
+    assert event_hub.connections == 0
+
+
+def test_events_connection_cap(client, test_user, test_org, monkeypatch):
+    monkeypatch.setattr(event_hub, "max_connections", 0)
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.get('v1/events', headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+def test_events_client_leaving_before_the_stream_starts(test_org):
+    async def connect_and_leave():
+        async def receive():
+            await asyncio.Event().wait()
+
+        async def send(message):
+            raise OSError("connection closed")
+
+        scope = {"type": "http", "method": "GET", "path": "/v1/events", "headers": [], "query_string": b""}
+        response = await stream_events(organization_id=test_org['id'], request=Request(scope, receive), user=None)
+
+        with pytest.raises(Exception):
+            await response(scope, receive, send)
+
+    asyncio.run(connect_and_leave())
+
+    assert event_hub.connections == 0
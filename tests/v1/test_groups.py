@@ -1,5 +1,9 @@
 import json
+from datetime import datetime, timedelta
 from fastapi import status
+from api.v1.groups.models import Group, GroupMember, GroupApprover
+from api.v1.organization.models import OrganizationUser, Role
+from api.v1.user.models import User
 
 
 def test_create_group(client, test_user, test_org):
@@ -62,10 +66,33 @@ def test_remove_members(client, test_user, test_org, test_group1, test_add_membe
     assert res.json() == f"User(s) with IDs [{test_add_member1['member_id']}] removed successfully"
 
 
+def test_remove_members_and_approvers_from_one_group(client, session, test_user, test_org, test_group1, test_add_member1):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    client.post(f"v1/groups/{test_group1['id']}/approvers/add", headers=headers,
+                data=json.dumps({"organization_id": test_org['id'], "approver_ids": [test_user['id']]}))
+
+    res = client.post(f"v1/groups/{test_group1['id']}/members/remove", headers=headers,
+                      data=json.dumps({"organization_id": test_org['id'], "member_ids": [test_user['id']]}))
+
+    assert res.status_code == 200
+
+    res = client.post(f"v1/groups/{test_group1['id']}/approvers/remove", headers=headers,
+                      data=json.dumps({"organization_id": test_org['id'], "approver_ids": [test_user['id']]}))
+
+    assert res.status_code == 200
+
+    # the user stays a member and an approver of the organization's department
+    department_id = session.query(Group.id).filter(
+        Group.organization_id == test_org['id'], Group.id != test_group1['id']).scalar()
+
+    assert session.query(GroupMember.group_id).filter(GroupMember.member_id == test_user['id']).all() == [(department_id,)]
+    assert session.query(GroupApprover.group_id).filter(GroupApprover.approver_id == test_user['id']).all() == [(department_id,)]
+
+
 def test_get_members(client, test_user, test_org, test_group1, test_add_member1):
 
     headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
-    params = {"organization_id": test_org['id']}
+    params = {"organization_id": test_org['id'], "with_total": "exact"}
 
     res = client.get(f"v1/groups/{test_group1['id']}/members",
                      params=params, headers=headers)
@@ -75,5 +102,205 @@ def test_get_members(client, test_user, test_org, test_group1, test_add_member1)
     assert res.status_code == 200
     assert res.json()['total'] == 1 #only create test_add_member1 in this text
     assert len(res.json()['items']) == 1 #only create test_add_member1 in this text
+    assert res.json()['has_more'] is False
+
+
+def test_full_last_page_of_members_has_no_next_cursor(client, test_user, test_org, test_group1, test_add_member1):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id'], "size": 1}
+
+    res = client.get(f"v1/groups/{test_group1['id']}/members", params=params, headers=headers)
+
+    assert res.status_code == 200
+    assert len(res.json()['items']) == 1
+    assert res.json()['next_cursor'] is None
+    assert res.json()['next_page'] is None
+
+
+
+
+def test_get_group_etag_changes_on_update(client, test_user, test_org, test_group1):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    res = client.get(f"v1/groups/{test_group1['id']}", params=params, headers=headers)
+
+    assert res.status_code == 200
+    etag = res.headers['etag']
+
+    res = client.get(f"v1/groups/{test_group1['id']}", params=params, headers={**headers, 'If-None-Match': etag})
+
+    assert res.status_code == 304
+
+    payload = {"organization_id": test_org['id'], "name": "Renamed Group"}
+    res = client.put(f"v1/groups/{test_group1['id']}", data=json.dumps(payload), headers=headers)
+
+    assert res.status_code == 200
+
+    res = client.get(f"v1/groups/{test_group1['id']}", params=params, headers={**headers, 'If-None-Match': etag})
+
+    assert res.status_code == 200
+    assert res.json()['name'] == "Renamed Group"
+
+
+def test_group_etag_follows_embedded_users(client, session, test_user, test_org, test_group1):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    def etag():
+        return client.get(f"v1/groups/{test_group1['id']}", params=params, headers=headers).headers['etag']
+
+    def touch(row):
+        row.last_updated = datetime.utcnow() + timedelta(seconds=1)
+        session.commit()
+
+    before = etag()
+    touch(session.get(User, test_user['id']))
+    after = etag()
+
+    assert after != before
+
+    before = after
+    role_id = session.query(OrganizationUser.role_id).filter(OrganizationUser.user_id == test_user['id']).scalar()
+    touch(session.get(Role, role_id))
+
+    assert etag() != before
+
+
+def test_group_open_requests_counts_are_batched(client, test_user, test_org, test_group1, test_group2, test_add_member1, test_request, monkeypatch):
+    def per_group_session():
+        raise AssertionError("open_requests_count opened a session for a single group")
+
+    monkeypatch.setattr("api.v1.groups.models.get_db_with_ctx_mgr", per_group_session)
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    res = client.get("v1/groups", params=params, headers=headers)
+
+    assert res.status_code == 200
+    counts = {group['id']: group['open_requests_count'] for group in res.json()['items']}
+    assert counts[test_group1['id']] == 1
+    assert counts[test_group2['id']] == 0
+
+    res = client.get(f"v1/groups/{test_group1['id']}", params=params, headers=headers)
+
+    assert res.status_code == 200
+    assert res.json()['open_requests_count'] == 1
+
+    payload = {"organization_id": test_org['id'], "member_ids": [test_user["id"]]}
+    res = client.post(f"v1/groups/{test_group2['id']}/members/add", data=json.dumps(payload), headers=headers)
+
+    assert res.status_code == 201
+    assert res.json()[0]['group']['open_requests_count'] == 1
+
+
+def test_get_members_query_count_is_constant(client, test_user, test_org, test_group1, test_add_member1, statement_counter):
+    member_ids = [test_user['id']]
+    for number in range(3):
+        payload = {
+            "first_name": "Member",
+            "last_name": f"Number {number}",
+            "email": f"member{number}@example.com",
+            "password": "password123",
+            "unique_id": f"20{number}",
+        }
+        member_ids.append(client.post("/v1/auth/signup", data=json.dumps(payload)).json()['data']['id'])
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    payload = {"organization_id": test_org['id'], "member_ids": member_ids[1:]}
+
+    res = client.post(f"v1/groups/{test_group1['id']}/members/add", data=json.dumps(payload), headers=headers)
+
+    assert res.status_code == 201
+
+    statement_counts = []
+    for size in (1, 4):
+        statement_counter.clear()
+        params = {"organization_id": test_org['id'], "size": size}
+        res = client.get(f"v1/groups/{test_group1['id']}/members", params=params, headers=headers)
+
+        assert res.status_code == 200
+        assert len(res.json()['items']) == size
+        assert 'group' not in res.json()['items'][0]
+        statement_counts.append(len(statement_counter))
+
+    assert statement_counts[0] == statement_counts[1]
+
+
+def test_import_members(client, test_user, test_org, test_group1, test_add_member1):
+    payload = {
+        "first_name": "Outside",
+        "last_name": "User",
+        "email": "outside@example.com",
+        "password": "password123",
+        "unique_id": "300",
+    }
+    outsider_id = client.post("/v1/auth/signup", data=json.dumps(payload)).json()['data']['id']
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    payload = {"organization_id": test_org['id'], "member_ids": [test_user['id'], outsider_id, outsider_id]}
+
+    res = client.post(f"v1/groups/{test_group1['id']}/members/import", data=json.dumps(payload), headers=headers)
+
+    assert res.status_code == 200
+    assert res.json() == {"added": [], "skipped": [test_user['id']], "invalid": [outsider_id]}
+
+    files = {"file": ("approvers.csv", f"user_id\n{test_user['id']}\n", "text/csv")}
+    data = {"organization_id": test_org['id']}
+
+    res = client.post(f"v1/groups/{test_group1['id']}/approvers/import/csv", data=data, files=files, headers=headers)
+
+    assert res.status_code == 200
+    assert res.json() == {"added": [test_user['id']], "skipped": [], "invalid": []}
+
+    files = {"file": ("approvers.csv", "user_id\nnot-an-id\n", "text/csv")}
+
+    res = client.post(f"v1/groups/{test_group1['id']}/approvers/import/csv", data=data, files=files, headers=headers)
+
+    assert res.status_code == 400
+
+
+def test_group_hierarchy(client, test_user, test_org, test_group1, test_add_member1, test_request):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    def create_group(name, parent_group_id):
+        payload = {"name": name, "organization_id": test_org['id'], "parent_group_id": parent_group_id}
+        res = client.post("v1/groups", data=json.dumps(payload), headers=headers)
+        assert res.status_code == 201
+        return res.json()
+
+    team = create_group("Team", test_group1['id'])
+    squad = create_group("Squad", team['id'])
+
+    payload = {"organization_id": test_org['id'], "member_ids": [test_user['id']]}
+    client.post(f"v1/groups/{squad['id']}/members/add", data=json.dumps(payload), headers=headers)
+
+    res = client.get(f"v1/groups/{test_group1['id']}/subtree", params=params, headers=headers)
+
+    assert res.status_code == 200
+    assert [(node['id'], node['depth']) for node in res.json()] == [(test_group1['id'], 0), (team['id'], 1), (squad['id'], 2)]
+    # the requester is in the root group and the squad, counted once for the root's subtree
+    assert res.json()[0]['subtree_open_requests_count'] == 1
+    assert res.json()[1]['open_requests_count'] == 0 and res.json()[1]['subtree_open_requests_count'] == 1
+
+    res = client.get(f"v1/groups/{squad['id']}/ancestors", params=params, headers=headers)
+
+    assert [node['id'] for node in res.json()] == [test_group1['id'], team['id']]
+
+    res = client.get("v1/groups/tree", params=params, headers=headers)
+
+    assert res.status_code == 200
+    root = next(node for node in res.json() if node['id'] == test_group1['id'])
+    assert root['children'][0]['children'][0]['id'] == squad['id']
+
+    payload = {"organization_id": test_org['id'], "parent_group_id": squad['id']}
+    res = client.put(f"v1/groups/{test_group1['id']}", data=json.dumps(payload), headers=headers)
+
+    assert res.status_code == 400
 
+    client.delete(f"v1/groups/{team['id']}", params=params, headers=headers)
+    res = client.get(f"v1/groups/{squad['id']}/ancestors", params=params, headers=headers)
 
+    assert [(node['id'], node['depth']) for node in res.json()] == [(test_group1['id'], 1)]
@@ -0,0 +1,109 @@
+import asyncio
+from fastapi import status
+from sqlalchemy import text
+from api.db.profiler import SQLProfilerMiddleware, current_profile
+from api.v1.metrics import router as metrics_router
+
+
+def test_internal_endpoints_need_the_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(metrics_router, "METRICS_TOKEN", "")
+
+    res = client.get('internal/metrics', headers={"X-Metrics-Token": "anything"})
+
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+
+    monkeypatch.setattr(metrics_router, "METRICS_TOKEN", "test-metrics-token")
+
+    for method, path in (("GET", "internal/metrics"), ("PUT", "internal/profiler"), ("GET", "internal/profiles/missing")):
+        res = client.request(method, path, json={"enabled": False})
+
+        assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+        res = client.request(method, path, json={"enabled": False}, headers={"X-Metrics-Token": "wrong-token"})
+
+        assert res.status_code == status.HTTP_403_FORBIDDEN
+
+    res = client.get('internal/metrics', headers={"X-Metrics-Token": "test-metrics-token"})
+
+    assert res.status_code == status.HTTP_200_OK
+
+
+def test_profiler_switch(client, metrics_headers, sql_profiler):
+    res = client.put('internal/profiler', headers=metrics_headers, json={"enabled": False})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()['enabled'] is False
+    assert sql_profiler.enabled is False
+
+
+def test_profiler_records_each_request(client, test_request, test_user, test_org, metrics_headers, sql_profiler):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}', 'X-SQL-Profile': 'debug'}
+    params = {"organization_id": test_org['id']}
+
+    counts = []
+    for _ in range(2):
+        res = client.get(f"v1/requests/{test_request['id']}", headers=headers, params=params)
+
+        assert res.status_code == status.HTTP_200_OK
+        profile = client.get(f"internal/profiles/{res.headers['X-SQL-Profile-Id']}", headers=metrics_headers).json()
+
+        assert res.headers['X-SQL-Queries'].startswith(f"count={profile['count']};")
+        assert profile['count'] == len(profile['statements']) > 0
+        counts.append(profile['count'])
+
+    # each request starts from an empty profile
+    assert counts[0] == counts[1]
+    assert len(sql_profiler.profiles) == 2
+
+
+def test_profiler_middleware_passes_requests_through_while_off(client, test_request, test_user, test_org, sql_profiler, monkeypatch):
+    monkeypatch.setattr(sql_profiler, "enabled", False)
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append((receive, send))
+
+    async def receive():
+        pass
+
+    async def send(message):
+        pass
+
+    asyncio.run(SQLProfilerMiddleware(app)({"type": "http", "method": "GET", "path": "/"}, receive, send))
+
+    # the app gets the server's own callables, nothing is wrapped
+    assert calls == [(receive, send)]
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}', 'X-SQL-Profile': 'debug'}
+    res = client.get(f"v1/requests/{test_request['id']}", headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert "X-SQL-Queries" not in res.headers
+    assert not sql_profiler.profiles
+
+
+def test_profiler_stops_recording_when_the_request_ends(session, sql_profiler):
+    profile, token = sql_profiler.start_request(method="GET", path="/v1/requests")
+    session.execute(text("SELECT 1"))
+    sql_profiler.finish_request(profile=profile, token=token)
+
+    session.execute(text("SELECT 1"))
+
+    assert profile.count == 1
+    assert current_profile.get() is None
+
+
+def test_connection_hold_time_per_route(client, test_request, test_user, test_org, metrics_headers, route_hold_times):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.get(f"v1/requests/{test_request['id']}", headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.status_code == status.HTTP_200_OK
+    # reported under the route template, whichever request it served
+    assert [route for route, _ in route_hold_times] == ["GET /v1/requests/{id}"]
+    assert route_hold_times[0][1] > 0
+
+    routes = client.get('internal/metrics', headers=metrics_headers).json()['routes']
+
+    assert routes["GET /v1/requests/{id}"]['count'] >= 1
+    assert routes["GET /v1/requests/{id}"]['sum_ms'] > 0
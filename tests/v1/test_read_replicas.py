@@ -0,0 +1,204 @@
+import asyncio
+import itertools
+import json
+import time
+import pytest
+from fastapi import status
+from sqlalchemy.exc import DBAPIError
+from starlette.requests import Request
+from api.db import database
+from api.db.database import DB_PRIMARY_PIN_COOKIE, Replica, ReplicaSet
+
+
+class FakeSession:
+    def __init__(self, name: str, fails: bool = False) -> None:
+        self.name = name
+        self.fails = fails
+        self.closed = False
+
+    def connection(self):
+        if self.fails:
+            raise DBAPIError("SELECT 1", {}, Exception(f"{self.name} is down"))
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncSession(FakeSession):
+    async def connection(self):
+        super().connection()
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        super().close()
+
+
+class FakeReplica(Replica):
+    """
+        A replica without engines: its sessions fail to connect when `fails` is set
+    """
+    def __init__(self, name: str, connections: int = 0, fails: bool = False) -> None:
+        self.name = name
+        self.connections = connections
+        self.session_factory = lambda: FakeSession(name, fails=fails)
+        self.async_session_factory = lambda: FakeAsyncSession(name, fails=fails)
+        self.down_until = 0.0
+
+    def connections_in_use(self) -> int:
+        return self.connections
+
+
+def fake_replica_set(replicas: list[FakeReplica], strategy: str = "round_robin") -> ReplicaSet:
+    replica_set = ReplicaSet(hosts=[], strategy=strategy)
+    replica_set.replicas = replicas
+    replica_set._cycle = itertools.cycle(replicas)
+
+    return replica_set
+
+
+def http_request(cookies: dict = None) -> Request:
+    cookie_header = "; ".join(f"{name}={value}" for name, value in (cookies or {}).items())
+
+    return Request({"type": "http", "method": "GET", "headers": [(b"cookie", cookie_header.encode())]})
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    """
+        Two fake replicas behind the read dependencies, the second failing to connect, and a fake primary
+    """
+    replicas = [FakeReplica("replica-1"), FakeReplica("replica-2", fails=True)]
+    monkeypatch.setattr(database, "replica_set", fake_replica_set(replicas))
+    monkeypatch.setattr(database, "SessionLocal", lambda: FakeSession("primary"))
+    monkeypatch.setattr(database, "AsyncSessionLocal", lambda: FakeAsyncSession("primary"))
+
+    return replicas
+
+
+def test_round_robin_skips_replicas_marked_down():
+    first, second, third = FakeReplica("first"), FakeReplica("second"), FakeReplica("third")
+    replica_set = fake_replica_set([first, second, third])
+
+    assert [replica_set.choose() for _ in range(4)] == [first, second, third, first]
+
+    second.mark_down()
+
+    assert [replica_set.choose() for _ in range(3)] == [third, first, third]
+
+    # back in rotation once the retry delay has passed
+    second.down_until = time.monotonic() - 1
+
+    assert [replica_set.choose() for _ in range(3)] == [first, second, third]
+
+
+def test_least_connections_picks_the_idlest_available_replica():
+    busy, idle = FakeReplica("busy", connections=5), FakeReplica("idle", connections=1)
+    replica_set = fake_replica_set([busy, idle], strategy="least_connections")
+
+    assert replica_set.choose() is idle
+
+    idle.mark_down()
+
+    assert replica_set.choose() is busy
+
+    busy.mark_down()
+
+    assert replica_set.choose() is None
+
+
+def read_session(dependency, request: Request):
+    sessions = dependency(request)
+
+    return sessions, next(sessions)
+
+
+def test_read_db_falls_back_to_the_primary(replicas):
+    first, second = replicas
+
+    sessions, db = read_session(database.get_read_db, http_request())
+
+    assert db.name == "replica-1"
+    sessions.close()
+    assert db.closed
+
+    # the second replica fails to connect: the read goes to the primary and the replica is skipped from now on
+    sessions, db = read_session(database.get_read_db, http_request())
+
+    assert db.name == "primary"
+    assert not second.is_available
+    sessions.close()
+
+    sessions, db = read_session(database.get_read_db, http_request())
+
+    assert db.name == "replica-1"
+    sessions.close()
+
+
+def test_read_db_is_pinned_to_the_primary_after_a_write(replicas):
+    pinned = http_request({DB_PRIMARY_PIN_COOKIE: str(int(time.time()) + 60)})
+    expired = http_request({DB_PRIMARY_PIN_COOKIE: str(int(time.time()) - 1)})
+    garbled = http_request({DB_PRIMARY_PIN_COOKIE: "soon"})
+
+    sessions, db = read_session(database.get_read_db, pinned)
+
+    assert db.name == "primary"
+    sessions.close()
+
+    for request in (expired, garbled):
+        sessions, db = read_session(database.get_read_db, request)
+
+        assert db.name == "replica-1"
+        sessions.close()
+
+
+def test_async_reads_fall_back_to_the_primary(replicas):
+    first, second = replicas
+
+    async def read_session_names():
+        names = []
+        for _ in range(2):
+            sessions = database.get_async_read_db(http_request())
+            names.append((await sessions.__anext__()).name)
+            await sessions.aclose()
+
+        return names
+
+    assert asyncio.run(read_session_names()) == ["replica-1", "primary"]
+    assert not second.is_available
+
+
+def test_async_read_session_factory_probes_the_replica(replicas):
+    first, second = replicas
+    first.mark_down()
+    second.down_until = 0.0
+
+    # the only available replica is down: streamed work gets the primary's factory
+    session_factory = asyncio.run(database.get_async_read_session_factory(http_request()))
+
+    assert session_factory().name == "primary"
+    assert not second.is_available
+
+    first.down_until = 0.0
+    session_factory = asyncio.run(database.get_async_read_session_factory(http_request()))
+
+    assert session_factory().name == "replica-1"
+
+
+def test_writes_set_the_pin_cookie(client, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.get('v1/requests', headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert DB_PRIMARY_PIN_COOKIE not in res.cookies
+
+    payload = {"content": "Closed", "organization_id": test_org['id']}
+    res = client.post('v1/closeds', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert int(res.cookies[DB_PRIMARY_PIN_COOKIE]) > time.time()
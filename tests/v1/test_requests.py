@@ -1,5 +1,19 @@
+import asyncio
 import json
+from datetime import datetime, timedelta
+import pytest
 from fastapi import status
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from api.v1.requests import schemas as req_schemas
+from api.v1.requests.exceptions import messages
+from api.v1.requests.models import RequestApproval
+from api.v1.requests.services import RequestService
+from api.v1.groups import approver_chains
+from api.v1.groups.approver_chains import invalidate_approver_chains
+from api.v1.groups.models import Group, GroupApprover
+from api.v1.organization.models import OrganizationUser, Role
+from api.v1.user.models import User
 
 def test_create_request_where_start_date_is_farther_than_end_date(client, test_user, test_org):
     payload = {
@@ -96,11 +110,74 @@ def test_update_request_with_approval_status(client, test_user, test_org):
     # If the request approver is the only approver, confirm that the request status is set to approved
     pass
 
-def test_update_request_with_highest_position_approver(client, test_request, test_user, test_org):
-    pass
+def test_update_request_with_highest_position_approver(client, test_request, test_user, test_org, test_second_approver):
+    headers = {'Authorization': f'Bearer {test_second_approver["access_token"]}'}
+    payload = {"organization_id": test_org["id"], "status": "approved"}
 
-def test_update_request_with_lowest_position_approver(client, test_request, test_user, test_org):
-    pass
+    res = client.put(f'v1/requests/{test_request['id']}', headers=headers, data=json.dumps(payload))
+
+    # the lower position hasn't decided yet
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+    assert res.json()['detail'] == messages.LOWER_APPROVER_HAS_NOT_APPROVED
+
+def test_update_request_with_lowest_position_approver(client, test_request, test_user, test_org, test_second_approver):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    payload = {"organization_id": test_org["id"], "status": "approved"}
+
+    res = client.put(f'v1/requests/{test_request['id']}', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_200_OK
+    # the request follows its highest position approver, still pending
+    assert res.json()['status'] == "pending"
+    assert {approval['approver_id']: approval['status'] for approval in res.json()['request_approvals']} == {
+        test_user['id']: "approved", test_second_approver['id']: "pending"
+    }
+
+def test_concurrent_approvals_see_each_other(session, test_request, test_user, test_org, test_second_approver):
+    other_session = Session(bind=session.get_bind())
+    payload = req_schemas.UpdateRequest(organization_id=test_org["id"], status="approved")
+
+    # the second approver's transaction read the approvals before the first approver committed
+    stale_approvals = other_session.query(RequestApproval).filter(RequestApproval.request_id == test_request['id']).all()
+
+    asyncio.run(RequestService.update_request_in_organization(
+        id=test_request['id'], payload=payload, updater=test_user['id'], db=session))
+    request = asyncio.run(RequestService.update_request_in_organization(
+        id=test_request['id'], payload=payload, updater=test_second_approver['id'], db=other_session))
+
+    assert request.status == "approved"
+    assert [approval.status for approval in stale_approvals] == ["approved", "approved"]
+    other_session.close()
+
+def test_approval_conflict_at_commit(client, session, test_request, test_user, test_org, monkeypatch):
+    def commit():
+        raise OperationalError("COMMIT", {}, Exception(1213, "Deadlock found when trying to get lock"))
+
+    monkeypatch.setattr(session, "commit", commit)
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    payload = {"organization_id": test_org["id"], "status": "approved"}
+
+    res = client.put(f'v1/requests/{test_request['id']}', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_409_CONFLICT
+
+    monkeypatch.undo()
+    res = client.get(f'v1/requests/{test_request['id']}', headers=headers, params={"organization_id": test_org['id']})
+
+    assert [approval['status'] for approval in res.json()['request_approvals']] == ["pending"]
+
+def test_other_operational_errors_are_not_conflicts(client, session, test_request, test_user, test_org, monkeypatch):
+    def commit():
+        raise OperationalError("COMMIT", {}, Exception(2006, "MySQL server has gone away"))
+
+    monkeypatch.setattr(session, "commit", commit)
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    payload = {"organization_id": test_org["id"], "status": "approved"}
+
+    with pytest.raises(OperationalError):
+        client.put(f"v1/requests/{test_request['id']}", headers=headers, data=json.dumps(payload))
 
 def test_delete_request(client, test_user, test_org):
     pass
@@ -108,7 +185,7 @@ def test_delete_request(client, test_user, test_org):
 def test_get_requests(client, test_request, test_user, test_org):
     headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
     
-    res = client.get('v1/requests', headers=headers, params={ "organization_id": test_org['id'] })
+    res = client.get('v1/requests', headers=headers, params={ "organization_id": test_org['id'], "with_total": "exact" })
 
     assert res.status_code == status.HTTP_200_OK
     assert res.json()['total'] == 1 #only test_request was created
@@ -130,4 +207,661 @@ def test_get_request(client, test_request, test_user, test_org):
     assert res.json()['rate'] == test_request["rate"]
     assert res.json()['meal'] == test_request["meal"]
     assert res.json()['transport'] == test_request["transport"]
-    assert res.json()['other_requests'] == test_request["other_requests"]
\ No newline at end of file
+    assert res.json()['other_requests'] == test_request["other_requests"]
+
+def test_create_requests_in_bulk(client, test_user, test_org):
+    request = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "VI",
+        "start": "2024-08-08",
+        "end": "2024-09-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+    other_org_request = {**request, "organization_id": test_org["id"] + 1}
+    payload = {"organization_id": test_org["id"], "requests": [request, other_org_request, request]}
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.post('v1/requests/bulk', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert res.json()['created'] == 2
+    assert res.json()['failed'] == 1
+    assert res.json()['results'][1]['id'] is None
+    assert res.json()['results'][1]['error'] is not None
+
+    res = client.get(f'v1/requests/{res.json()["results"][0]["id"]}', headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.status_code == status.HTTP_200_OK
+    # the organization's default department makes its creator the approver
+    assert [approval['approver_id'] for approval in res.json()['request_approvals']] == [test_user['id']]
+
+
+def test_get_requests_with_cursor(client, test_user, test_org):
+    request = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "VI",
+        "start": "2024-08-08",
+        "end": "2024-09-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+    payload = {"organization_id": test_org["id"], "requests": [request] * 3}
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.post('v1/requests/bulk', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+
+    res = client.get('v1/requests', headers=headers, params={"organization_id": test_org['id'], "size": 2})
+
+    assert res.status_code == status.HTTP_200_OK
+    first_page = res.json()
+    assert first_page['next_cursor'] is not None
+
+    res = client.get('v1/requests', headers=headers, params={"organization_id": test_org['id'], "size": 2, "cursor": first_page['next_cursor']})
+
+    assert res.status_code == status.HTTP_200_OK
+    second_page = res.json()
+    assert len(second_page['items']) == 1
+    assert second_page['next_cursor'] is None
+    assert second_page['next_page'] is None
+    assert {item['id'] for item in first_page['items']}.isdisjoint(item['id'] for item in second_page['items'])
+
+    res = client.get('v1/requests', headers=headers, params={"organization_id": test_org['id'], "cursor": "not-a-cursor"})
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_cursor_next_page_keeps_the_filters(client, test_user, test_org):
+    request = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "VI",
+        "start": "2024-08-08",
+        "end": "2024-09-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+    payload = {"organization_id": test_org["id"], "requests": [request] * 5}
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.post('v1/requests/bulk', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+
+    params = {"organization_id": test_org['id'], "status": "pending", "size": 2}
+    cursor = client.get('v1/requests', headers=headers, params=params).json()['next_cursor']
+    res = client.get('v1/requests', headers=headers, params={**params, "cursor": cursor})
+
+    assert res.status_code == status.HTTP_200_OK
+    next_page = res.json()['next_page']
+    assert f"organization_id={test_org['id']}" in next_page and "status=pending" in next_page
+
+    # the link can be followed as is
+    res = client.get(f"v1{next_page}", headers=headers)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert len(res.json()['items']) == 1
+
+    # the approver inbox pages the same way
+    params = {"organization_id": test_org['id'], "size": 2}
+    cursor = client.get('v1/approvals/inbox', headers=headers, params=params).json()['next_cursor']
+    res = client.get('v1/approvals/inbox', headers=headers, params={**params, "cursor": cursor})
+
+    assert res.status_code == status.HTTP_200_OK
+
+    res = client.get(f"v1{res.json()['next_page']}", headers=headers)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert len(res.json()['items']) == 1
+
+
+def test_get_requests_without_total(client, test_request, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.get('v1/requests', headers=headers, params={"organization_id": test_org['id'], "size": 1})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()['total'] is None
+    assert res.json()['has_more'] is False
+    assert res.json()['next_page'] is None
+    assert len(res.json()['items']) == 1
+
+    res = client.get('v1/requests', headers=headers, params={"organization_id": test_org['id'], "with_total": "cached"})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()['total'] == 1
+
+
+def test_get_approver_inbox(client, test_request, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.get('v1/approvals/inbox', headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.status_code == status.HTTP_200_OK
+    # the organization's default department makes its creator the only approver
+    assert [item['id'] for item in res.json()['items']] == [test_request['id']]
+    assert res.json()['counts'] == {"pending": 1, "approved": 0, "rejected": 0}
+
+    payload = {"organization_id": test_org["id"], "status": "rejected"}
+    res = client.put(f'v1/requests/{test_request["id"]}', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_200_OK
+
+    res = client.get('v1/approvals/inbox', headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()['items'] == []
+    assert res.json()['counts'] == {"pending": 0, "approved": 0, "rejected": 1}
+
+
+def test_approver_turn_is_the_same_in_inbox_and_update(client, session, test_request, test_user, test_org, test_second_approver):
+    # a gap in the positions: only position 1, still pending, is below the second approver
+    session.query(RequestApproval).filter(RequestApproval.approver_id == test_second_approver['id']).update({"position": 3})
+    session.commit()
+
+    headers = {'Authorization': f'Bearer {test_second_approver["access_token"]}'}
+
+    res = client.get('v1/approvals/inbox', headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.json()['items'] == []
+
+    payload = {"organization_id": test_org["id"], "status": "approved"}
+    res = client.put(f'v1/requests/{test_request["id"]}', headers=headers, data=json.dumps(payload))
+
+    assert res.json()['detail'] == messages.LOWER_APPROVER_HAS_NOT_APPROVED
+
+    payload = {"organization_id": test_org["id"], "status": "rejected"}
+    client.put(f'v1/requests/{test_request["id"]}', headers={'Authorization': f'Bearer {test_user["access_token"]}'}, data=json.dumps(payload))
+
+    res = client.get('v1/approvals/inbox', headers=headers, params={"organization_id": test_org['id']})
+
+    assert [item['id'] for item in res.json()['items']] == [test_request['id']]
+
+
+def test_get_requests_query_count_is_constant(client, test_user, test_org, statement_counter):
+    request = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "VI",
+        "start": "2024-08-08",
+        "end": "2024-09-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+    payload = {"organization_id": test_org["id"], "requests": [request] * 5}
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.post('v1/requests/bulk', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+
+    statement_counts = []
+    for size in (1, 5):
+        statement_counter.clear()
+        res = client.get('v1/requests', headers=headers, params={"organization_id": test_org['id'], "size": size})
+
+        assert res.status_code == status.HTTP_200_OK
+        assert len(res.json()['items']) == size
+        statement_counts.append(len(statement_counter))
+
+    assert statement_counts[0] == statement_counts[1]
+
+    # requests + requesters, requester orgs + roles, approvals + approvers, approver orgs + roles
+    first_list_statement = next(i for i, statement in enumerate(statement_counter) if "FROM requests" in statement)
+    assert len(statement_counter[first_list_statement:]) == 4
+
+
+def test_get_requests_with_sparse_fieldset(client, test_request, test_user, test_org, statement_counter):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id'], "fields": "status,city,start,end", "embed": "requester"}
+
+    res = client.get('v1/requests', headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert set(res.json()['items'][0]) == {"id", "status", "city", "start", "end", "requester"}
+    assert res.json()['items'][0]['requester']['id'] == test_user['id']
+    # the narrowed column list reaches the SQL too
+    assert not any("requests.purpose" in statement for statement in statement_counter)
+
+    res = client.get(f'v1/requests/{test_request["id"]}', headers=headers, params={"organization_id": test_org['id'], "fields": "city"})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json() == {"id": test_request['id'], "city": test_request['city']}
+
+    res = client.get('v1/requests', headers=headers, params={"organization_id": test_org['id'], "fields": "password"})
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_search_requests(client, test_user, test_org):
+    request = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "VI",
+        "start": "2024-08-08",
+        "end": "2024-09-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+    payload = {"organization_id": test_org["id"], "requests": [
+        {**request, "purpose": "Quarterly board meeting"},
+        {**request, "purpose": "Board meeting and site visit", "hotel": "Eko hotel"},
+        {**request, "purpose": "Client workshop", "city": "Ikeja"},
+    ]}
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.post('v1/requests/bulk', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    board_meeting_ids = {result['id'] for result in res.json()['results'][:2]}
+
+    res = client.get('v1/requests/search', headers=headers, params={"organization_id": test_org['id'], "q": "board meeting"})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert {item['id'] for item in res.json()['items']} == board_meeting_ids
+
+    # requester names are searchable too, and a full page hands out a cursor for the rest
+    params = {"organization_id": test_org['id'], "q": test_user['first_name'], "size": 2}
+    res = client.get('v1/requests/search', headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert len(res.json()['items']) == 2
+    assert res.json()['next_cursor'] is not None
+
+    res = client.get('v1/requests/search', headers=headers, params={**params, "cursor": res.json()['next_cursor']})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert len(res.json()['items']) == 1
+    assert res.json()['next_cursor'] is None
+
+
+def test_export_requests(client, test_request, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.get('v1/requests/export', headers=headers, params={"organization_id": test_org['id']})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.headers['content-type'].startswith('text/csv')
+    lines = res.text.splitlines()
+    assert lines[0].startswith('id,organization_id,requester_id,status')
+    assert len(lines) == 2
+    assert lines[1].startswith(f"{test_request['id']},{test_org['id']},{test_user['id']},pending")
+
+    res = client.get('v1/requests/export', headers=headers, params={"organization_id": test_org['id'], "format": "ndjson"})
+
+    assert res.status_code == status.HTTP_200_OK
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert [row['id'] for row in rows] == [test_request['id']]
+    assert rows[0]['city'] == test_request['city']
+
+    params = {"organization_id": test_org['id'], "format": "ndjson", "created_to": "2000-01-01"}
+    res = client.get('v1/requests/export', headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.text == ""
+
+
+def test_get_travelling(client, test_user, test_org):
+    request = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "VI",
+        "start": "2024-08-08",
+        "end": "2024-08-20",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+        "status": "approved",
+    }
+    payload = {"organization_id": test_org["id"], "requests": [
+        request,
+        {**request, "city": "Ikeja", "start": "2024-07-01", "end": "2024-09-30"},
+        {**request, "start": "2024-10-01", "end": "2024-10-05"},
+        {**request, "status": "pending"},
+    ]}
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.post('v1/requests/bulk', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    vi_id, ikeja_id = (result['id'] for result in res.json()['results'][:2])
+
+    params = {"organization_id": test_org['id'], "start": "2024-08-15", "end": "2024-08-31"}
+    res = client.get('v1/requests/travelling', headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    trips = {group['city']: [trip['request_id'] for trip in group['trips']] for group in res.json()['groups']}
+    assert trips == {"Ikeja": [ikeja_id], "VI": [vi_id]}
+
+    res = client.get('v1/requests/travelling', headers=headers, params={**params, "city": "VI"})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [group['city'] for group in res.json()['groups']] == ["VI"]
+
+    res = client.get('v1/requests/travelling', headers=headers, params={**params, "start": "2024-09-01"})
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_create_overlapping_request(client, test_request, test_user, test_org):
+    payload = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "Ikeja",
+        "start": "2024-09-01",
+        "end": "2024-09-10",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+
+    res = client.post('v1/requests', headers=headers, params={"on_overlap": "reject"}, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_409_CONFLICT
+
+    res = client.post('v1/requests', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert res.json()['overlapping_request_ids'] == [test_request['id']]
+
+    # the second item only overlaps the first one of the batch
+    bulk_payload = {"organization_id": test_org["id"], "requests": [
+        {**payload, "start": "2024-10-01", "end": "2024-10-05"},
+        {**payload, "start": "2024-10-05", "end": "2024-10-08"},
+        {**payload, "start": "2024-10-09", "end": "2024-10-12"},
+    ]}
+
+    res = client.post('v1/requests/bulk', headers=headers, params={"on_overlap": "reject"}, data=json.dumps(bulk_payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert res.json()['created'] == 2
+    assert [result['error'] is None for result in res.json()['results']] == [True, False, True]
+
+
+def test_search_follows_requester_rename(client, session, test_request, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    session.get(User, test_user['id']).last_name = "Okafor"
+    session.commit()
+
+    res = client.get('v1/requests/search', headers=headers, params={**params, "q": "Okafor"})
+
+    assert [item['id'] for item in res.json()['items']] == [test_request['id']]
+
+    res = client.get('v1/requests/search', headers=headers, params={**params, "q": test_user['last_name']})
+
+    assert res.json()['items'] == []
+
+
+def test_trips_in_another_organization_do_not_overlap(client, test_request, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    other_org = client.post("v1/organizations", headers=headers, data=json.dumps({"name": "Other-Org"})).json()
+
+    payload = {
+        "organization_id": other_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "Ikeja",
+        "start": "2024-09-01",
+        "end": "2024-09-10",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+
+    res = client.post('v1/requests', headers=headers, params={"on_overlap": "reject"}, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert res.json()['overlapping_request_ids'] == []
+
+
+def test_get_request_conditionally(client, test_request, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    res = client.get(f"v1/requests/{test_request['id']}", headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    etag, last_modified = res.headers['etag'], res.headers['last-modified']
+
+    res = client.get(f"v1/requests/{test_request['id']}", headers={**headers, 'If-None-Match': etag}, params=params)
+
+    assert res.status_code == status.HTTP_304_NOT_MODIFIED
+    assert res.headers['etag'] == etag
+
+    res = client.get(f"v1/requests/{test_request['id']}", headers={**headers, 'If-Modified-Since': last_modified}, params=params)
+
+    assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # another representation of the same request has its own tag
+    res = client.get(f"v1/requests/{test_request['id']}", headers={**headers, 'If-None-Match': etag}, params={**params, "fields": "id,status"})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.headers['etag'] != etag
+
+    res = client.get('v1/requests', headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.headers['etag'].startswith('W/')
+
+    res = client.get('v1/requests', headers={**headers, 'If-None-Match': res.headers['etag']}, params=params)
+
+    assert res.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_request_etag_follows_embedded_users(client, session, test_request, test_user, test_org, test_second_approver):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    def etag():
+        return client.get(f"v1/requests/{test_request['id']}", headers=headers, params=params).headers['etag']
+
+    def touch(row):
+        row.last_updated = datetime.utcnow() + timedelta(seconds=1)
+        session.commit()
+
+    before = etag()
+    touch(session.get(User, test_second_approver['id']))
+    after = etag()
+
+    assert after != before
+
+    before = after
+    role_id = session.query(OrganizationUser.role_id).filter(OrganizationUser.user_id == test_user['id']).scalar()
+    touch(session.get(Role, role_id))
+
+    assert etag() != before
+
+
+def test_approver_chain_is_cached(client, test_request, test_user, test_org, test_group1, statement_counter):
+    payload = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "Ikeja",
+        "start": "2024-11-01",
+        "end": "2024-11-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    statement_counter.clear()
+
+    res = client.post('v1/requests', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert [approval['approver_id'] for approval in res.json()['request_approvals']] == [test_user['id']]
+    assert not any("group_approvers" in statement for statement in statement_counter)
+
+    # joining a group with an approver changes the chain
+    user_payload = {
+        "first_name": "Second",
+        "last_name": "Approver",
+        "email": "second.approver@example.com",
+        "password": "password123",
+        "unique_id": "400",
+    }
+    approver_id = client.post("/v1/auth/signup", data=json.dumps(user_payload)).json()['data']['id']
+
+    client.post(f"v1/groups/{test_group1['id']}/approvers/add", headers=headers,
+                data=json.dumps({"organization_id": test_org['id'], "approver_ids": [approver_id]}))
+    client.post(f"v1/groups/{test_group1['id']}/members/add", headers=headers,
+                data=json.dumps({"organization_id": test_org['id'], "member_ids": [test_user['id']]}))
+
+    res = client.post('v1/requests', headers=headers, data=json.dumps({**payload, "start": "2024-12-01", "end": "2024-12-05"}))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert {approval['approver_id'] for approval in res.json()['request_approvals']} == {test_user['id'], approver_id}
+
+
+def test_approver_chain_follows_approval_levels(client, session, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    user_payload = {
+        "first_name": "Second",
+        "last_name": "Approver",
+        "email": "second.approver@example.com",
+        "password": "password123",
+        "unique_id": "401",
+    }
+    approver_id = client.post("/v1/auth/signup", data=json.dumps(user_payload)).json()['data']['id']
+
+    # the organization's department group has a single approval level
+    department = session.query(Group).filter(Group.organization_id == test_org['id']).one()
+    session.add(GroupApprover(group_id=department.id, approver_id=approver_id, position=2))
+    session.commit()
+
+    payload = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "Ikeja",
+        "start": "2024-11-01",
+        "end": "2024-11-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+
+    res = client.post('v1/requests', headers=headers, data=json.dumps(payload))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert [(approval['approver_id'], approval['position']) for approval in res.json()['request_approvals']] == [
+        (test_user['id'], 1)
+    ]
+
+    # raising the levels invalidates the cached chain
+    res = client.put(f"v1/groups/{department.id}", headers=headers,
+                     data=json.dumps({"organization_id": test_org['id'], "approval_levels": 2}))
+
+    assert res.status_code == status.HTTP_200_OK
+
+    res = client.post('v1/requests', headers=headers, data=json.dumps({**payload, "start": "2024-12-01", "end": "2024-12-05"}))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert sorted((approval['approver_id'], approval['position']) for approval in res.json()['request_approvals']) == [
+        (test_user['id'], 1), (approver_id, 2)
+    ]
+
+    # an unset level leaves the group uncapped
+    session.refresh(department)
+    department.approval_levels = None
+    session.query(GroupApprover).filter(GroupApprover.approver_id == approver_id).update({"position": 3})
+    invalidate_approver_chains(test_org['id'], db=session)
+    session.commit()
+
+    res = client.post('v1/requests', headers=headers, data=json.dumps({**payload, "start": "2025-01-01", "end": "2025-01-05"}))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert sorted((approval['approver_id'], approval['position']) for approval in res.json()['request_approvals']) == [
+        (test_user['id'], 1), (approver_id, 3)
+    ]
+
+
+def test_approver_chain_invalidation_reaches_other_workers(client, monkeypatch, test_request, test_user, test_org, test_group1):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    user_payload = {
+        "first_name": "Second",
+        "last_name": "Approver",
+        "email": "second.approver@example.com",
+        "password": "password123",
+        "unique_id": "402",
+    }
+    approver_id = client.post("/v1/auth/signup", data=json.dumps(user_payload)).json()['data']['id']
+
+    client.post(f"v1/groups/{test_group1['id']}/approvers/add", headers=headers,
+                data=json.dumps({"organization_id": test_org['id'], "approver_ids": [approver_id]}))
+    client.post(f"v1/groups/{test_group1['id']}/members/add", headers=headers,
+                data=json.dumps({"organization_id": test_org['id'], "member_ids": [test_user['id']]}))
+
+    payload = {
+        "organization_id": test_org["id"],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "Ikeja",
+        "start": "2024-11-01",
+        "end": "2024-11-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+
+    # a second worker process, with its own cache warmed while the approver was still in the group
+    other_worker_cache = approver_chains.ApproverChainCache(ttl_seconds=3600)
+    this_worker_cache = approver_chains.approver_chain_cache
+    monkeypatch.setattr(approver_chains, "approver_chain_cache", other_worker_cache)
+
+    res = client.post('v1/requests', headers=headers, data=json.dumps(payload))
+
+    assert {approval['approver_id'] for approval in res.json()['request_approvals']} == {test_user['id'], approver_id}
+
+    # this worker removes the approver
+    monkeypatch.setattr(approver_chains, "approver_chain_cache", this_worker_cache)
+    res = client.post(f"v1/groups/{test_group1['id']}/approvers/remove", headers=headers,
+                      data=json.dumps({"organization_id": test_org['id'], "approver_ids": [approver_id]}))
+
+    assert res.status_code == status.HTTP_200_OK
+
+    # the second worker sees the organization's new chain version and drops its copy
+    monkeypatch.setattr(approver_chains, "approver_chain_cache", other_worker_cache)
+    res = client.post('v1/requests', headers=headers, data=json.dumps({**payload, "start": "2024-12-01", "end": "2024-12-05"}))
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert [approval['approver_id'] for approval in res.json()['request_approvals']] == [test_user['id']]
@@ -0,0 +1,57 @@
+from fastapi import status
+from sqlalchemy import select
+from api.v1.requests.models import Request as RequestModel
+from api.v1.user.models import User
+
+
+def soft_delete(session, model, id):
+    session.execute(select(model).filter(model.id == id)).scalar_one().is_deleted = True
+    session.commit()
+    session.expunge_all()
+
+
+def test_soft_deleted_request_is_hidden(client, session, test_request, test_user, test_org):
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    res = client.get('v1/requests', headers=headers, params=params)
+
+    assert [request['id'] for request in res.json()['items']] == [test_request['id']]
+
+    soft_delete(session, RequestModel, test_request['id'])
+
+    res = client.get('v1/requests', headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()['items'] == []
+
+    res = client.get(f"v1/requests/{test_request['id']}", headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+
+    assert session.execute(select(RequestModel)).scalars().all() == []
+
+
+def test_relationship_loads_keep_soft_deleted_rows(session, test_request, test_user):
+    soft_delete(session, User, test_user['id'])
+
+    assert session.execute(select(User).filter(User.id == test_user['id'])).scalar_one_or_none() is None
+
+    request = session.execute(select(RequestModel).filter(RequestModel.id == test_request['id'])).scalar_one()
+
+    assert request.requester.id == test_user['id']
+    assert request.requester.is_deleted is True
+
+
+def test_include_deleted_opt_out(session, test_request):
+    soft_delete(session, RequestModel, test_request['id'])
+    query = select(RequestModel.id).filter(RequestModel.id == test_request['id'])
+
+    assert session.scalars(query).all() == []
+    assert session.scalars(query.execution_options(include_deleted=True)).all() == [test_request['id']]
+
+    session.info["include_deleted"] = True
+    try:
+        assert session.scalars(query).all() == [test_request['id']]
+    finally:
+        del session.info["include_deleted"]
@@ -0,0 +1,136 @@
+import json
+import time
+import pytest
+from datetime import datetime, timedelta
+from fastapi import status
+from sqlalchemy.orm import Session
+from api.v1.closed.models import Closed
+from api.v1.sync import services as sync_services
+
+
+def test_sync(client, test_request, test_user, test_org, monkeypatch):
+    # rows written by this test are seconds old at most
+    monkeypatch.setattr(sync_services, "SYNC_SETTLE_SECONDS", 0)
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    res = client.get('v1/sync', headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [request['id'] for request in res.json()['requests']] == [test_request['id']]
+    assert res.json()['has_more'] is False
+    token = res.json()['next_token']
+
+    res = client.get('v1/sync', headers=headers, params={**params, "since": token})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()['requests'] == []
+    assert res.json()['next_token'] == token
+
+    closed = client.post('v1/closeds', headers=headers, data=json.dumps({"content": "Closed", "organization_id": test_org['id']})).json()
+
+    res = client.get('v1/sync', headers=headers, params={**params, "since": token})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [item['id'] for item in res.json()['closeds']] == [closed['id']]
+    token = res.json()['next_token']
+
+    client.delete(f"v1/closeds/{closed['id']}", headers=headers)
+
+    res = client.get('v1/sync', headers=headers, params={**params, "since": token})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()['closeds'] == []
+    assert res.json()['tombstones'] == [
+        {"entity": "closed", "id": closed['id'], "deleted_at": res.json()['tombstones'][0]['deleted_at']}
+    ]
+
+    res = client.get('v1/sync', headers=headers, params={**params, "since": "not-a-token"})
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.fixture
+def non_utc_clock(monkeypatch):
+    # a host clock five hours behind UTC, no stamp read by the feed may depend on it
+    monkeypatch.setenv("TZ", "Etc/GMT+5")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_sync_sees_inserts_and_updates_on_a_non_utc_host(client, test_request, test_user, test_org, monkeypatch, non_utc_clock):
+    monkeypatch.setattr(sync_services, "SYNC_SETTLE_SECONDS", 0)
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+
+    token = client.get('v1/sync', headers=headers, params=params).json()['next_token']
+
+    payload = {
+        "organization_id": test_org['id'],
+        "country": "Nigeria",
+        "state": "Lagos",
+        "city": "Ikeja",
+        "start": "2024-11-01",
+        "end": "2024-11-05",
+        "hotel": "Lagos Orient",
+        "room": "string",
+        "rate": 15000,
+        "requester_id": test_user['id'],
+    }
+    created_request = client.post('v1/requests', headers=headers, data=json.dumps(payload)).json()
+    res = client.put(f"v1/requests/{test_request['id']}", headers=headers,
+                     data=json.dumps({"organization_id": test_org['id'], "purpose": "Moved"}))
+
+    assert res.status_code == status.HTTP_200_OK
+
+    res = client.get('v1/sync', headers=headers, params={**params, "since": token})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert sorted(request['id'] for request in res.json()['requests']) == [test_request['id'], created_request['id']]
+
+
+def test_sync_waits_for_late_commits(client, session, test_user, test_org, monkeypatch):
+    monkeypatch.setattr(sync_services, "SYNC_SETTLE_SECONDS", 60)
+
+    headers = {'Authorization': f'Bearer {test_user["access_token"]}'}
+    params = {"organization_id": test_org['id']}
+    now = datetime.utcnow()
+
+    def closed(stamped_seconds_ago):
+        return Closed(content="Closed", author=test_user['id'], organization_id=test_org['id'],
+                      last_updated=now - timedelta(seconds=stamped_seconds_ago))
+
+    settled = closed(120)
+    session.add(settled)
+    session.commit()
+
+    # a long transaction stamped its row before a newer one committed, and commits only after the first sync
+    other_session = Session(bind=session.get_bind())
+    late = closed(50)
+    other_session.add(late)
+    other_session.flush()
+    late_id = late.id
+
+    newer = closed(40)
+    session.add(newer)
+    session.commit()
+
+    res = client.get('v1/sync', headers=headers, params=params)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [item['id'] for item in res.json()['closeds']] == [settled.id]
+    token = res.json()['next_token']
+
+    other_session.commit()
+    other_session.close()
+
+    # once the window has passed, both rows are behind the token's position, in stamp order
+    monkeypatch.setattr(sync_services, "SYNC_SETTLE_SECONDS", 0)
+    res = client.get('v1/sync', headers=headers, params={**params, "since": token})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [item['id'] for item in res.json()['closeds']] == [late_id, newer.id]